@@ -1,18 +1,43 @@
+from django import forms
 from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
 from django.http import HttpResponseRedirect
+from django.utils import timezone
 from .models import (
     Category,
     MenuItem,
+    MenuItemPrice,
     NewsFeed,
     CustomerProfile,
     Order,
     OrderItem,
+    OrderStatusChange,
     Reward,
     RewardRedemption,
+    OutboxEvent,
 )
+from . import leaderboards
 from .admin_models import UserReport, SalesReport
+from .order_utils import transition_orders
+from .search import search_ids
+
+
+class IndexedSearchMixin:
+    """
+    Changelist search through the search index (restaurant/search.py) instead
+    of icontains scans over search_fields; accents are optional and every word
+    matches as a prefix.
+    """
+
+    search_kind = None
+    search_id_field = "pk"
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        ids = search_ids(search_term, self.search_kind)
+        return queryset.filter(**{f"{self.search_id_field}__in": ids}), False
 
 
 @admin.register(Category)
@@ -25,37 +50,104 @@ class CategoryAdmin(admin.ModelAdmin):
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
-    readonly_fields = ["price", "subtotal"]
+    readonly_fields = ["price", "subtotal", "price_version"]
+
+
+class MenuItemPriceInline(admin.TabularInline):
+    """Price history - versions are immutable, a new one is added on price change"""
+
+    model = MenuItemPrice
+    extra = 0
+    can_delete = False
+    readonly_fields = ["price", "created_at"]
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(MenuItem)
-class MenuItemAdmin(admin.ModelAdmin):
+class MenuItemAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ["name", "category", "price", "is_available", "created_at"]
     list_filter = ["category", "is_available", "created_at"]
     search_fields = ["name", "description"]
+    search_kind = "menu_item"
     list_editable = ["is_available"]
     readonly_fields = ["created_at", "updated_at"]
+    inlines = [MenuItemPriceInline]
 
 
 @admin.register(NewsFeed)
-class NewsFeedAdmin(admin.ModelAdmin):
-    list_display = ["title", "is_active", "created_at"]
-    list_filter = ["is_active", "created_at"]
+class NewsFeedAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ["title", "is_active", "publish_at", "expire_at", "created_at"]
+    list_filter = ["is_active", "publish_at", "expire_at"]
     search_fields = ["title", "content"]
+    search_kind = "news"
     list_editable = ["is_active"]
     readonly_fields = ["created_at", "updated_at"]
 
 
 @admin.register(CustomerProfile)
-class CustomerProfileAdmin(admin.ModelAdmin):
+class CustomerProfileAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ["user", "points", "is_vip", "vip_since"]
     list_filter = ["is_vip"]
     search_fields = ["user__username", "user__email"]
+    search_kind = "customer"
+    search_id_field = "user_id"
     readonly_fields = ["vip_since"]
 
 
+class OrderStatusChangeInline(admin.TabularInline):
+    model = OrderStatusChange
+    extra = 0
+    can_delete = False
+    readonly_fields = ["from_status", "to_status", "changed_by", "changed_at"]
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class OrderAdminForm(forms.ModelForm):
+    class Meta:
+        model = Order
+        fields = "__all__"
+
+    def clean_status(self):
+        """Only allow status changes permitted by Order.STATUS_TRANSITIONS"""
+        status = self.cleaned_data["status"]
+        if (
+            self.instance.pk
+            and status != self.instance.status
+            and not self.instance.can_transition_to(status)
+        ):
+            raise forms.ValidationError(
+                f"Cannot change status from {self.instance.get_status_display()} "
+                f"to {dict(Order.STATUS_CHOICES)[status]}."
+            )
+        return status
+
+
+def _transition_action(status, label):
+    """Admin action moving the selected orders to `status` in one UPDATE"""
+
+    def action(modeladmin, request, queryset):
+        # Before the UPDATE: a changelist filtered by status loses the moved rows
+        selected = queryset.count()
+        moved = transition_orders(queryset, status, changed_by=request.user)
+        skipped = selected - moved
+        modeladmin.message_user(
+            request,
+            f"{moved} order(s) marked as {label}"
+            + (f", {skipped} skipped (transition not allowed)." if skipped else "."),
+        )
+
+    action.__name__ = f"mark_{status}"
+    action.short_description = f"Mark selected orders as {label}"
+    return action
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    form = OrderAdminForm
     list_display = [
         "id",
         "customer",
@@ -66,13 +158,59 @@ class OrderAdmin(admin.ModelAdmin):
     ]
     list_filter = ["status", "created_at"]
     search_fields = ["customer__username", "id"]
-    readonly_fields = ["total_amount", "points_earned", "created_at", "updated_at"]
-    inlines = [OrderItemInline]
+    readonly_fields = [
+        "total_amount",
+        "discount_applied",
+        "discount_rate",
+        "points_earned",
+        "created_at",
+        "updated_at",
+        "confirmed_at",
+        "preparing_at",
+        "ready_at",
+        "delivered_at",
+        "cancelled_at",
+    ]
+    inlines = [OrderItemInline, OrderStatusChangeInline]
+    actions = [
+        _transition_action(status, label)
+        for status, label in Order.STATUS_CHOICES
+        if status != "pending"
+    ]
 
     def save_model(self, request, obj, form, change):
+        to_status = obj.status
+        status_changed = change and "status" in form.changed_data
+        if status_changed:
+            # Moved by transition_orders, which also writes the history row,
+            # publishes the update and queues the outbox event
+            obj.status = form.initial["status"]
         super().save_model(request, obj, form, change)
-        if change:  # If updating existing order
-            obj.calculate_total()
+        if status_changed:
+            transition_orders(Order.objects.filter(id=obj.id), to_status, changed_by=request.user)
+            obj.refresh_from_db(
+                fields=[
+                    "status",
+                    "updated_at",
+                    *Order.STATUS_TIMESTAMP_FIELDS.values(),
+                ]
+            )
+
+    def save_related(self, request, form, formsets, change):
+        order = form.instance
+        # Re-price only when order items were added, edited or deleted
+        items_changed = any(
+            formset.model is OrderItem and formset.has_changed() for formset in formsets
+        )
+        # Status before save_model, which may have just cancelled the order
+        status = form.initial.get("status", order.status)
+        counted = items_changed and leaderboards.is_counted(order.id, status)
+        before = leaderboards.order_lines(order.id) if counted else None
+        super().save_related(request, form, formsets, change)
+        if items_changed:
+            order.recalculate_totals()
+        if counted:
+            leaderboards.record_order_change(order.id, before)
 
 
 @admin.register(Reward)
@@ -91,6 +229,32 @@ class RewardRedemptionAdmin(admin.ModelAdmin):
     readonly_fields = ["redeemed_at"]
 
 
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ["id", "topic", "status", "attempts", "created_at", "processed_at"]
+    list_filter = ["status", "topic"]
+    readonly_fields = [
+        "topic",
+        "payload",
+        "attempts",
+        "locked_at",
+        "last_error",
+        "created_at",
+        "processed_at",
+    ]
+    actions = ["requeue_events"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Requeue selected events")
+    def requeue_events(self, request, queryset):
+        updated = queryset.exclude(status="done").update(
+            status="pending", attempts=0, available_at=timezone.now()
+        )
+        self.message_user(request, f"Requeued {updated} event(s).")
+
+
 # ============================================================================
 # REPORTS SECTION
 # ============================================================================
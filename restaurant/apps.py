@@ -7,3 +7,10 @@ class RestaurantConfig(AppConfig):
 
     def ready(self):
         import restaurant.signals
+        import restaurant.order_events
+        import restaurant.metrics
+        import restaurant.news
+        import restaurant.search
+        import restaurant.typeahead
+        import restaurant.template_cache
+        import restaurant.pubsub
@@ -0,0 +1,36 @@
+"""
+SQLite backend tuned for concurrent writers (ENGINE "restaurant.backends.sqlite3").
+
+- settings.SQLITE_PRAGMAS is applied to every new connection (busy_timeout and
+  friends only last as long as the connection).
+- OPTIONS["transaction_mode"] = "IMMEDIATE" starts atomic() blocks with
+  BEGIN IMMEDIATE. A deferred transaction that reads before it writes cannot
+  wait for the write lock: SQLite fails it at once with "database is locked",
+  whatever the busy_timeout. Taking the lock up front makes it wait instead.
+
+Both match the "init_command"/"transaction_mode" options of the stock backend
+in Django 5.1+, so this module can go away after an upgrade.
+"""
+
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("transaction_mode", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict["OPTIONS"].get("transaction_mode")
+        if mode:
+            self.cursor().execute(f"BEGIN {mode}")
+        else:
+            super()._start_transaction_under_autocommit()
@@ -1,6 +1,7 @@
 # restaurant/cart_utils.py
 from django.shortcuts import get_object_or_404
 from django.db import transaction
+from . import metrics
 from .models import Cart, CartItem, MenuItem
 
 
@@ -32,7 +33,7 @@ def get_or_create_cart(request):
             # If session cart exists and is different, merge items then delete session cart
             if session_cart and session_cart.pk != user_cart.pk:
                 for item in session_cart.items.all():
-                    add_to_cart(request, item.menu_item.id, item.quantity)
+                    add_to_cart(request, item.menu_item_id, item.quantity)
                 session_cart.delete()
                 # ensure session cart_id points to user's cart
                 request.session["cart_id"] = user_cart.id
@@ -73,15 +74,25 @@ def add_to_cart(request, menu_item_id, quantity=1, replace_quantity=False):
     cart = get_or_create_cart(request)
     menu_item = get_object_or_404(MenuItem, id=menu_item_id, is_available=True)
 
+    # The line keeps the price version current when it was first added
     cart_item, created = CartItem.objects.select_for_update().get_or_create(
-        cart=cart, menu_item=menu_item, defaults={"quantity": 0}
+        cart=cart,
+        menu_item=menu_item,
+        defaults={
+            "quantity": 0,
+            "unit_price": menu_item.price,
+            "price_version_id": menu_item.price_version_id,
+        },
     )
 
+    cart_item.menu_item = menu_item  # Callers show its name; already loaded
+
     if replace_quantity:
         cart_item.quantity = max(0, int(quantity))
     else:
         cart_item.quantity += int(quantity)
 
+    metrics.CART_MUTATIONS.inc_on_commit(action="add")
     if cart_item.quantity <= 0:
         cart_item.delete()
         return None
@@ -100,13 +111,12 @@ def update_cart_item(request, menu_item_id, quantity):
     """
     cart = get_or_create_cart(request)
     try:
-        cart_item = CartItem.objects.select_for_update().get(
-            cart=cart, menu_item_id=menu_item_id
-        )
+        cart_item = CartItem.objects.select_for_update().get(cart=cart, menu_item_id=menu_item_id)
     except CartItem.DoesNotExist:
         return None
 
     quantity = int(quantity)
+    metrics.CART_MUTATIONS.inc_on_commit(action="update")
     if quantity > 0:
         cart_item.quantity = quantity
         cart_item.save()
@@ -127,6 +137,7 @@ def remove_from_cart(request, menu_item_id):
     try:
         ci = CartItem.objects.get(cart=cart, menu_item_id=menu_item_id)
         ci.delete()
+        metrics.CART_MUTATIONS.inc_on_commit(action="remove")
     except CartItem.DoesNotExist:
         pass
 
@@ -142,6 +153,7 @@ def clear_cart(request):
     cart = get_or_create_cart(request)
     # Delete items
     cart.items.all().delete()
+    metrics.CART_MUTATIONS.inc(action="clear")
 
     if not request.user.is_authenticated:
         # Delete cart row (so a new clean cart will be created next time)
@@ -152,6 +164,14 @@ def clear_cart(request):
     return True
 
 
+async def cart_lines(cart):
+    """
+    The cart's items with their menu items, from one query of the async ORM
+    (for cart.total_items and total_price, which query the items each).
+    """
+    return [item async for item in cart.items.select_related("menu_item")]
+
+
 def get_cart_count(request):
     try:
         cart = get_or_create_cart(request)
@@ -0,0 +1,167 @@
+"""
+Response compression: brotli or gzip, whichever the client prefers.
+
+Django's GZipMiddleware, plus:
+
+- brotli when the client accepts it and the brotli package is installed
+  (COMPRESSION_BROTLI_QUALITY, low enough to compress per request)
+- a size threshold (COMPRESSION_MIN_BYTES); smaller bodies are not worth it
+- no compression for text/event-stream, whose events must reach the client
+  as they are sent, or for bodies already encoded
+- BREACH: a compressed response that reflects user input next to a secret
+  leaks the secret through its length. Django's CSRF tokens are masked
+  with a fresh random value on every response, so pages with a form are
+  compressed; a body carrying the raw CSRF secret (e.g. printed from the
+  cookie) is not. Streams cannot be checked up front and are not
+  compressed if the request issued a CSRF token. gzip output also gets
+  random-length padding in its header, like GZipMiddleware.
+
+    MIDDLEWARE = [..., "restaurant.compression.CompressionMiddleware", ...]
+
+Keep it above any middleware that changes the body.
+"""
+
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # pip install brotli (whitenoise[brotli])
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+# Random bytes (up to) in the gzip header, as GZipMiddleware
+GZIP_MAX_RANDOM_BYTES = 100
+
+_ENCODING_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(","):
+        match = _ENCODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        accepted[match[1].lower()] = quality
+    return accepted
+
+
+def negotiate(header):
+    """The coding to use for an Accept-Encoding header: "br", "gzip" or None."""
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    # The client's preference; brotli on ties
+    best = max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def brotli_async_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+    async for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def gzip_async_sequence(sequence):
+    # One gzip member per chunk, as GZipMiddleware does for async streams
+    async for chunk in sequence:
+        yield compress_string(chunk, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def leaks_csrf_secret(request, content):
+    """Whether `content` holds the request's unmasked CSRF secret."""
+    secret = request.META.get("CSRF_COOKIE")
+    return bool(secret) and secret.encode() in content
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with brotli or gzip (see the module docstring)."""
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or not self.compressible(response):
+            return response
+        # Whether compressed or not, the body depends on Accept-Encoding
+        patch_vary_headers(response, ("Accept-Encoding",))
+        coding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+                return response  # May carry a token we cannot inspect
+            if response.is_async:
+                response.streaming_content = (
+                    brotli_async_sequence(response.streaming_content)
+                    if coding == "br"
+                    else gzip_async_sequence(response.streaming_content)
+                )
+            else:
+                response.streaming_content = (
+                    brotli_sequence(response.streaming_content)
+                    if coding == "br"
+                    else compress_sequence(
+                        response.streaming_content,
+                        max_random_bytes=GZIP_MAX_RANDOM_BYTES,
+                    )
+                )
+            del response.headers["Content-Length"]
+        else:
+            content = response.content
+            if len(content) < settings.COMPRESSION_MIN_BYTES:
+                return response
+            if leaks_csrf_secret(request, content):
+                return response
+            if coding == "br":
+                compressed = brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+            else:
+                compressed = compress_string(content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The compressed bytes differ from what a strong ETag promised
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = coding
+        return response
+
+    def compressible(self, response):
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type == "text/event-stream":
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        return content_type in COMPRESSIBLE_TYPES
@@ -0,0 +1,108 @@
+"""
+Report dashboard widgets, each run on its own within a time limit.
+
+A dashboard is a set of widgets (summary numbers, top items, a chart's
+series...), each a function that runs its own queries and returns plain data.
+The report pages fetch every widget from its own JSON endpoint, all at once,
+so a page takes as long as its slowest widget instead of the sum of all of
+them. Each endpoint runs its widget with run_widget():
+
+    result, reason = dashboards.run_widget("summary", ..., report="sales")
+
+A widget that raises, or runs out of settings.DASHBOARD_WIDGET_TIMEOUT
+seconds, gives (None, "error") or (None, "timeout") so only its section of the
+page is left empty.
+
+The time limit is checked each time the widget starts a query. On PostgreSQL
+the widget's connections also get a matching statement_timeout, so the server
+cancels a query still running at the deadline. Other databases (SQLite) have
+no such limit: a query that has started always runs to its end, and the widget
+fails at its next query.
+"""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WidgetTimeout(Exception):
+    pass
+
+
+class _Deadline:
+    """execute_wrapper failing the queries a widget starts after its deadline."""
+
+    def __init__(self, name, timeout):
+        self.name = name
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        # Connections given a statement_timeout, to reset afterwards
+        self.limited = []
+
+    @property
+    def passed(self):
+        return time.monotonic() > self.deadline
+
+    def __call__(self, execute, sql, params, many, context):
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise WidgetTimeout(f"Dashboard widget {self.name} timed out after {self.timeout}s")
+        connection = context["connection"]
+        if connection.vendor == "postgresql" and connection not in self.limited:
+            # On the raw cursor, past the execute wrappers
+            context["cursor"].cursor.execute(
+                "SET statement_timeout = %s", [max(1, int(remaining * 1000))]
+            )
+            self.limited.append(connection)
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        for connection in self.limited:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("RESET statement_timeout")
+            except DatabaseError:
+                # In a failed transaction, whose rollback undoes the SET anyway
+                pass
+
+
+def run_widget(name, widget, timeout=None, report=""):
+    """
+    Run one widget on the calling thread. Returns (result, None), or
+    (None, "error" or "timeout") if it raised or ran out of `timeout` seconds.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "DASHBOARD_WIDGET_TIMEOUT", 10)
+    deadline = _Deadline(name, timeout)
+
+    try:
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(deadline))
+                return widget(), None
+        finally:
+            deadline.reset()
+    except WidgetTimeout as e:
+        logger.warning("%s", e)
+        reason = "timeout"
+    except DatabaseError:
+        # A query cancelled by statement_timeout
+        if deadline.limited and deadline.passed:
+            logger.warning("Dashboard widget %s timed out after %ss", name, timeout)
+            reason = "timeout"
+        else:
+            logger.exception("Dashboard widget %s failed", name)
+            reason = "error"
+    except Exception:
+        logger.exception("Dashboard widget %s failed", name)
+        reason = "error"
+    metrics.DASHBOARD_WIDGET_FAILURES.inc(report=report, widget=name, reason=reason)
+    return None, reason
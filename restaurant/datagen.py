@@ -0,0 +1,666 @@
+"""
+Deterministic synthetic data for local development and performance work.
+
+Everything is drawn from one seeded random.Random, so the same seed and end
+date always produce the same rows. Rows are written with batched bulk_create
+while model signals and auto_now timestamps are switched off; orders and
+their items, the bulk of any dataset, skip bulk_create altogether (see
+bulk_insert), which is what lets millions of orders load in minutes. Run it
+against a database nothing else is writing to. See the generate_data command.
+"""
+
+import bisect
+import itertools
+import math
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.utils import timezone
+
+from .models import (
+    Cart,
+    CartItem,
+    Category,
+    CustomerProfile,
+    MenuItem,
+    MenuItemPrice,
+    NewsFeed,
+    Order,
+    OrderItem,
+    Reward,
+    RewardRedemption,
+)
+
+BATCH_SIZE = 5000
+
+# Relative order volume per hour of day (lunch and dinner peaks)
+HOURLY_WEIGHTS = [
+    0.1, 0.05, 0.02, 0.01, 0.01, 0.05, 0.3, 0.8, 1.0, 1.2, 2.5, 6.0,
+    8.0, 5.0, 2.0, 1.5, 2.0, 4.0, 7.5, 8.5, 6.0, 3.5, 1.5, 0.5,
+]  # fmt: skip
+# Relative volume per weekday, Monday first
+WEEKDAY_WEIGHTS = [0.8, 0.8, 0.85, 0.9, 1.2, 1.5, 1.35]
+# Relative volume per month (Tết in late January / February, quiet summer)
+MONTHLY_WEIGHTS = [1.15, 1.3, 0.95, 0.95, 1.0, 0.9, 0.9, 0.95, 1.0, 1.0, 1.05, 1.2]
+# Year-over-year growth in volume
+YEARLY_GROWTH = 1.25
+
+# Share of settled (older than a day) orders that were cancelled
+CANCELLED_SHARE = 0.06
+# Share of non-VIP orders placed with a redeemed 5% discount
+DISCOUNTED_SHARE = 0.04
+VIP_SHARE = 0.03
+
+SAMPLE_CATEGORIES = [
+    ("Appetizers", "Start your meal right"),
+    ("Main Courses", "Our signature dishes"),
+    ("Desserts", "Sweet endings"),
+    ("Drinks", "Refreshing beverages"),
+]
+
+SAMPLE_MENU_ITEMS = [
+    ("Appetizers", "Caesar Salad", 89000, "Fresh romaine lettuce with parmesan cheese, croutons, and Caesar dressing"),
+    ("Appetizers", "Mozzarella Sticks", 79000, "Crispy breaded mozzarella served with marinara sauce"),
+    ("Appetizers", "Buffalo Wings", 99000, "Spicy chicken wings with blue cheese dip"),
+    ("Main Courses", "Grilled Chicken", 159000, "Tender chicken breast marinated with herbs and spices, served with vegetables"),
+    ("Main Courses", "Beef Steak", 249000, "Premium 8oz ribeye steak cooked to perfection with mashed potatoes"),
+    ("Main Courses", "Salmon Fillet", 199000, "Grilled salmon with lemon butter sauce and asparagus"),
+    ("Main Courses", "Spaghetti Carbonara", 139000, "Classic Italian pasta with bacon, eggs, and parmesan"),
+    ("Main Courses", "Vegetable Stir Fry", 119000, "Fresh vegetables in savory sauce with rice"),
+    ("Desserts", "Chocolate Lava Cake", 79000, "Warm chocolate cake with a molten center, served with vanilla ice cream"),
+    ("Desserts", "New York Cheesecake", 69000, "Creamy cheesecake with graham cracker crust and berry compote"),
+    ("Desserts", "Tiramisu", 75000, "Classic Italian dessert with coffee-soaked ladyfingers and mascarpone"),
+    ("Drinks", "Fresh Lemonade", 39000, "House-made lemonade with fresh lemons"),
+    ("Drinks", "Iced Tea", 29000, "Refreshing iced tea, sweetened or unsweetened"),
+    ("Drinks", "Cappuccino", 45000, "Espresso with steamed milk and foam"),
+    ("Drinks", "Smoothie", 59000, "Fresh fruit smoothie (strawberry, mango, or mixed berry)"),
+]  # fmt: skip
+
+# Mirrors the point costs in views.redeem_discount / views.redeem_reward
+SAMPLE_REWARDS = [
+    ("Giảm giá 5%", "Giảm 5% cho đơn hàng tiếp theo", 50000, 1),
+    ("Giảm giá 10%", "Giảm 10% cho đơn hàng tiếp theo", 100000, 2),
+    ("Phần Đậm Ấm", "Miễn phí một Phần Đậm Ấm (trị giá 149.000 ₫)", 200000, 3),
+]
+
+SAMPLE_NEWS = [
+    (
+        "Grand Opening! 🎉",
+        "We're excited to announce our grand opening! Join us for special "
+        "promotions and discounts. For a limited time, get 20% off your first "
+        "order when you sign up for our rewards program!",
+    ),
+    (
+        "New Menu Items Available",
+        "Check out our new seasonal menu featuring fresh local ingredients! We've "
+        "added delicious new dishes including our signature salmon fillet and "
+        "vegetable stir fry.",
+    ),
+    (
+        "Rewards Program Announcement",
+        "Earn points with every purchase! Get 10% back in points on all orders. "
+        "Redeem for free items or unlock VIP status for exclusive benefits.",
+    ),
+]
+
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ"]  # fmt: skip
+GIVEN_NAMES = ["An", "Bình", "Chi", "Dũng", "Giang", "Hà", "Hải", "Hoa", "Hùng", "Hương", "Khoa", "Lan", "Linh", "Long", "Mai", "Minh", "Nam", "Ngọc", "Phúc", "Quân", "Tâm", "Thảo", "Trang", "Tuấn", "Vy"]  # fmt: skip
+STREETS = ["Lê Lợi", "Nguyễn Huệ", "Hai Bà Trưng", "Điện Biên Phủ", "Cách Mạng Tháng 8", "Võ Văn Tần", "Pasteur", "Nguyễn Trãi", "Lý Tự Trọng", "Trần Hưng Đạo"]  # fmt: skip
+DISHES = ["Bò nhúng giấm", "Bò lá lốt", "Gỏi cuốn", "Chả giò", "Bún bò", "Cơm tấm", "Lẩu thái", "Bánh xèo", "Gà nướng", "Cá kho", "Rau muống xào", "Chè", "Trà đá", "Cà phê sữa"]  # fmt: skip
+VARIANTS = ["đặc biệt", "truyền thống", "cay", "phần nhỏ", "phần lớn", "gia đình", "thập cẩm", "kiểu mới"]  # fmt: skip
+SPECIAL_INSTRUCTIONS = ["Ít cay", "Không hành", "Thêm rau", "Giao trước 12h", "Gọi trước khi giao"]  # fmt: skip
+
+_MUTED_SIGNALS = [pre_save, post_save, pre_delete, post_delete, m2m_changed]
+
+
+@contextmanager
+def muted_signals():
+    """Disconnect every model save/delete receiver for the duration of the block."""
+    saved = [(signal, signal.receivers) for signal in _MUTED_SIGNALS]
+    for signal in _MUTED_SIGNALS:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+@contextmanager
+def explicit_timestamps(*model_classes):
+    """Let bulk_create keep the auto_now / auto_now_add values we set ourselves."""
+    saved = []
+    for model in model_classes:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.DateField) and (field.auto_now or field.auto_now_add):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def day_weight(day, start):
+    """Relative order volume for a calendar day."""
+    return (
+        WEEKDAY_WEIGHTS[day.weekday()]
+        * MONTHLY_WEIGHTS[day.month - 1]
+        * YEARLY_GROWTH ** ((day - start).days / 365)
+    )
+
+
+def daily_counts(total, start, end):
+    """
+    Spread `total` orders over the days from `start` to `end` (inclusive) in
+    proportion to day_weight, yielding (day, count) oldest first. Fractions
+    are carried over so the counts add up to exactly `total`.
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    weights = [day_weight(day, start) for day in days]
+    scale = total / sum(weights)
+    carry = 0.0
+    remaining = total
+    for day, weight in zip(days, weights):
+        carry += weight * scale
+        count = min(remaining, int(carry + 0.5))
+        carry -= count
+        remaining -= count
+        yield day, count
+    if remaining:
+        yield end, remaining
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+# Field types whose (already clean) Python values go to the database as-is
+RAW_FIELD_TYPES = {
+    "AutoField",
+    "BigAutoField",
+    "BooleanField",
+    "CharField",
+    "ForeignKey",
+    "IntegerField",
+    "PositiveIntegerField",
+    "TextField",
+}
+
+
+def bulk_insert(model, rows):
+    """
+    INSERT `rows` (dicts of attname -> value, primary key included) with one
+    executemany; missing fields get their default. Values are adapted by the
+    model fields as usual, but unlike bulk_create there are no model instances
+    and no per-batch SQL compilation (nor SQLite's 999-parameter batching),
+    which dominate the cost of loading millions of rows. Call
+    reset_sequences() once the load is done.
+    """
+    conn = connections[DEFAULT_DB_ALIAS]
+    qn = conn.ops.quote_name
+    fields = model._meta.concrete_fields
+    sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+        qn(model._meta.db_table),
+        ", ".join(qn(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    columns = [
+        (
+            field.attname,
+            field.get_default(),
+            None if field.get_internal_type() in RAW_FIELD_TYPES else field,
+        )
+        for field in fields
+    ]
+    params = [
+        [
+            (value if field is None or value is None else field.get_db_prep_save(value, conn))
+            for attname, default, field in columns
+            for value in (row.get(attname, default),)
+        ]
+        for row in rows
+    ]
+    with conn.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def reset_sequences(*model_classes):
+    """Move id sequences past explicitly inserted ids (no-op on SQLite)."""
+    conn = connections[DEFAULT_DB_ALIAS]
+    statements = conn.ops.sequence_reset_sql(no_style(), model_classes)
+    with conn.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class DataGenerator:
+    """
+    Builds a synthetic dataset step by step (catalog, users, orders,
+    redemptions, carts). Later steps use the rows earlier steps created.
+    """
+
+    def __init__(self, seed=42, until=None, batch_size=BATCH_SIZE, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.until = until or timezone.localdate()
+        self.tz = timezone.get_current_timezone()
+        self.hour_weights = list(itertools.accumulate(HOURLY_WEIGHTS))
+        self.items = []  # (id, [(valid_from, price_version_id, price), ...])
+        self.customers = []  # (id, name, phone, address, is_vip)
+        self.customer_weights = []
+
+    def _aware(self, day, hour, minute, second=0):
+        return timezone.make_aware(datetime.combine(day, time(hour, minute, second)), self.tz)
+
+    # ------------------------------------------------------------------
+    # Catalog
+    # ------------------------------------------------------------------
+
+    def catalog(self, extra_items=0, years=2):
+        """
+        Make sure the sample categories, menu items, rewards and news exist, and
+        add `extra_items` generated dishes. Every item gets one to three price
+        versions spread over the last `years` years.
+        """
+        categories = {c.name: c for c in Category.objects.all()}
+        new_categories = [
+            Category(name=name, description=description, order=i)
+            for i, (name, description) in enumerate(SAMPLE_CATEGORIES, 1)
+            if name not in categories
+        ]
+        for category in Category.objects.bulk_create(new_categories):
+            categories[category.name] = category
+
+        existing = set(MenuItem.objects.values_list("name", flat=True))
+        new_items = [
+            MenuItem(
+                name=name,
+                description=description,
+                price=Decimal(price),
+                category=categories[category],
+            )
+            for category, name, price, description in SAMPLE_MENU_ITEMS
+            if name not in existing
+        ]
+        category_list = list(categories.values())
+        for i in range(extra_items):
+            name = f"{self.rng.choice(DISHES)} {self.rng.choice(VARIANTS)} #{i + 1}"
+            if name in existing:
+                continue
+            new_items.append(
+                MenuItem(
+                    name=name,
+                    description=f"Món {name.lower()} của nhà hàng",
+                    price=Decimal(self.rng.randrange(20, 400) * 1000),
+                    category=self.rng.choice(category_list),
+                    is_available=self.rng.random() > 0.05,
+                )
+            )
+        created = MenuItem.objects.bulk_create(new_items, batch_size=self.batch_size)
+        self._price_history(created, years)
+
+        existing = set(Reward.objects.values_list("name", flat=True))
+        Reward.objects.bulk_create(
+            [
+                Reward(
+                    name=name,
+                    description=description,
+                    points_required=points,
+                    tier=tier,
+                )
+                for name, description, points, tier in SAMPLE_REWARDS
+                if name not in existing
+            ]
+        )
+        existing = set(NewsFeed.objects.values_list("title", flat=True))
+        NewsFeed.objects.bulk_create(
+            [
+                NewsFeed(title=title, content=content)
+                for title, content in SAMPLE_NEWS
+                if title not in existing
+            ]
+        )
+
+        self._load_items()
+        self.log(f"Catalog: {len(created)} new menu items, {len(self.items)} in total")
+
+    def _price_history(self, items, years):
+        # bulk_create skips MenuItem.save(), so record the price versions here.
+        # Older versions are cheaper; the newest one is the item's current price.
+        first_day = self.until - timedelta(days=int(365 * years))
+        versions = []
+        for item in items:
+            changes = sorted(
+                self.rng.randrange(30, (self.until - first_day).days + 1)
+                for _ in range(self.rng.randrange(0, 3))
+            )
+            created_at = [self._aware(first_day, 0, 0)]
+            created_at += [self._aware(first_day + timedelta(days=d), 3, 0) for d in changes]
+            price = item.price
+            for when in reversed(created_at):
+                versions.append(MenuItemPrice(menu_item=item, price=price, created_at=when))
+                price = (price * Decimal("0.9") / 1000).to_integral_value() * 1000
+        MenuItemPrice.objects.bulk_create(versions, batch_size=self.batch_size)
+        MenuItem.objects.filter(id__in=[item.id for item in items]).update(
+            price_version=Subquery(
+                MenuItemPrice.objects.filter(menu_item=OuterRef("pk"))
+                .order_by("-created_at", "id")
+                .values("id")[:1]
+            )
+        )
+
+    def _load_items(self):
+        history = {}
+        for item_id, version_id, price, created_at in (
+            MenuItemPrice.objects.filter(menu_item__is_available=True)
+            .values_list("menu_item_id", "id", "price", "created_at")
+            .order_by("menu_item_id", "created_at")
+        ):
+            history.setdefault(item_id, []).append((created_at, version_id, price))
+        self.items = sorted(history.items())
+
+    def _price_at(self, versions, when):
+        """The (price_version_id, price) in effect at `when`."""
+        index = bisect.bisect_right(versions, (when, math.inf)) - 1
+        _, version_id, price = versions[max(index, 0)]
+        return version_id, price
+
+    # ------------------------------------------------------------------
+    # Customers
+    # ------------------------------------------------------------------
+
+    def users(self, count, prefix="customer_", password="password"):
+        """Create `count` users named <prefix><n>, each with a profile."""
+        password = make_password(password)
+        joined = self._aware(self.until, 0, 0)
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for n in range(start, min(start + self.batch_size, count)):
+                batch.append(
+                    User(
+                        username=f"{prefix}{n}",
+                        password=password,
+                        first_name=self.rng.choice(GIVEN_NAMES),
+                        last_name=self.rng.choice(FAMILY_NAMES),
+                        email=f"{prefix}{n}@example.com",
+                        date_joined=joined - timedelta(days=self.rng.randrange(730)),
+                    )
+                )
+            with transaction.atomic():
+                users = User.objects.bulk_create(batch)
+                CustomerProfile.objects.bulk_create(
+                    [
+                        CustomerProfile(
+                            user_id=user.id,
+                            phone=f"09{self.rng.randrange(10**8):08d}",
+                            address=(
+                                f"{self.rng.randrange(1, 300)} {self.rng.choice(STREETS)}, "
+                                f"Quận {self.rng.randrange(1, 13)}, TP.HCM"
+                            ),
+                            is_vip=self.rng.random() < VIP_SHARE,
+                        )
+                        for user in users
+                    ]
+                )
+            self.log(f"  users {start + len(batch)}/{count}")
+        self._load_customers(prefix)
+
+    def _load_customers(self, prefix):
+        self.customers = list(
+            CustomerProfile.objects.filter(user__username__startswith=prefix)
+            .order_by("user_id")
+            .values_list(
+                "user_id",
+                "user__last_name",
+                "user__first_name",
+                "phone",
+                "address",
+                "is_vip",
+            )
+        )
+        # A few regulars place most of the orders (Zipf-like)
+        self.customer_weights = list(
+            itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(self.customers)))
+        )
+
+    # ------------------------------------------------------------------
+    # Orders
+    # ------------------------------------------------------------------
+
+    def orders(self, count, years=2):
+        """
+        Create `count` orders over the last `years` years, following the
+        hourly, weekday, monthly and yearly weights above. Orders are written in
+        chronological order, so ids grow with created_at as they do in production.
+        """
+        if not count:
+            return
+        if not self.items or not self.customers:
+            raise ValueError("Generate the catalog and users before orders")
+
+        start = self.until - timedelta(days=int(365 * years) - 1)
+        now = timezone.now()
+        order_id = next_id(Order)
+        item_id = next_id(OrderItem)
+        written = 0
+        for batch in batched(self._iter_orders(count, start, now), self.batch_size):
+            items = []
+            for order, lines in batch:
+                order["id"] = order_id
+                for line in lines:
+                    line["id"] = item_id
+                    line["order_id"] = order_id
+                    item_id += 1
+                items += lines
+                order_id += 1
+            with transaction.atomic():
+                bulk_insert(Order, [order for order, _ in batch])
+                bulk_insert(OrderItem, items)
+            written += len(batch)
+            self.log(f"  orders {written}/{count}")
+        reset_sequences(Order, OrderItem)
+
+    def _iter_orders(self, total, start, now):
+        for day, count in daily_counts(total, start, self.until):
+            times = sorted(
+                self._aware(
+                    day,
+                    hour,
+                    self.rng.randrange(60),
+                    self.rng.randrange(60),
+                )
+                for hour in self.rng.choices(range(24), cum_weights=self.hour_weights, k=count)
+            )
+            for created_at in times:
+                if created_at > now:
+                    # Later today: pull it into the last hour instead
+                    created_at = now - timedelta(seconds=self.rng.randrange(3600))
+                yield self._order(created_at, now)
+
+    def _order(self, created_at, now):
+        customer_id, last_name, first_name, phone, address, is_vip = self.rng.choices(
+            self.customers, cum_weights=self.customer_weights
+        )[0]
+
+        lines = []
+        subtotal = Decimal(0)
+        for item_id, versions in self.rng.sample(
+            self.items, k=min(len(self.items), self.rng.choice((1, 1, 2, 2, 3, 4, 5)))
+        ):
+            version_id, price = self._price_at(versions, created_at)
+            quantity = self.rng.choice((1, 1, 1, 2, 2, 3))
+            lines.append(
+                {
+                    "menu_item_id": item_id,
+                    "price_version_id": version_id,
+                    "price": price,
+                    "quantity": quantity,
+                    "subtotal": price * quantity,
+                }
+            )
+            subtotal += price * quantity
+
+        if is_vip:
+            rate = Decimal("0.10")
+        elif self.rng.random() < DISCOUNTED_SHARE:
+            rate = Decimal("0.05")
+        else:
+            rate = Decimal("0")
+
+        # Same pricing as Order._apply_subtotal
+        discount = (subtotal * rate).to_integral_value()
+        order = {
+            "customer_id": customer_id,
+            "customer_name": f"{last_name} {first_name}",
+            "phone": phone,
+            "delivery_address": address,
+            "payment_method": self.rng.choice(("cod", "cod", "momo", "bank")),
+            "special_instructions": (
+                self.rng.choice(SPECIAL_INSTRUCTIONS) if self.rng.random() < 0.1 else ""
+            ),
+            "discount_rate": rate,
+            "discount_applied": discount,
+            "total_amount": subtotal - discount,
+            "points_earned": int((subtotal * Decimal("0.10")).to_integral_value()),
+            "created_at": created_at,
+        }
+        self._set_status(order, now)
+        return order, lines
+
+    def _set_status(self, order, now):
+        """Walk the order through its statuses as far as its age allows."""
+        cancelled = self.rng.random() < CANCELLED_SHARE
+        when = order["created_at"]
+        order["status"] = "pending"
+        for status, minutes in (
+            ("confirmed", (1, 10)),
+            ("preparing", (2, 15)),
+            ("ready", (10, 35)),
+            ("delivered", (10, 45)),
+        ):
+            when += timedelta(minutes=self.rng.randint(*minutes))
+            if cancelled and "cancelled" in Order.STATUS_TRANSITIONS[order["status"]]:
+                if self.rng.random() < 0.5 or status == "ready":
+                    status = "cancelled"
+            if when > now:
+                break
+            order["status"] = status
+            order[Order.STATUS_TIMESTAMP_FIELDS[status]] = when
+            if status == "cancelled":
+                break
+        order["updated_at"] = min(when, now)
+
+    # ------------------------------------------------------------------
+    # Redemptions, carts, points
+    # ------------------------------------------------------------------
+
+    def redemptions(self, count):
+        """Create `count` reward redemptions by random customers."""
+        rewards = list(Reward.objects.values_list("id", "points_required"))
+        if not count or not rewards:
+            return
+        first_order = Order.objects.order_by("created_at").values_list(
+            "created_at", flat=True
+        ).first() or self._aware(self.until, 0, 0)
+        span = max(1, int((timezone.now() - first_order).total_seconds()))
+
+        with explicit_timestamps(RewardRedemption):
+            for start in range(0, count, self.batch_size):
+                batch = []
+                for _ in range(min(self.batch_size, count - start)):
+                    reward_id, points = self.rng.choice(rewards)
+                    customer = self.rng.choices(self.customers, cum_weights=self.customer_weights)[
+                        0
+                    ]
+                    batch.append(
+                        RewardRedemption(
+                            customer_id=customer[0],
+                            reward_id=reward_id,
+                            points_spent=points,
+                            redeemed_at=first_order + timedelta(seconds=self.rng.randrange(span)),
+                        )
+                    )
+                RewardRedemption.objects.bulk_create(batch)
+                self.log(f"  redemptions {start + len(batch)}/{count}")
+
+    def carts(self, count):
+        """Give `count` distinct customers an open cart with a few items."""
+        count = min(count, len(self.customers))
+        if not count:
+            return
+        customer_ids = [c[0] for c in self.rng.sample(self.customers, k=count)]
+        for batch in batched(customer_ids, self.batch_size):
+            with transaction.atomic():
+                carts = Cart.objects.bulk_create([Cart(user_id=i) for i in batch])
+                items = []
+                for cart in carts:
+                    for item_id, versions in self.rng.sample(
+                        self.items, k=min(len(self.items), self.rng.randint(1, 4))
+                    ):
+                        _, version_id, price = versions[-1]
+                        items.append(
+                            CartItem(
+                                cart_id=cart.id,
+                                menu_item_id=item_id,
+                                quantity=self.rng.randint(1, 3),
+                                unit_price=price,
+                                price_version_id=version_id,
+                            )
+                        )
+                CartItem.objects.bulk_create(items, batch_size=self.batch_size)
+        self.log(f"  carts {count}/{count}")
+
+    def settle_points(self, prefix="customer_"):
+        """
+        Set generated customers' points to what they earned on delivered orders
+        minus what they redeemed (never below zero), in one UPDATE.
+        """
+        earned = (
+            Order.objects.filter(customer=OuterRef("user_id"), status="delivered")
+            .order_by()
+            .values("customer")
+            .annotate(total=Sum("points_earned"))
+            .values("total")
+        )
+        spent = (
+            RewardRedemption.objects.filter(customer=OuterRef("user_id"))
+            .order_by()
+            .values("customer")
+            .annotate(total=Sum("points_spent"))
+            .values("total")
+        )
+        CustomerProfile.objects.filter(user__username__startswith=prefix).update(
+            points=Greatest(
+                Coalesce(Subquery(earned), Value(0)) - Coalesce(Subquery(spent), Value(0)),
+                Value(0),
+            )
+        )
+        CustomerProfile.objects.filter(
+            user__username__startswith=prefix, points__gte=500000, is_vip=False
+        ).update(is_vip=True, vip_since=timezone.now())
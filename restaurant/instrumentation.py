@@ -0,0 +1,303 @@
+"""
+Per-request profiling for production.
+
+RequestProfilingMiddleware times every request. For a sampled share of them
+(settings.REQUEST_PROFILE_SAMPLE_RATE) it also records DB time, query count,
+repeated queries (the same SQL run again with different or identical
+parameters, usually an N+1 loop) and template render time. Sampled and slow
+requests are written as JSON lines to a rotating log, and
+summarize_requests() aggregates that log for the performance report page.
+
+Template render time needs the template backend below:
+
+    TEMPLATES = [{"BACKEND": "restaurant.instrumentation.DjangoTemplates", ...}]
+"""
+
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends import django as django_backend
+from django.utils import timezone
+
+logger = logging.getLogger("restaurant.requests")
+
+# Upper bounds (ms) of the wall time histogram buckets; the last one is open
+HISTOGRAM_BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Not counted as repeated queries
+TRANSACTION_STATEMENTS = ("BEGIN", "SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK")
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """What one sampled request did; also the execute_wrapper counting queries."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            if not sql.startswith(TRANSACTION_STATEMENTS):
+                self.statements[sql] += 1
+
+    @property
+    def repeated_queries(self):
+        """Queries whose SQL already ran earlier in the request."""
+        return sum(count - 1 for count in self.statements.values())
+
+    def most_repeated(self):
+        if not self.statements:
+            return None
+        sql, count = self.statements.most_common(1)[0]
+        return {"sql": sql[:500], "count": count} if count > 1 else None
+
+
+class ProfiledTemplate:
+    """Wraps a backend template to add its render time to the current profile."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            profile.render_time += time.perf_counter() - started
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The stock Django backend, with render times reported to the profiler."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name))
+
+
+def _log_path():
+    return Path(
+        getattr(settings, "REQUEST_PROFILE_LOG", settings.BASE_DIR / "logs" / "requests.log")
+    )
+
+
+def _configure_logger():
+    """Attach the rotating JSON-lines file unless LOGGING already configured one."""
+    if logger.handlers:
+        return
+    path = _log_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=getattr(settings, "REQUEST_PROFILE_LOG_MAX_BYTES", 10 * 1024 * 1024),
+        backupCount=getattr(settings, "REQUEST_PROFILE_LOG_BACKUPS", 5),
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _wrap_connections(stack, profile):
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(profile))
+
+
+class RequestProfilingMiddleware:
+    """
+    Log sampled requests with their DB and template costs, and every request
+    slower than settings.REQUEST_PROFILE_SLOW_MS (wall time only if unsampled).
+    Put it first in MIDDLEWARE so the wall time covers the whole stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_PROFILE_SAMPLE_RATE", 0)
+        self.slow_ms = getattr(settings, "REQUEST_PROFILE_SLOW_MS", None)
+        if self.sample_rate <= 0 and self.slow_ms is None:
+            raise MiddlewareNotUsed
+        _configure_logger()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            wall_ms = (time.perf_counter() - started) * 1000
+            if self.slow_ms is not None and wall_ms >= self.slow_ms:
+                self._log(request, response, wall_ms, None)
+            return response
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                _wrap_connections(stack, profile)
+                started = time.perf_counter()
+                response = self.get_response(request)
+                wall_ms = (time.perf_counter() - started) * 1000
+        finally:
+            _current.reset(token)
+        self._log(request, response, wall_ms, profile)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            wall_ms = (time.perf_counter() - started) * 1000
+            if self.slow_ms is not None and wall_ms >= self.slow_ms:
+                self._log(request, response, wall_ms, None)
+            return response
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        # Connections are per thread: wrap those of the thread the request's
+        # sync code and async ORM calls run in, not the event loop's
+        stack = ExitStack()
+        try:
+            await sync_to_async(_wrap_connections)(stack, profile)
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            wall_ms = (time.perf_counter() - started) * 1000
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        self._log(request, response, wall_ms, profile)
+        return response
+
+    def _log(self, request, response, wall_ms, profile):
+        match = request.resolver_match
+        record = {
+            "time": timezone.now().isoformat(),
+            "view": match.view_name if match else "<unresolved>",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "wall_ms": round(wall_ms, 2),
+            "slow": self.slow_ms is not None and wall_ms >= self.slow_ms,
+            "sampled": profile is not None,
+        }
+        if profile is not None:
+            record.update(
+                {
+                    "db_ms": round(profile.db_time * 1000, 2),
+                    "queries": profile.queries,
+                    "repeated_queries": profile.repeated_queries,
+                    "render_ms": round(profile.render_time * 1000, 2),
+                    "most_repeated": profile.most_repeated(),
+                }
+            )
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def read_requests(since=None):
+    """Records from the request log and its rotated backups, oldest file first."""
+    path = _log_path()
+    files = sorted(
+        path.parent.glob(path.name + ".*"),
+        key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0,
+        reverse=True,
+    )
+    cutoff = since.isoformat() if since else ""
+    for file in files + [path]:
+        if not file.exists():
+            continue
+        with open(file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("time", "") >= cutoff:
+                    yield record
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def _mean(values):
+    return round(sum(values) / len(values), 2) if values else 0
+
+
+def summarize_requests(records):
+    """
+    Per-view latency percentiles, wall time histogram and (from sampled
+    requests) average DB/template cost, slowest p95 first.
+    """
+    views = {}
+    for record in records:
+        views.setdefault(record["view"], []).append(record)
+
+    summary = []
+    for view, view_records in views.items():
+        walls = sorted(r["wall_ms"] for r in view_records)
+        sampled = [r for r in view_records if r.get("sampled")]
+        histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for wall in walls:
+            histogram[
+                next(
+                    (i for i, bound in enumerate(HISTOGRAM_BUCKETS) if wall <= bound),
+                    len(HISTOGRAM_BUCKETS),
+                )
+            ] += 1
+        worst = max(sampled, key=lambda r: r["repeated_queries"], default=None)
+        summary.append(
+            {
+                "view": view,
+                "requests": len(walls),
+                "sampled": len(sampled),
+                "slow": sum(1 for r in view_records if r.get("slow")),
+                "p50": round(_percentile(walls, 50), 1),
+                "p95": round(_percentile(walls, 95), 1),
+                "p99": round(_percentile(walls, 99), 1),
+                "db_ms": _mean([r["db_ms"] for r in sampled]),
+                "render_ms": _mean([r["render_ms"] for r in sampled]),
+                "queries": _mean([r["queries"] for r in sampled]),
+                "max_queries": max((r["queries"] for r in sampled), default=0),
+                "repeated_queries": _mean([r["repeated_queries"] for r in sampled]),
+                "most_repeated": worst["most_repeated"] if worst else None,
+                "histogram": histogram,
+            }
+        )
+    summary.sort(key=lambda row: row["p95"], reverse=True)
+    return summary
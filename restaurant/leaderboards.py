@@ -0,0 +1,193 @@
+"""
+Top sellers (by quantity and by revenue) and sales per category.
+
+ItemSalesDay holds one row per menu item and day. The order.placed outbox
+handler adds an order's lines to it and order.cancelled takes them out again
+(see order_events.py), so a report sums a few rows per item and day instead
+of joining every OrderItem in its date range.
+
+Order lines edited in the admin are applied as a difference by
+record_order_change().
+
+leaderboards() serves the rolling WINDOWS ending today from the cache, so the
+homepage best sellers cost no query once it is warm. Orders changed behind
+the outbox's back (raw SQL, loaded data) are picked up by:
+
+    python manage.py rebuild_leaderboards
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import metrics
+from .models import ItemSalesDay, Order, OrderItem, OutboxEvent
+
+# Rolling windows (days, today included)
+WINDOWS = (1, 7, 30)
+TOP_LIMIT = 10
+
+CACHE_KEY = "leaderboards"
+# Upper bound on staleness in other processes; this one drops it on every order
+CACHE_SECONDS = 300
+
+ITEM_FIELDS = (
+    "menu_item_id",
+    "menu_item__name",
+    "menu_item__category__name",
+    "menu_item__price",
+    "menu_item__is_available",
+)
+
+
+def _add(day, menu_item_id, quantity, revenue):
+    row = ItemSalesDay.objects.filter(date=day, menu_item_id=menu_item_id)
+    changes = {
+        "quantity": F("quantity") + quantity,
+        "revenue": F("revenue") + revenue,
+    }
+    if row.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            ItemSalesDay.objects.create(
+                date=day, menu_item_id=menu_item_id, quantity=quantity, revenue=revenue
+            )
+    except IntegrityError:
+        row.update(**changes)  # Another order created the row meanwhile
+
+
+def _order_day(order_id):
+    created_at = Order.objects.values_list("created_at", flat=True).get(id=order_id)
+    return timezone.localdate(created_at)
+
+
+def order_lines(order_id):
+    """{menu_item_id: (quantity, revenue)} of an order, as counted in its day."""
+    lines = (
+        OrderItem.objects.filter(order_id=order_id)
+        .values("menu_item_id")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("subtotal"))
+        .order_by()
+    )
+    return {line["menu_item_id"]: (line["quantity"], line["revenue"]) for line in lines}
+
+
+def is_counted(order_id, status):
+    """
+    Whether the lines of an order in `status` are in its day: it is not
+    cancelled and no order.placed event of it is still to be delivered.
+    """
+    if status == "cancelled":
+        return False
+    return not (
+        OutboxEvent.objects.filter(topic="order.placed", payload__order_id=order_id)
+        .exclude(status="done")
+        .exists()
+    )
+
+
+def record_order(order_id, sign=1):
+    """Add an order's lines to its day (sign=-1: take them out again)."""
+    day = _order_day(order_id)
+    for menu_item_id, (quantity, revenue) in order_lines(order_id).items():
+        _add(day, menu_item_id, sign * quantity, sign * revenue)
+    transaction.on_commit(invalidate)
+
+
+def record_order_change(order_id, before):
+    """
+    Apply the difference between an order's lines `before` an edit (from
+    order_lines()) and now to its day. Only for an order that is_counted().
+    """
+    day = _order_day(order_id)
+    after = order_lines(order_id)
+    for menu_item_id in before.keys() | after.keys():
+        quantity, revenue = after.get(menu_item_id, (0, 0))
+        old_quantity, old_revenue = before.get(menu_item_id, (0, 0))
+        if (quantity, revenue) != (old_quantity, old_revenue):
+            _add(day, menu_item_id, quantity - old_quantity, revenue - old_revenue)
+    transaction.on_commit(invalidate)
+
+
+def rebuild():
+    """Recompute every day from the orders. Returns the number of rows."""
+    rows = (
+        OrderItem.objects.exclude(order__status="cancelled")
+        .annotate(date=TruncDate("order__created_at"))
+        .values("date", "menu_item_id")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("subtotal"))
+        .order_by()
+    )
+    with transaction.atomic():
+        ItemSalesDay.objects.all().delete()
+        created = ItemSalesDay.objects.bulk_create(
+            (ItemSalesDay(**row) for row in rows.iterator()), batch_size=5000
+        )
+        transaction.on_commit(invalidate)
+    return len(created)
+
+
+def _sales(start, end):
+    return ItemSalesDay.objects.filter(date__gte=start, date__lte=end).order_by()
+
+
+def top_items(start, end, by="quantity_sold", limit=TOP_LIMIT):
+    """Best sellers between the dates `start` and `end`, by quantity_sold or revenue."""
+    return list(
+        _sales(start, end)
+        .values(*ITEM_FIELDS)
+        .annotate(quantity_sold=Sum("quantity"), revenue=Sum("revenue"))
+        .filter(quantity_sold__gt=0)
+        .order_by(f"-{by}", "menu_item__name")[:limit]
+    )
+
+
+def category_sales(start, end):
+    """Quantity and revenue per category between the dates `start` and `end`."""
+    return list(
+        _sales(start, end)
+        .values("menu_item__category__name")
+        .annotate(total_quantity=Sum("quantity"), total_revenue=Sum("revenue"))
+        .filter(total_quantity__gt=0)
+        .order_by("-total_revenue")
+    )
+
+
+def leaderboards():
+    """
+    {days: {"top_quantity", "top_revenue", "categories"}} for each of WINDOWS,
+    ending today. Runs no query when cached.
+    """
+    today = timezone.localdate()
+    cached = cache.get(CACHE_KEY)
+    if cached is not None and cached["date"] == today:
+        metrics.CACHE_REQUESTS.inc(cache="leaderboards", result="hit")
+        return cached["windows"]
+
+    metrics.CACHE_REQUESTS.inc(cache="leaderboards", result="miss")
+    windows = {}
+    for days in WINDOWS:
+        start = today - timedelta(days=days - 1)
+        windows[days] = {
+            "top_quantity": top_items(start, today),
+            "top_revenue": top_items(start, today, by="revenue"),
+            "categories": category_sales(start, today),
+        }
+    cache.set(CACHE_KEY, {"date": today, "windows": windows}, CACHE_SECONDS)
+    return windows
+
+
+def best_sellers(days=7, limit=6):
+    """Most ordered items still on the menu, for the homepage."""
+    return [
+        item for item in leaderboards()[days]["top_quantity"] if item["menu_item__is_available"]
+    ][:limit]
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,297 @@
+"""
+Compare the read-heavy pages under gunicorn's sync workers (WSGI) and under
+uvicorn (ASGI), where index, feeds, feed_detail, menu and menu_item_detail
+run as async views, against a slow database.
+
+Seeds a separate benchmark database file (never the live one), starts each
+server on it with --delay-ms of latency added to every query (the servers run
+this module's wsgi_application / asgi_application, which add it) and has
+--clients concurrent clients request the pages for --seconds. A sync worker
+is held for the whole of a request, queries included; an async view lets its
+worker take other requests while it waits. Reports throughput and latency percentiles per server and client
+count as JSON:
+
+    pip install uvicorn
+    python manage.py bench_asgi --workers 2 --clients 8 32 --delay-ms 20
+    python manage.py bench_asgi --server gunicorn --output wsgi.json
+"""
+
+import http.client
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.cookies import SimpleCookie
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from django.utils import timezone
+
+from restaurant.routers import use_primary_only
+
+# Latency the servers add to every query, passed in their environment
+QUERY_DELAY_ENV = "BENCH_QUERY_DELAY_MS"
+
+SERVERS = {
+    "gunicorn": lambda workers, port: [
+        "gunicorn",
+        "restaurant.management.commands.bench_asgi:wsgi_application()",
+        "--workers",
+        str(workers),
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--log-level",
+        "warning",
+    ],
+    "uvicorn": lambda workers, port: [
+        "uvicorn",
+        "restaurant.management.commands.bench_asgi:asgi_application",
+        "--factory",
+        "--workers",
+        str(workers),
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+        "--no-access-log",
+    ],
+}
+STARTUP_SECONDS = 30
+
+
+def _delay_query(execute, sql, params, many, context):
+    time.sleep(int(os.environ[QUERY_DELAY_ENV]) / 1000)
+    return execute(sql, params, many, context)
+
+
+def _delay_queries(sender, connection, **kwargs):
+    # First, so execute_wrapper() blocks entered earlier still pop their own
+    connection.execute_wrappers.insert(0, _delay_query)
+
+
+def wsgi_application():
+    """The site's WSGI application, every query delayed (gunicorn factory)."""
+    from restaurant_site.wsgi import application
+
+    connection_created.connect(_delay_queries)
+    return application
+
+
+def asgi_application():
+    """The site's ASGI application, every query delayed (uvicorn factory)."""
+    from restaurant_site.asgi import application
+
+    connection_created.connect(_delay_queries)
+    return application
+
+
+def fetch(port, path, cookies):
+    """GET `path` as the client holding `cookies` (updated). Returns the status."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        headers = {"Accept-Encoding": "gzip, br"}
+        if cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in cookies.items())
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        for header in response.headers.get_all("Set-Cookie") or ():
+            for name, morsel in SimpleCookie(header).items():
+                cookies[name] = morsel.value
+        return response.status
+    finally:
+        conn.close()
+
+
+class Command(BaseCommand):
+    help = "Benchmark sync views under gunicorn vs async views under uvicorn"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server",
+            action="append",
+            choices=sorted(SERVERS),
+            help="Only this server (repeatable; default: both)",
+        )
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--clients", type=int, nargs="+", default=[8, 32])
+        parser.add_argument("--seconds", type=float, default=10, help="Duration of each run")
+        parser.add_argument("--delay-ms", type=int, default=20, help="Latency added to every query")
+        parser.add_argument("--rows", type=int, default=50)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        # Imported here as they load the models: the servers import this module
+        # for its application factories before Django is set up
+        from restaurant.query_budget import build_fixtures
+
+        servers = options["server"] or sorted(SERVERS)
+        for server in servers:
+            if importlib.util.find_spec(server) is None:
+                raise CommandError(
+                    f"{server} is not installed (pip install {server}), "
+                    f"or leave it out with --server"
+                )
+
+        # On disk, so the server processes can open it
+        path = settings.BASE_DIR / "bench_asgi.sqlite3"
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = str(path)
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        use_primary_only()
+        try:
+            fixtures = build_fixtures(options["rows"], seed=options["seed"])
+            paths = [
+                reverse("index"),
+                reverse("feeds"),
+                reverse("feed_detail", kwargs={"news_id": fixtures.news_id}),
+                reverse("menu"),
+                reverse("menu_item_detail", kwargs={"item_id": fixtures.item_id}),
+            ]
+            connections.close_all()
+
+            runs = []
+            for server in servers:
+                with ServerProcess(server, path, options) as port:
+                    for clients in options["clients"]:
+                        runs.append(self._run(server, port, paths, clients, options["seconds"]))
+                        self.stderr.write(
+                            f"{server:<9} {clients:>4} clients: "
+                            f"{runs[-1]['requests_per_s']:>8} req/s, "
+                            f"p50 {runs[-1]['latency_ms']['p50']} ms, "
+                            f"p95 {runs[-1]['latency_ms']['p95']} ms, "
+                            f"{runs[-1]['errors']} errors"
+                        )
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "workers": options["workers"],
+                "seconds_per_run": options["seconds"],
+                "query_delay_ms": options["delay_ms"],
+                "paths": paths,
+            },
+            "runs": runs,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+            self.stdout.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def _run(self, server, port, paths, clients, seconds):
+        from restaurant.management.commands.bench_funnel import percentile
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def client(offset):
+            cookies = {}  # One session and cart per client, as a browser
+            i = offset
+            while time.perf_counter() < deadline:
+                page = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    status = fetch(port, page, cookies)
+                except (OSError, http.client.HTTPException) as e:
+                    with lock:
+                        errors.append(f"{page}: {e}")
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    if status == 200:
+                        latencies.append(elapsed)
+                    else:
+                        errors.append(f"{page}: HTTP {status}")
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "server": server,
+            "clients": clients,
+            "requests": len(latencies),
+            "requests_per_s": round(len(latencies) / elapsed, 1),
+            "latency_ms": {
+                "mean": round(statistics.mean(latencies), 2) if latencies else 0,
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+            },
+            "errors": len(errors),
+            "error_samples": errors[:5],
+        }
+
+
+class ServerProcess:
+    """`with` block running `server` on the benchmark database; yields its port."""
+
+    def __init__(self, server, path, options):
+        self.port = options["port"]
+        self.command = [sys.executable, "-m"] + SERVERS[server](options["workers"], self.port)
+        self.env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{path}",
+            "DATABASE_REPLICA_URL": "",
+            QUERY_DELAY_ENV: str(options["delay_ms"]),
+            "TEMPLATE_PRELOAD": "1",
+        }
+
+    def __enter__(self):
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            self.command,
+            cwd=settings.BASE_DIR,
+            env=self.env,
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + STARTUP_SECONDS
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if fetch(self.port, "/", {}) == 200:
+                    return self.port
+            except (OSError, http.client.HTTPException):
+                pass
+            time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise CommandError(f"{self.command[2]} did not start:\n{self.output}")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.seek(0)
+        self.output = self.log.read().decode(errors="replace")
+        self.log.close()
@@ -0,0 +1,241 @@
+"""
+Load-test the customer ordering funnel:
+
+    index -> menu -> add_to_cart -> cart -> checkout -> order_confirmation
+
+Runs against a separate benchmark database (created like the test database,
+never the live one), seeds it with restaurant.datagen and replays the funnel from
+concurrent workers through Django's test client. Per view it reports latency
+percentiles, throughput and queries per request as JSON, so results can be
+diffed between releases.
+
+    python manage.py bench_funnel --scale 0.01 --workers 8 --output bench.json
+"""
+
+import json
+import random
+import re
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from restaurant.datagen import DataGenerator, muted_signals
+from restaurant.models import MenuItem, Order
+from restaurant.routers import use_primary_only
+
+TOKEN_RE = re.compile(r'name="checkout_token" value="([0-9a-f]+)"')
+
+
+class QueryCounter:
+    """connection.execute_wrapper that counts queries on this thread's connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = max(0, int(round(pct / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the ordering funnel against a seeded benchmark database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--menu-items", type=int, default=10000)
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--orders", type=int, default=5000000)
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiply all seed volumes (e.g. 0.01 for a quick run)",
+        )
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--iterations", type=int, default=25, help="Funnels per worker")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep and reuse the seeded benchmark database between runs",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        self._setup_database(options["keepdb"])
+        try:
+            if not User.objects.filter(username__startswith="bench_").exists():
+                self._seed(options)
+            report = self._run(options)
+        finally:
+            if not options["keepdb"]:
+                connection.creation.destroy_test_db(self.old_db_name, verbosity=0, keepdb=False)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+            self.stdout.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    # ------------------------------------------------------------------
+    # Database
+    # ------------------------------------------------------------------
+
+    def _setup_database(self, keepdb):
+        # Workers need a shared on-disk database; in-memory SQLite would
+        # serialize them on shared-cache table locks.
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        if connection.vendor == "sqlite" and not test_settings.get("NAME"):
+            test_settings["NAME"] = str(settings.BASE_DIR / "bench.sqlite3")
+        self.old_db_name = connection.settings_dict["NAME"]
+        # Also points settings.DATABASES (and so worker threads) at the copy
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        use_primary_only()
+
+    def _scaled(self, options, key, minimum=1):
+        return max(minimum, int(options[key] * options["scale"]))
+
+    def _seed(self, options):
+        started = time.perf_counter()
+        generator = DataGenerator(seed=options["seed"], log=self.stdout.write)
+        with muted_signals():
+            generator.catalog(self._scaled(options, "menu_items"))
+            generator.users(self._scaled(options, "users"), prefix="bench_", password="bench")
+            generator.orders(self._scaled(options, "orders"))
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    # ------------------------------------------------------------------
+    # Funnel
+    # ------------------------------------------------------------------
+
+    def _run(self, options):
+        user_ids = list(
+            User.objects.filter(username__startswith="bench_").values_list("id", flat=True)[:10000]
+        )
+        item_ids = list(
+            MenuItem.objects.filter(is_available=True).values_list("id", flat=True)[:1000]
+        )
+        samples = {}
+        errors = []
+        lock = threading.Lock()
+
+        workers = [
+            threading.Thread(
+                target=self._worker,
+                args=(options, user_ids, item_ids, samples, errors, lock),
+            )
+            for _ in range(options["workers"])
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        views = {}
+        for view, view_samples in samples.items():
+            latencies = sorted(ms for ms, _ in view_samples)
+            queries = [count for _, count in view_samples]
+            views[view] = {
+                "requests": len(view_samples),
+                "throughput_rps": round(len(view_samples) / elapsed, 2),
+                "latency_ms": {
+                    "mean": round(statistics.mean(latencies), 2),
+                    "p50": round(percentile(latencies, 50), 2),
+                    "p95": round(percentile(latencies, 95), 2),
+                    "p99": round(percentile(latencies, 99), 2),
+                },
+                "queries": {
+                    "mean": round(statistics.mean(queries), 2),
+                    "max": max(queries),
+                },
+            }
+
+        funnels = options["workers"] * options["iterations"]
+        return {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "workers": options["workers"],
+                "iterations": options["iterations"],
+                "menu_items": MenuItem.objects.count(),
+                "orders": Order.objects.count(),
+            },
+            "total": {
+                "elapsed_s": round(elapsed, 2),
+                "funnels": funnels,
+                "funnels_per_s": round(funnels / elapsed, 2),
+                "errors": len(errors),
+            },
+            "views": views,
+            "errors": errors[:20],
+        }
+
+    def _worker(self, options, user_ids, item_ids, samples, errors, lock):
+        client = Client(HTTP_HOST="localhost")
+        counter = QueryCounter()
+
+        def timed(view, method, path, data=None):
+            counter.count = 0
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data or {})
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                samples.setdefault(view, []).append((elapsed_ms, counter.count))
+                if response.status_code >= 400:
+                    errors.append(f"{view} {path}: HTTP {response.status_code}")
+            return response
+
+        try:
+            with connection.execute_wrapper(counter):
+                for _ in range(options["iterations"]):
+                    client.force_login(User.objects.get(id=random.choice(user_ids)))
+                    timed("index", "get", "/")
+                    timed("menu", "get", "/menu/")
+                    for item_id in random.sample(item_ids, k=random.randint(1, 3)):
+                        timed(
+                            "add_to_cart",
+                            "post",
+                            f"/cart/add/{item_id}/",
+                            {"quantity": random.randint(1, 3)},
+                        )
+                    timed("cart", "get", "/cart/")
+                    page = timed("checkout", "get", "/checkout/")
+                    match = TOKEN_RE.search(page.content.decode())
+                    response = timed(
+                        "checkout_submit",
+                        "post",
+                        "/checkout/",
+                        {
+                            "customer_name": "Bench",
+                            "phone": "0123456789",
+                            "delivery_address": "1 Bench Street",
+                            "payment_method": "cod",
+                            "checkout_token": match.group(1) if match else "",
+                        },
+                    )
+                    if response.status_code == 302:
+                        timed("order_confirmation", "get", response.url)
+        except Exception as e:
+            with lock:
+                errors.append(f"worker crashed: {e!r}")
+        finally:
+            connection.close()
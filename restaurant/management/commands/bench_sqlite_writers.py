@@ -0,0 +1,201 @@
+"""
+Measure checkout throughput on SQLite with concurrent writers, with the stock
+SQLite setup (rollback journal, synchronous=FULL, deferred transactions) and
+with the tuned one: settings.SQLITE_PRAGMAS and BEGIN IMMEDIATE transactions
+(see restaurant/backends/sqlite3).
+
+Each writer thread repeatedly places an order the way checkout_view does
+(order, order items, totals and outbox event in one transaction) and then
+credits the loyalty points like the order.placed outbox handler. Runs against
+a separate benchmark database file, never the live one.
+
+    python manage.py bench_sqlite_writers --writers 1 4 8 --seconds 5
+"""
+
+import json
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from restaurant import outbox
+from restaurant.backends.sqlite3.base import DatabaseWrapper
+from restaurant.datagen import DataGenerator, muted_signals
+from restaurant.management.commands.bench_funnel import percentile
+from restaurant.models import MenuItem, Order, OrderItem
+from restaurant.order_events import apply_order_to_profile
+from restaurant.routers import use_primary_only
+
+# What Django and SQLite do without any tuning
+STOCK_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL"}
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent SQLite checkouts with stock and tuned pragmas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+        parser.add_argument("--seconds", type=float, default=5, help="Duration of each run")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if not isinstance(connections["default"], DatabaseWrapper):
+            raise CommandError('This benchmark needs the "restaurant.backends.sqlite3" ENGINE')
+        random.seed(options["seed"])
+
+        # On disk: in-memory SQLite has no journal and no file locks to measure
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = str(
+            settings.BASE_DIR / "bench_writers.sqlite3"
+        )
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        use_primary_only()
+        try:
+            self._seed(options["seed"])
+            runs = []
+            for mode, pragmas, transaction_mode in (
+                ("stock", STOCK_PRAGMAS, None),
+                ("tuned", settings.SQLITE_PRAGMAS, "IMMEDIATE"),
+            ):
+                for writers in options["writers"]:
+                    runs.append(
+                        self._run(mode, pragmas, transaction_mode, writers, options["seconds"])
+                    )
+                    self.stderr.write(
+                        f"{mode:<6} {writers:>3} writers: "
+                        f"{runs[-1]['checkouts_per_s']:>8} checkouts/s, "
+                        f"p95 {runs[-1]['latency_ms']['p95']} ms, "
+                        f"{runs[-1]['locked_errors']} locked"
+                    )
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "seconds_per_run": options["seconds"],
+                "stock_pragmas": STOCK_PRAGMAS,
+                "tuned_pragmas": settings.SQLITE_PRAGMAS,
+            },
+            "runs": runs,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+            self.stdout.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def _seed(self, seed):
+        generator = DataGenerator(seed=seed)
+        with muted_signals():
+            generator.catalog()
+            generator.users(200, prefix="bench_", password="bench")
+        self.user_ids = list(User.objects.values_list("id", flat=True))
+        self.items = list(
+            MenuItem.objects.filter(is_available=True).values_list(
+                "id", "price", "price_version_id"
+            )
+        )
+
+    def _run(self, mode, pragmas, transaction_mode, writers, seconds):
+        # Pragmas are applied when a connection opens; journal_mode can only
+        # change while no other connection has the file open
+        connections.close_all()
+        # Shared by the connections of all threads
+        connection.settings_dict["OPTIONS"]["transaction_mode"] = transaction_mode
+        latencies = []
+        locked = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        with override_settings(SQLITE_PRAGMAS=pragmas, OUTBOX_DISPATCH="off"):
+            connection.ensure_connection()
+            threads = [
+                threading.Thread(target=self._writer, args=(deadline, latencies, locked, lock))
+                for _ in range(writers)
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            journal_mode = connection.cursor().execute("PRAGMA journal_mode").fetchone()
+            connections.close_all()
+
+        latencies.sort()
+        return {
+            "mode": mode,
+            "journal_mode": journal_mode[0],
+            "transaction_mode": transaction_mode or "DEFERRED",
+            "writers": writers,
+            "checkouts": len(latencies),
+            "checkouts_per_s": round(len(latencies) / elapsed, 1),
+            "latency_ms": {
+                "mean": round(statistics.mean(latencies), 2) if latencies else 0,
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+            },
+            "locked_errors": len(locked),
+            "errors": locked[:5],
+        }
+
+    def _writer(self, deadline, latencies, locked, lock):
+        rng = random.Random()
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    self._checkout(rng)
+                except OperationalError as e:
+                    with lock:
+                        locked.append(str(e))
+                    continue
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+
+    def _checkout(self, rng):
+        """The writes of checkout_view followed by the order.placed points credit."""
+        lines = rng.sample(self.items, k=rng.randint(1, 4))
+        with transaction.atomic():
+            order = Order.objects.create(
+                customer_id=rng.choice(self.user_ids),
+                customer_name="Bench",
+                phone="0900000000",
+                delivery_address="1 Lê Lợi, Quận 1, TP.HCM",
+                payment_method="cod",
+            )
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(
+                        order=order,
+                        menu_item_id=item_id,
+                        quantity=quantity,
+                        price=price,
+                        price_version_id=version_id,
+                        subtotal=price * quantity,
+                    )
+                    for (item_id, price, version_id), quantity in (
+                        (line, rng.randint(1, 3)) for line in lines
+                    )
+                ]
+            )
+            order.calculate_total()
+            outbox.enqueue("order.placed", order_id=order.id)
+
+        with transaction.atomic():
+            apply_order_to_profile({"order_id": order.id})
@@ -0,0 +1,164 @@
+"""
+Benchmark template rendering per page.
+
+Requests every HTML page in restaurant/query_budget.SCENARIOS once against a
+fresh test database to capture its template and context, then renders that
+template again and again:
+
+    cached     compiled once by the cached loader (TEMPLATES in settings.py)
+    uncached   parsed from disk on every render, base.html included
+
+Context processors run on every render, as they do in a request. Reports the
+median milliseconds of each, the queries a render runs (template code
+calling the database) and the size of the HTML:
+
+    python manage.py bench_templates --rows 50 --iterations 50
+    python manage.py bench_templates --view index --view menu --output t.json
+"""
+
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.template import Engine, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.context import make_context
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    ContextList,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from restaurant.query_budget import SCENARIOS, budgeted_views, build_fixtures
+from restaurant.routers import use_primary_only
+
+
+def uncached_engine(engine):
+    """A copy of `engine` whose loaders read and compile templates every time."""
+    loaders = []
+    for loader in engine.loaders:
+        if isinstance(loader, (list, tuple)) and loader[0].endswith("cached.Loader"):
+            loaders.extend(loader[1])
+        else:
+            loaders.append(loader)
+    return Engine(
+        dirs=engine.dirs,
+        context_processors=engine.context_processors,
+        debug=engine.debug,
+        loaders=loaders,
+        string_if_invalid=engine.string_if_invalid,
+        file_charset=engine.file_charset,
+        libraries=engine.libraries,
+        builtins=engine.builtins,
+        autoescape=engine.autoescape,
+    )
+
+
+def capture_pages(fixtures, views):
+    """(view, template name, context dict, request) of each HTML page."""
+    clients = {None: Client()}
+    for role in ("customer", "staff"):
+        clients[role] = Client()
+        clients[role].force_login(getattr(fixtures, role))
+
+    pages = []
+    for view in views:
+        scenario = SCENARIOS[view]
+        if scenario.data is not None:
+            continue  # POST
+        path = reverse(view, kwargs=scenario.kwargs(fixtures) if scenario.kwargs else None)
+        response = clients[scenario.role].get(path, scenario.params)
+        if response.status_code != 200 or not response.templates:
+            continue  # JSON, redirects, streams
+        context = response.context
+        if isinstance(context, ContextList):
+            context = context[0]
+        # The page's own context; processors run again on each render
+        pages.append((view, response.templates[0].name, context.flatten(), response.wsgi_request))
+    return pages
+
+
+def time_render(engine, name, context, request, iterations):
+    """Median ms of get_template + render, queries per render, HTML bytes."""
+    timings = []
+    queries = []
+    html = ""
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            html = engine.get_template(name).render(make_context(context, request))
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    return statistics.median(timings), max(queries), len(html.encode())
+
+
+class Command(BaseCommand):
+    help = "Benchmark cached vs uncached template rendering per page"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--view",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Only this URL name (repeatable)",
+        )
+        parser.add_argument("--rows", type=int, default=50)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        use_primary_only()
+        try:
+            report = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(json.dumps(report, indent=2))
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def run(self, options):
+        engine = next(
+            backend.engine for backend in engines.all() if isinstance(backend, DjangoTemplates)
+        )
+        uncached = uncached_engine(engine)
+        iterations = options["iterations"]
+        report = {"rows": options["rows"], "iterations": iterations, "pages": []}
+
+        self.stdout.write(
+            f"{'view':<22} {'template':<26} {'cached ms':>10} {'uncached ms':>12}"
+            f" {'queries':>8} {'KB':>7}"
+        )
+        with transaction.atomic():
+            fixtures = build_fixtures(options["rows"], seed=options["seed"])
+            pages = capture_pages(fixtures, options["view"] or budgeted_views())
+            for view, name, context, request in pages:
+                cached_ms, queries, size = time_render(engine, name, context, request, iterations)
+                uncached_ms, _, _ = time_render(uncached, name, context, request, iterations)
+                report["pages"].append(
+                    {
+                        "view": view,
+                        "template": name,
+                        "cached_ms": round(cached_ms, 3),
+                        "uncached_ms": round(uncached_ms, 3),
+                        "queries": queries,
+                        "bytes": size,
+                    }
+                )
+                self.stdout.write(
+                    f"{view:<22} {name:<26} {cached_ms:>10.2f} {uncached_ms:>12.2f}"
+                    f" {queries:>8} {size / 1024:>7.1f}"
+                )
+            transaction.set_rollback(True)
+        return report
@@ -0,0 +1,93 @@
+"""
+Fail when a view's query count grows with the amount of data (an N+1).
+
+Renders every GET view in restaurant/urls.py against a fresh test database
+seeded at a small and a large scale and compares the number of queries. For
+each view that grew, prints a diff of the normalized SQL so the repeated
+statement stands out:
+
+    python manage.py check_query_budgets
+    python manage.py check_query_budgets --view menu --view order_history
+
+Exits non-zero on any failure, so it can gate CI.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from restaurant.query_budget import EXCLUDED_VIEWS, SCENARIOS, query_diff, run_budgets
+from restaurant.routers import use_primary_only
+
+
+class Command(BaseCommand):
+    help = "Check that no view runs more queries as the data grows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--view",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Only check this URL name (repeatable)",
+        )
+        parser.add_argument("--small", type=int, default=5)
+        parser.add_argument("--large", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options["small"] >= options["large"]:
+            raise CommandError("--small must be lower than --large")
+
+        started = time.perf_counter()
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        use_primary_only()
+        try:
+            results = run_budgets(
+                scales=(options["small"], options["large"]),
+                views=options["view"],
+                seed=options["seed"],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        failures = []
+        for result in results:
+            small, large = (result.counts[s] for s in (options["small"], options["large"]))
+            errors = [
+                f"HTTP {status} at {scale} rows"
+                for scale, status in result.status.items()
+                if status >= 400
+            ]
+            line = f"{result.view:<28} {result.path:<36} {small:>4} -> {large:>4}"
+            if result.passed and not errors:
+                self.stdout.write(f"{line}  ok")
+                continue
+            failures.append(result.view)
+            self.stdout.write(self.style.ERROR(f"{line}  FAIL {' '.join(errors)}"))
+            if not result.passed:
+                self.stdout.write(
+                    query_diff(
+                        result.queries[options["small"]],
+                        result.queries[options["large"]],
+                        f"{options['small']} rows",
+                        f"{options['large']} rows",
+                    )
+                )
+
+        if not options["view"]:
+            for view, reason in sorted(EXCLUDED_VIEWS.items()):
+                self.stdout.write(f"{view:<28} skipped: {reason}")
+
+        elapsed = time.perf_counter() - started
+        if failures:
+            raise CommandError(
+                f"{len(failures)} view(s) over their query budget: {', '.join(failures)}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"All {len(results)} views within budget ({elapsed:.1f}s)")
+        )
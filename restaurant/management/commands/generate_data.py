@@ -0,0 +1,82 @@
+"""
+Generate a deterministic synthetic dataset:
+
+    python manage.py generate_data                      # small demo dataset
+    python manage.py generate_data --users 0 --orders 0 # sample catalog only
+    python manage.py generate_data --users 200000 --orders 5000000 --years 3
+
+The same --seed and --until always produce the same rows.
+"""
+
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant import leaderboards, news, search
+from restaurant.datagen import BATCH_SIZE, DataGenerator, muted_signals
+
+
+class Command(BaseCommand):
+    help = "Bulk-load a seeded synthetic dataset (catalog, customers, orders, carts)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--menu-items",
+            type=int,
+            default=50,
+            help="Generated dishes on top of the sample menu (default: 50)",
+        )
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=20000)
+        parser.add_argument("--redemptions", type=int, default=500)
+        parser.add_argument("--carts", type=int, default=100, help="Customers with an open cart")
+        parser.add_argument(
+            "--years",
+            type=float,
+            default=2,
+            help="Spread orders over this many years up to --until (default: 2)",
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Last day with orders, YYYY-MM-DD (default: today)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--prefix",
+            default="customer_",
+            help="Username prefix of generated customers (default: customer_)",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if options["users"] and User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users named {prefix}* already exist; pick another --prefix")
+
+        generator = DataGenerator(
+            seed=options["seed"],
+            until=options["until"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+        )
+        started = time.perf_counter()
+        with muted_signals():
+            generator.catalog(options["menu_items"], years=options["years"])
+            if options["users"]:
+                generator.users(options["users"], prefix=prefix)
+                generator.orders(options["orders"], years=options["years"])
+                generator.redemptions(options["redemptions"])
+                generator.carts(options["carts"])
+                generator.settle_points(prefix=prefix)
+                # Bulk-loaded orders bypass the outbox handlers
+                leaderboards.rebuild()
+        # Bulk-loaded rows bypass the save signals
+        search.rebuild()
+        news.invalidate()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated data in {time.perf_counter() - started:.1f}s")
+        )
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from restaurant import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox events (order side effects, retries)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for new events",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds between polls with --loop (default: 2)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Events delivered per batch (default: 100)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = outbox.process_pending(limit=options["batch_size"])
+            if delivered:
+                self.stdout.write(f"Delivered {delivered} outbox event(s)")
+            if not options["loop"]:
+                break
+            if delivered < options["batch_size"]:
+                time.sleep(options["interval"])
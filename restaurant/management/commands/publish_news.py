@@ -0,0 +1,46 @@
+"""
+Render the news feed snapshot (restaurant/news.py) now and, with --loop, again
+whenever a post's publish_at or expire_at passes. Needed with
+NEWS_SCHEDULER = "off", and a CACHE_URL shared with the server processes:
+
+    python manage.py publish_news             # e.g. from cron, every minute
+    python manage.py publish_news --loop
+
+Posts saved in the meantime are picked up within --interval seconds.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from restaurant import news
+
+
+class Command(BaseCommand):
+    help = "Pre-render the news feed, and again at each scheduled post"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and publish at every publish/expiry time",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Longest sleep between publishes with --loop (default: 60)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            snapshot = news.publish()
+            self.stdout.write(
+                f"Published {len(snapshot['items'])} post(s), valid until "
+                f"{timezone.localtime(snapshot['valid_until']):%Y-%m-%d %H:%M:%S}"
+            )
+            if not options["loop"]:
+                break
+            wait = (snapshot["valid_until"] - timezone.now()).total_seconds()
+            time.sleep(min(max(wait, 0), options["interval"]))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from restaurant import leaderboards
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily item sales behind the top-seller leaderboards"
+
+    def handle(self, *args, **options):
+        rows = leaderboards.rebuild()
+        self.stdout.write(f"Rebuilt {rows} item sales day(s)")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from restaurant import search
+
+
+class Command(BaseCommand):
+    help = "Re-index menu items, news posts and customers for search"
+
+    def handle(self, *args, **options):
+        documents = search.rebuild()
+        self.stdout.write(f"Indexed {documents} document(s)")
@@ -0,0 +1,61 @@
+"""
+Copy the SQLite primary database over the SQLite replica, to try out read
+replica routing (restaurant/routers.py) locally without PostgreSQL:
+
+    DATABASE_REPLICA_URL=sqlite:///db-replica.sqlite3 python manage.py sync_sqlite_replica
+    DATABASE_REPLICA_URL=sqlite:///db-replica.sqlite3 python manage.py runserver
+
+With --loop the copy repeats every --interval seconds, so the replica lags
+behind the primary like a real one does.
+"""
+
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Copy the SQLite primary database to the SQLite read replica"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep copying, emulating replication lag",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds between copies with --loop (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        alias = settings.REPLICA_DATABASE
+        if not alias:
+            raise CommandError("No replica configured (set DATABASE_REPLICA_URL)")
+        primary = connections["default"].settings_dict
+        replica = connections[alias].settings_dict
+        if not all(db["ENGINE"].endswith("sqlite3") for db in (primary, replica)):
+            raise CommandError("Both the primary and the replica must be SQLite")
+
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(primary["NAME"])
+            target = sqlite3.connect(replica["NAME"])
+            try:
+                # Consistent snapshot, even while the site is writing
+                source.backup(target)
+            finally:
+                source.close()
+                target.close()
+            self.stdout.write(
+                f"Copied {primary['NAME']} to {replica['NAME']} "
+                f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,364 @@
+"""
+Counters and histograms in the Prometheus text format, served at /metrics.
+
+    ORDERS_PLACED.inc_on_commit(source="cart")  # One of cart, checkout, place_order
+    with REPORT_SECONDS.time(report="sales.summary"):
+        ...
+
+so that, for example, sum by (source) (rate(restaurant_orders_placed_total[5m]))
+splits orders by the checkout form they came from.
+
+Values live in a memory-mapped file per process in settings.METRICS_DIR, so
+every gunicorn worker writes only its own file and /metrics sums them all.
+Point METRICS_DIR at an empty directory shared by the workers and empty it
+when the server (not a single worker) restarts. Without METRICS_DIR, values
+are kept in memory and /metrics only shows the process that serves it, which
+is enough for runserver.
+
+An update is a dict lookup and an 8-byte write under a per-process lock.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Upper bounds (seconds) of the default histogram buckets; +Inf is implied
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+
+_HEADER = struct.Struct("i4x")  # bytes used
+_KEY_LENGTH = struct.Struct("i")
+_VALUE = struct.Struct("d")
+_INITIAL_SIZE = 64 * 1024
+
+
+class MemoryStore:
+    """Values of this process only."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def inc_many(self, increments):
+        with self._lock:
+            for key, amount in increments:
+                self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class MmapStore:
+    """
+    One file per process: a header with the bytes used, then entries of
+    (key length, JSON key padded to 8 bytes, float64 value). Entries are only
+    appended and values only overwritten in place, so readers in other
+    processes never see a half-written entry.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._open()
+        os.register_at_fork(after_in_child=self._open)
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{os.getpid()}.db"
+        self._file = open(self.path, "a+b")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_SIZE)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._positions = {}
+        self._used = _HEADER.unpack_from(self._mmap, 0)[0] or _HEADER.size
+        for key, _, position in _entries(self._mmap, self._used):
+            self._positions[key] = position
+        _HEADER.pack_into(self._mmap, 0, self._used)
+
+    def _add(self, key):
+        encoded = json.dumps(key).encode()
+        padded = encoded + b" " * (-(_KEY_LENGTH.size + len(encoded)) % 8)
+        size = _KEY_LENGTH.size + len(padded) + _VALUE.size
+        if self._used + size > len(self._mmap):
+            new_size = len(self._mmap)
+            while self._used + size > new_size:
+                new_size *= 2
+            self._mmap.close()
+            self._file.truncate(new_size)
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+
+        start = self._used
+        _KEY_LENGTH.pack_into(self._mmap, start, len(padded))
+        self._mmap[start + _KEY_LENGTH.size : start + _KEY_LENGTH.size + len(padded)] = padded
+        position = start + _KEY_LENGTH.size + len(padded)
+        _VALUE.pack_into(self._mmap, position, 0.0)
+        self._used += size
+        _HEADER.pack_into(self._mmap, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def inc(self, key, amount):
+        self.inc_many(((key, amount),))
+
+    def inc_many(self, increments):
+        with self._lock:
+            for key, amount in increments:
+                position = self._positions.get(key)
+                if position is None:
+                    position = self._add(key)
+                value = _VALUE.unpack_from(self._mmap, position)[0]
+                _VALUE.pack_into(self._mmap, position, value + amount)
+
+    def collect(self):
+        """Sum of every process' values, including workers that have exited."""
+        totals = {}
+        for path in self.directory.glob("*.db"):
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < _HEADER.size:
+                continue
+            for key, value, _ in _entries(data, _HEADER.unpack_from(data, 0)[0]):
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+def _entries(data, used):
+    """(key, value, value position) for each entry of a store file."""
+    position = _HEADER.size
+    while position < used:
+        length = _KEY_LENGTH.unpack_from(data, position)[0]
+        position += _KEY_LENGTH.size
+        key = json.loads(bytes(data[position : position + length]))
+        position += length
+        labels = tuple(tuple(label) for label in key[1])
+        yield (key[0], labels), _VALUE.unpack_from(data, position)[0], position
+        position += _VALUE.size
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                directory = getattr(settings, "METRICS_DIR", None)
+                _store = MmapStore(directory) if directory else MemoryStore()
+    return _store
+
+
+# ----------------------------------------------------------------------
+# Metrics
+# ----------------------------------------------------------------------
+
+_registry = []
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        _registry.append(self)
+
+    def inc_on_commit(self, amount=1, **labels):
+        """Count once the current transaction commits (right away outside one)."""
+        transaction.on_commit(lambda: self.inc(amount, **labels))
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        get_store().inc((self.name, tuple(sorted(labels.items()))), amount)
+
+    def samples(self, values):
+        return sorted(
+            (name, labels, value) for (name, labels), value in values.items() if name == self.name
+        )
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(buckets)
+        self._bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        self._keys = {}
+
+    def _keys_for(self, labels):
+        """(bucket keys, sum key, count key) for a label set, built once."""
+        label_items = tuple(sorted(labels.items()))
+        keys = self._keys.get(label_items)
+        if keys is None:
+            keys = self._keys[label_items] = (
+                [(self.name + "_bucket", label_items + (("le", bound),)) for bound in self._bounds],
+                (self.name + "_sum", label_items),
+                (self.name + "_count", label_items),
+            )
+        return keys
+
+    def observe(self, value, **labels):
+        buckets, sum_key, count_key = self._keys_for(labels)
+        # Only the bucket the value falls in; samples() makes them cumulative
+        get_store().inc_many(
+            (
+                (buckets[bisect_left(self.buckets, value)], 1),
+                (sum_key, value),
+                (count_key, 1),
+            )
+        )
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self, values):
+        series = {}
+        for (name, labels), value in values.items():
+            if name == self.name + "_bucket":
+                label_items = tuple(label for label in labels if label[0] != "le")
+                bound = dict(labels)["le"]
+                series.setdefault(label_items, {})[bound] = value
+            elif name in (self.name + "_sum", self.name + "_count"):
+                series.setdefault(labels, {})[name] = value
+
+        samples = []
+        for labels in sorted(series):
+            values_by_bound = series[labels]
+            cumulative = 0
+            for bound in self._bounds:
+                cumulative += values_by_bound.get(bound, 0)
+                samples.append((self.name + "_bucket", labels + (("le", bound),), cumulative))
+            for suffix in ("_sum", "_count"):
+                samples.append(
+                    (
+                        self.name + suffix,
+                        labels,
+                        values_by_bound.get(self.name + suffix, 0),
+                    )
+                )
+        return samples
+
+
+def _format_value(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    values = get_store().collect()
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in metric.samples(values):
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(
+                f"{name}{{{label_text}}} {_format_value(value)}"
+                if label_text
+                else f"{name} {_format_value(value)}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def timed(histogram, methods=None, **labels):
+    """View decorator observing the view's duration (only for `methods` if given)."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods and request.method not in methods:
+                return view(request, *args, **kwargs)
+            with histogram.time(**labels):
+                return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+ORDERS_PLACED = Counter(
+    "restaurant_orders_placed_total", "Orders placed, by the view that placed them."
+)
+ORDER_REVENUE = Counter(
+    "restaurant_order_revenue_vnd_total",
+    "Total amount of placed orders in VND, by view.",
+)
+CHECKOUT_SECONDS = Histogram(
+    "restaurant_checkout_seconds", "Time to handle a checkout/order form submit."
+)
+CART_MUTATIONS = Counter(
+    "restaurant_cart_mutations_total",
+    "Cart changes, by action (add/update/remove/clear).",
+)
+POINTS_CREDITED = Counter(
+    "restaurant_points_credited_total", "Loyalty points credited for placed orders."
+)
+POINTS_REDEEMED = Counter(
+    "restaurant_points_redeemed_total", "Loyalty points spent, by kind of redemption."
+)
+CACHE_REQUESTS = Counter(
+    "restaurant_cache_requests_total",
+    "Application cache lookups, by cache and hit/miss.",
+)
+REPORT_SECONDS = Histogram("restaurant_report_seconds", "Time to build a staff report page.")
+DASHBOARD_WIDGET_FAILURES = Counter(
+    "restaurant_dashboard_widget_failures_total",
+    "Report widgets left out of a page, by report, widget and error/timeout.",
+)
+DB_QUERY_SECONDS = Histogram(
+    "restaurant_db_query_seconds",
+    "Database query time, by connection alias.",
+    buckets=DB_QUERY_BUCKETS,
+)
+
+
+def _time_query(alias):
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, alias=alias)
+
+    return wrapper
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    """Time every query of every new connection."""
+    if getattr(connection, "_metrics_timed", False):
+        return  # reconnected after CONN_MAX_AGE
+    connection._metrics_timed = True
+    # First, so execute_wrapper() blocks (which pop the last one) leave it alone
+    connection.execute_wrappers.insert(0, _time_query(connection.alias))
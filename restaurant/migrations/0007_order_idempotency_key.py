@@ -0,0 +1,20 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0006_salesreport_userreport_alter_cart_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, null=True, unique=True
+            ),
+        ),
+    ]
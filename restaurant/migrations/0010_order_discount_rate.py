@@ -0,0 +1,33 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:42
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_discount_rate(apps, schema_editor):
+    """Recover the discount rule (5% / 10%) of orders placed before this field"""
+    Order = apps.get_model("restaurant", "Order")
+    discounted = Order.objects.filter(discount_applied__gt=0).only(
+        "id", "total_amount", "discount_applied"
+    )
+    for order in discounted.iterator():
+        subtotal = order.total_amount + order.discount_applied
+        rate = (order.discount_applied / subtotal).quantize(Decimal("0.01"))
+        Order.objects.filter(id=order.id).update(discount_rate=rate)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0009_order_status_timestamps_orderstatuschange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="discount_rate",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=4),
+        ),
+        migrations.RunPython(backfill_discount_rate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_initial_price_versions(apps, schema_editor):
+    """Give every menu item a first price version and capture cart line prices"""
+    MenuItem = apps.get_model("restaurant", "MenuItem")
+    MenuItemPrice = apps.get_model("restaurant", "MenuItemPrice")
+    CartItem = apps.get_model("restaurant", "CartItem")
+
+    for item in MenuItem.objects.all().iterator():
+        version = MenuItemPrice.objects.create(menu_item=item, price=item.price)
+        MenuItem.objects.filter(id=item.id).update(price_version=version)
+        CartItem.objects.filter(menu_item=item).update(unit_price=item.price, price_version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0010_order_discount_rate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cartitem",
+            name="unit_price",
+            field=models.DecimalField(blank=True, decimal_places=0, max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name="MenuItemPrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("price", models.DecimalField(decimal_places=0, max_digits=10)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "menu_item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_versions",
+                        to="restaurant.menuitem",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="cartitem",
+            name="price_version",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="restaurant.menuitemprice",
+            ),
+        ),
+        migrations.AddField(
+            model_name="menuitem",
+            name="price_version",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="restaurant.menuitemprice",
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="price_version",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="restaurant.menuitemprice",
+            ),
+        ),
+        migrations.RunPython(create_initial_price_versions, migrations.RunPython.noop),
+    ]
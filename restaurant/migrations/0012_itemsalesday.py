@@ -0,0 +1,60 @@
+# Generated by Django 4.2.27 on 2026-10-19 11:13
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def backfill_item_sales(apps, schema_editor):
+    """Fill the daily item sales from the orders placed so far"""
+    OrderItem = apps.get_model("restaurant", "OrderItem")
+    ItemSalesDay = apps.get_model("restaurant", "ItemSalesDay")
+
+    rows = (
+        OrderItem.objects.exclude(order__status="cancelled")
+        .annotate(date=TruncDate("order__created_at"))
+        .values("date", "menu_item_id")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("subtotal"))
+        .order_by()
+    )
+    ItemSalesDay.objects.bulk_create(
+        (ItemSalesDay(**row) for row in rows.iterator()), batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0011_menuitemprice_price_snapshots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemSalesDay",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("quantity", models.IntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                (
+                    "menu_item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_sales",
+                        to="restaurant.menuitem",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "unique_together": {("date", "menu_item")},
+            },
+        ),
+        migrations.RunPython(backfill_item_sales, migrations.RunPython.noop),
+    ]
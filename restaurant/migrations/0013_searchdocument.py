@@ -0,0 +1,148 @@
+# Generated by Django 4.2.27 on 2026-10-19 11:15
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+FTS_TABLE = "restaurant_searchdocument_fts"
+
+SQLITE_CREATE = [
+    # External content table: the text lives in restaurant_searchdocument only
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        text, content='restaurant_searchdocument', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER restaurant_searchdocument_ai
+        AFTER INSERT ON restaurant_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER restaurant_searchdocument_ad
+        AFTER DELETE ON restaurant_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER restaurant_searchdocument_au
+        AFTER UPDATE OF text ON restaurant_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS restaurant_searchdocument_ai",
+    "DROP TRIGGER IF EXISTS restaurant_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS restaurant_searchdocument_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRES_CREATE = [
+    "CREATE INDEX restaurant_searchdocument_text_fts ON restaurant_searchdocument "
+    "USING gin (to_tsvector('simple', text))",
+]
+POSTGRES_DROP = ["DROP INDEX IF EXISTS restaurant_searchdocument_text_fts"]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def create_fulltext_index(apps, schema_editor):
+    """FTS5 table on SQLite, tsvector GIN index on PostgreSQL, nothing elsewhere"""
+    _run(schema_editor, {"sqlite": SQLITE_CREATE, "postgresql": POSTGRES_CREATE})
+
+
+def drop_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_DROP, "postgresql": POSTGRES_DROP})
+
+
+def _words(*parts):
+    """Same folding as restaurant.search.words(), frozen for this migration"""
+    text = " ".join(part or "" for part in parts).replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def backfill_search_documents(apps, schema_editor):
+    """Index the menu, news and customers that exist so far"""
+    MenuItem = apps.get_model("restaurant", "MenuItem")
+    NewsFeed = apps.get_model("restaurant", "NewsFeed")
+    User = apps.get_model("auth", "User")
+    SearchDocument = apps.get_model("restaurant", "SearchDocument")
+
+    documents = []
+    for item in MenuItem.objects.select_related("category").iterator():
+        documents.append(
+            SearchDocument(
+                kind="menu_item",
+                object_id=item.id,
+                title=item.name,
+                text=_words(item.name, item.category.name, item.description),
+                is_public=item.is_available,
+            )
+        )
+    for news in NewsFeed.objects.iterator():
+        documents.append(
+            SearchDocument(
+                kind="news",
+                object_id=news.id,
+                title=news.title,
+                text=_words(news.title, news.content),
+                is_public=news.is_active,
+            )
+        )
+    for user in User.objects.iterator():
+        documents.append(
+            SearchDocument(
+                kind="customer",
+                object_id=user.id,
+                title=user.username,
+                text=_words(user.username, user.first_name, user.last_name, user.email),
+            )
+        )
+    SearchDocument.objects.bulk_create(documents, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0012_itemsalesday"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("menu_item", "Menu item"),
+                            ("news", "News"),
+                            ("customer", "Customer"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("title", models.CharField(max_length=200)),
+                ("text", models.TextField()),
+                ("is_public", models.BooleanField(default=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("kind", "object_id")},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
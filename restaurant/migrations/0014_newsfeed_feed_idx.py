@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-19 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0013_searchdocument"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="newsfeed",
+            index=models.Index(
+                fields=["is_active", "-created_at", "-id"], name="newsfeed_feed_idx"
+            ),
+        ),
+    ]
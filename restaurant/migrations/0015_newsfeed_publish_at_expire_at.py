@@ -0,0 +1,50 @@
+# Generated by Django 4.2.27 on 2026-10-19 11:29
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def publish_existing_posts(apps, schema_editor):
+    """Existing posts were published when they were created."""
+    NewsFeed = apps.get_model("restaurant", "NewsFeed")
+    NewsFeed.objects.update(publish_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("restaurant", "0014_newsfeed_feed_idx"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="newsfeed",
+            options={
+                "ordering": ["-publish_at", "-id"],
+                "verbose_name": "News Feed",
+                "verbose_name_plural": "News Feeds",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="newsfeed",
+            name="newsfeed_feed_idx",
+        ),
+        migrations.AddField(
+            model_name="newsfeed",
+            name="expire_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="newsfeed",
+            name="publish_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(publish_existing_posts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="newsfeed",
+            index=models.Index(
+                fields=["is_active", "-publish_at", "-id"], name="newsfeed_feed_idx"
+            ),
+        ),
+    ]
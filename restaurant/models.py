@@ -1,8 +1,10 @@
 from django.db import models
+from django.db.models import Sum
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
 
 
 class Category(models.Model):
@@ -33,6 +35,15 @@ class MenuItem(models.Model):
     )
     image = models.ImageField(upload_to="menu_items/", blank=True, null=True)
     is_available = models.BooleanField(default=True)
+    # Current immutable price version; a new one is recorded on every price change
+    price_version = models.ForeignKey(
+        "MenuItemPrice",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -42,6 +53,49 @@ class MenuItem(models.Model):
     def __str__(self):
         return f"{self.name} - {self.price:,.0f} ₫"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored price to detect changes on save
+        instance._loaded_price = instance.__dict__.get("price")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save and record a new price version if the price changed"""
+        price_changed = self._state.adding or self.price != getattr(
+            self, "_loaded_price", None
+        )
+        super().save(*args, **kwargs)
+        if price_changed:
+            self.price_version = MenuItemPrice.objects.create(
+                menu_item=self, price=self.price
+            )
+            MenuItem.objects.filter(id=self.id).update(price_version=self.price_version)
+            self._loaded_price = self.price
+
+
+class MenuItemPrice(models.Model):
+    """Immutable price of a menu item from `created_at` on"""
+
+    menu_item = models.ForeignKey(
+        MenuItem, on_delete=models.CASCADE, related_name="price_versions"
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=0)  # VND
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return (
+            f"{self.menu_item.name} - {self.price:,.0f} ₫ ({self.created_at:%d/%m/%Y})"
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Price versions are immutable; create a new one instead")
+        super().save(*args, **kwargs)
+
 
 class NewsFeed(models.Model):
     """Restaurant news, announcements, and promotions with video support"""
@@ -64,15 +118,33 @@ class NewsFeed(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Shown from publish_at until expire_at (never expires when empty)
+    publish_at = models.DateTimeField(default=timezone.now)
+    expire_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-publish_at", "-id"]
         verbose_name = "News Feed"
         verbose_name_plural = "News Feeds"
+        # The feed's keyset pages (restaurant/news.py)
+        indexes = [
+            models.Index(
+                fields=["is_active", "-publish_at", "-id"], name="newsfeed_feed_idx"
+            )
+        ]
 
     def __str__(self):
         return self.title
 
+    def is_visible(self, now=None):
+        """Active and within its publishing window."""
+        now = now or timezone.now()
+        return (
+            self.is_active
+            and self.publish_at <= now
+            and (self.expire_at is None or self.expire_at > now)
+        )
+
     def has_media(self):
         """Check if news has either image or video"""
         return bool(self.image or self.video)
@@ -133,6 +205,25 @@ class Order(models.Model):
         ("cancelled", "Cancelled"),
     ]
 
+    # Allowed status changes (see order_utils.transition_orders)
+    STATUS_TRANSITIONS = {
+        "pending": ["confirmed", "cancelled"],
+        "confirmed": ["preparing", "cancelled"],
+        "preparing": ["ready", "cancelled"],
+        "ready": ["delivered"],
+        "delivered": [],
+        "cancelled": [],
+    }
+
+    # When the order entered each status (pending is created_at)
+    STATUS_TIMESTAMP_FIELDS = {
+        "confirmed": "confirmed_at",
+        "preparing": "preparing_at",
+        "ready": "ready_at",
+        "delivered": "delivered_at",
+        "cancelled": "cancelled_at",
+    }
+
     customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
     total_amount = models.DecimalField(
@@ -142,6 +233,8 @@ class Order(models.Model):
     discount_applied = models.DecimalField(
         max_digits=12, decimal_places=0, default=0
     )  # Updated for VND
+    # Discount rule the order was placed with (0.05 = 5%), kept for recalculation
+    discount_rate = models.DecimalField(max_digits=4, decimal_places=2, default=0)
     special_instructions = models.TextField(blank=True)
     customer_name = models.CharField(max_length=200, blank=True)
     phone = models.CharField(max_length=20, blank=True)
@@ -156,9 +249,19 @@ class Order(models.Model):
         ],
     )
 
+    # Token issued with the checkout form; a replayed POST finds this order
+    idempotency_key = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+    preparing_at = models.DateTimeField(null=True, blank=True)
+    ready_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
@@ -166,27 +269,55 @@ class Order(models.Model):
     def __str__(self):
         return f"Order #{self.id} - {self.customer.username} - {self.status}"
 
-    def calculate_total(self, apply_discount=None):
-        # Calculater order total from order items
-        subtotal = sum(item.subtotal for item in self.items.all())
+    def can_transition_to(self, status):
+        """Check if the order may move from its current status to `status`"""
+        return status in self.STATUS_TRANSITIONS.get(self.status, [])
 
+    def calculate_total(self, apply_discount=None):
+        """Price a new order from its items, optionally applying a redeemed discount"""
         # Apply discount from session (manual redemption)
-        discount = 0
         if apply_discount:
             if apply_discount.get("type") == "5percent":
-                discount = subtotal * Decimal("0.05")
+                self.discount_rate = Decimal("0.05")
             elif apply_discount.get("type") == "vip" or self.customer.profile.is_vip:
-                discount = subtotal * Decimal("0.10")
-            self.discount_applied = discount
+                self.discount_rate = Decimal("0.10")
+            else:
+                self.discount_rate = Decimal("0")
+
+        self._apply_subtotal(self._items_subtotal())
+        self.save()
+        return self.total_amount
+
+    def recalculate_totals(self):
+        """
+        Re-price the order after its items changed, keeping the discount rule it
+        was placed with. One aggregate query, and one UPDATE only if a total moved.
+        """
+        before = (self.total_amount, self.discount_applied, self.points_earned)
+        self._apply_subtotal(self._items_subtotal())
+        if (self.total_amount, self.discount_applied, self.points_earned) != before:
+            self.save(
+                update_fields=[
+                    "total_amount",
+                    "discount_applied",
+                    "points_earned",
+                    "updated_at",
+                ]
+            )
+        return self.total_amount
 
+    def _items_subtotal(self):
+        # Calculate order subtotal from order items in the database
+        return self.items.aggregate(total=Sum("subtotal"))["total"] or Decimal("0")
+
+    def _apply_subtotal(self, subtotal):
+        discount = (subtotal * self.discount_rate).to_integral_value()
+        self.discount_applied = discount
         self.total_amount = subtotal - discount
 
         # Calculate points (10% of subtotal before discount)
         self.points_earned = int((subtotal * Decimal("0.10")).to_integral_value())
 
-        self.save()
-        return self.total_amount
-
 
 class OrderItem(models.Model):
     """Individual items in an order"""
@@ -196,15 +327,78 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
     price = models.DecimalField(max_digits=10, decimal_places=0)  # Updated for VND
     subtotal = models.DecimalField(max_digits=12, decimal_places=0)  # Updated for VND
+    price_version = models.ForeignKey(
+        MenuItemPrice, on_delete=models.SET_NULL, null=True, blank=True
+    )
 
     def __str__(self):
         return f"{self.quantity}x {self.menu_item.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored item to re-snapshot the price if it changes
+        instance._loaded_menu_item_id = instance.__dict__.get("menu_item_id")
+        return instance
+
     def save(self, *args, **kwargs):
-        """Calculate subtotal before saving"""
-        self.price = self.menu_item.price
+        """
+        Snapshot the price when not given, or again when the line now holds a
+        different menu item, and calculate subtotal
+        """
+        item_changed = not self._state.adding and self.menu_item_id != getattr(
+            self, "_loaded_menu_item_id", self.menu_item_id
+        )
+        if self.price is None or item_changed:
+            self.price = self.menu_item.price
+            self.price_version_id = self.menu_item.price_version_id
         self.subtotal = self.price * self.quantity
         super().save(*args, **kwargs)
+        self._loaded_menu_item_id = self.menu_item_id
+
+
+class ItemSalesDay(models.Model):
+    """
+    Quantity and revenue of a menu item on one day (local time), excluding
+    cancelled orders; kept up to date by the order outbox handlers
+    (see restaurant/leaderboards.py)
+    """
+
+    date = models.DateField()
+    menu_item = models.ForeignKey(
+        MenuItem, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14, decimal_places=0, default=0
+    )  # VND, before order discounts
+
+    class Meta:
+        ordering = ["-date"]
+        unique_together = ["date", "menu_item"]
+
+    def __str__(self):
+        return f"{self.menu_item_id} on {self.date}: {self.quantity}"
+
+
+class OrderStatusChange(models.Model):
+    """Audit trail of order status changes"""
+
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="status_changes"
+    )
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    changed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-changed_at"]
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status} → {self.to_status}"
 
 
 class Reward(models.Model):
@@ -293,6 +487,13 @@ class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items")
     menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
+    # Price captured when the item was added (see cart_utils.add_to_cart)
+    unit_price = models.DecimalField(
+        max_digits=10, decimal_places=0, null=True, blank=True
+    )
+    price_version = models.ForeignKey(
+        MenuItemPrice, on_delete=models.SET_NULL, null=True, blank=True
+    )
     added_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -302,10 +503,17 @@ class CartItem(models.Model):
     def __str__(self):
         return f"{self.quantity}x {self.menu_item.name}"
 
+    @property
+    def price(self):
+        """Unit price captured at add time (live price for older cart lines)"""
+        if self.unit_price is None:
+            return self.menu_item.price
+        return self.unit_price
+
     @property
     def subtotal(self):
         """Calculate subtotal for this cart item"""
-        return self.menu_item.price * self.quantity
+        return self.price * self.quantity
 
     def save(self, *args, **kwargs):
         """Update cart's updated_at when cart item changes"""
@@ -314,3 +522,61 @@ class CartItem(models.Model):
 
         self.cart.updated_at = timezone.now()
         self.cart.save(update_fields=["updated_at"])
+
+
+class SearchDocument(models.Model):
+    """
+    Accent-folded text of a menu item, news post or customer, indexed with
+    SQLite FTS5 or a PostgreSQL tsvector (see restaurant/search.py)
+    """
+
+    KIND_CHOICES = [
+        ("menu_item", "Menu item"),
+        ("news", "News"),
+        ("customer", "Customer"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=200)
+    text = models.TextField()  # Folded words, space separated
+    # Shown to customers (available items, active news)
+    is_public = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["kind", "object_id"]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}: {self.title}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Side effect queued inside a write transaction and delivered after commit
+    (see restaurant/outbox.py)
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id} ({self.status})"
@@ -0,0 +1,202 @@
+"""
+The news feed: scheduled posts, newest first, a page at a time.
+
+A post is shown while it is active and between its publish_at and expire_at
+(NewsFeed.is_visible). Pages are keyset ("cursor") pages on (publish_at, id):
+the next page starts after the last post shown, so page 50 costs what page 1
+does and a post published meanwhile never shifts a post onto two pages.
+Cards load only the columns they show plus the first EXCERPT_CHARS of
+content.
+
+The first page is served from a snapshot: its posts plus their cards and
+the homepage's latest-news section already rendered to HTML, so reading the
+feed renders no news template. publish() builds it when a post is saved or
+deleted and again at the next publish_at/expire_at boundary, from a timer in
+each server process (NEWS_SCHEDULER = "thread") or from
+`manage.py publish_news --loop` (NEWS_SCHEDULER = "off", needs a shared
+CACHE_URL). A snapshot is rebuilt by the reader only if neither ran.
+
+    snapshot()["cards"][is_staff]         # HTML of the first page of cards
+    items, cursor = page(cursor)          # later pages; cursor None: no more
+"""
+
+import base64
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Min, Q
+from django.db.models.functions import Substr
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import metrics, search
+from .models import NewsFeed
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 12
+LATEST_COUNT = 3
+# Cards show the first 30 words of a post; this many characters cover them
+EXCERPT_CHARS = 400
+CARD_FIELDS = ("id", "title", "image", "video", "publish_at")
+
+SNAPSHOT_KEY = "news:snapshot"
+# Upper bound on staleness in other processes; this one rebuilds on every save
+SNAPSHOT_SECONDS = 3600
+
+_timer = None  # threading.Timer of the next publish() in this process
+_timer_lock = threading.Lock()
+
+
+def visible(now=None):
+    """Posts shown at `now`."""
+    now = now or timezone.now()
+    return NewsFeed.objects.filter(is_active=True, publish_at__lte=now).filter(
+        Q(expire_at__isnull=True) | Q(expire_at__gt=now)
+    )
+
+
+def cards(now=None):
+    """Posts shown at `now`, newest first, with `excerpt` instead of `content`."""
+    return (
+        visible(now)
+        .only(*CARD_FIELDS)
+        .annotate(excerpt=Substr("content", 1, EXCERPT_CHARS))
+        .order_by("-publish_at", "-id")
+    )
+
+
+def encode_cursor(publish_at, news_id):
+    """Cursor of the page after the post (publish_at, news_id)."""
+    key = f"{publish_at.isoformat()}|{news_id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(publish_at, id) of a cursor; ValueError if it is not one."""
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        publish_at, news_id = key.split("|")
+        return datetime.fromisoformat(publish_at), int(news_id)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def page(cursor=None, size=PAGE_SIZE, now=None):
+    """(posts, cursor of the next page or None) after `cursor`."""
+    posts = cards(now)
+    if cursor:
+        publish_at, news_id = decode_cursor(cursor)
+        posts = posts.filter(
+            Q(publish_at__lt=publish_at) | Q(publish_at=publish_at, id__lt=news_id)
+        )
+    posts = list(posts[: size + 1])
+    if len(posts) > size:
+        last = posts[size - 1]
+        return posts[:size], encode_cursor(last.publish_at, last.id)
+    return posts, None
+
+
+def next_boundary(now):
+    """The next publish_at or expire_at after `now` of an active post, or None."""
+    times = NewsFeed.objects.filter(is_active=True).aggregate(
+        publish=Min("publish_at", filter=Q(publish_at__gt=now)),
+        expire=Min("expire_at", filter=Q(expire_at__gt=now)),
+    )
+    return min((time for time in times.values() if time), default=None)
+
+
+def render_snapshot(now=None):
+    now = now or timezone.now()
+    items, next_cursor = page(now=now)
+    valid_until = now + timedelta(seconds=SNAPSHOT_SECONDS)
+    boundary = next_boundary(now)
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        # is_staff -> HTML (staff get edit links)
+        "cards": {
+            staff: render_to_string("news_cards.html", {"news_feeds": items, "staff": staff})
+            for staff in (False, True)
+        },
+        "latest": render_to_string("news_latest.html", {"latest_news": items[:LATEST_COUNT]}),
+        "built_at": now,
+        "valid_until": min(valid_until, boundary) if boundary else valid_until,
+    }
+
+
+def _store(snapshot):
+    cache.set(SNAPSHOT_KEY, snapshot, SNAPSHOT_SECONDS)
+    schedule(snapshot["valid_until"])
+    return snapshot
+
+
+def publish(now=None):
+    """Render and store the snapshot, and schedule the next one. Returns it."""
+    now = now or timezone.now()
+    snapshot = _store(render_snapshot(now))
+    # Search shows only what the feed shows
+    search.sync_news_visibility(visible(now).values_list("id", flat=True))
+    return snapshot
+
+
+def snapshot():
+    """The current snapshot; rendered here only if no publish() has run."""
+    cached = cache.get(SNAPSHOT_KEY)
+    if cached is not None and cached["valid_until"] > timezone.now():
+        metrics.CACHE_REQUESTS.inc(cache="news", result="hit")
+        schedule(cached["valid_until"])  # May have been built by another process
+        return cached
+    metrics.CACHE_REQUESTS.inc(cache="news", result="miss")
+    return _store(render_snapshot())
+
+
+def invalidate():
+    cache.delete(SNAPSHOT_KEY)
+
+
+# ----------------------------------------------------------------------
+# Scheduler
+# ----------------------------------------------------------------------
+
+
+def schedule(at):
+    """Run publish() in this process at `at` (NEWS_SCHEDULER = "thread")."""
+    global _timer
+    if getattr(settings, "NEWS_SCHEDULER", "thread") != "thread":
+        return
+    with _timer_lock:
+        if _timer is not None and _timer.at <= at:
+            return  # That run schedules the one after
+        if _timer is not None:
+            _timer.cancel()
+        delay = max((at - timezone.now()).total_seconds(), 0)
+        _timer = threading.Timer(delay, _run_scheduled)
+        _timer.at = at
+        _timer.daemon = True
+        _timer.name = "news-scheduler"
+        _timer.start()
+
+
+def _run_scheduled():
+    global _timer
+    with _timer_lock:
+        _timer = None
+    try:
+        publish()
+    except Exception:
+        logger.exception("News scheduler failed to publish the feed")
+    finally:
+        connections.close_all()
+
+
+@receiver(post_save, sender=NewsFeed)
+@receiver(post_delete, sender=NewsFeed)
+def news_changed(sender, **kwargs):
+    transaction.on_commit(publish)
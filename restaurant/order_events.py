@@ -0,0 +1,54 @@
+"""
+Outbox handlers for order events (see outbox.py).
+The handlers of one event share a transaction, so a failed attempt is rolled
+back as a whole before it is retried.
+"""
+
+import logging
+
+from . import leaderboards, metrics, outbox
+from .models import CustomerProfile, Order
+from .order_utils import live_orders, publish_order_update
+
+logger = logging.getLogger(__name__)
+
+
+@outbox.handler("order.placed")
+def apply_order_to_profile(payload):
+    """Credit loyalty points and backfill an empty profile address/phone."""
+    order = Order.objects.get(id=payload["order_id"])
+    profile = CustomerProfile.objects.select_for_update().filter(user_id=order.customer_id).first()
+    if profile is None:
+        return
+
+    if payload.get("backfill_contact") and not profile.address:
+        profile.address = order.delivery_address
+        profile.phone = order.phone
+
+    # add_points() saves the profile (and handles the VIP upgrade)
+    profile.add_points(order.points_earned)
+    metrics.POINTS_CREDITED.inc_on_commit(order.points_earned)
+
+
+@outbox.handler("order.placed")
+def notify_order_placed(payload):
+    """Notify the kitchen/staff about a new order."""
+    logger.info("Order #%s placed", payload["order_id"])
+
+
+@outbox.handler("order.placed")
+def publish_order_placed(payload):
+    """Show the new order on the kitchen board."""
+    publish_order_update(live_orders().get(id=payload["order_id"]))
+
+
+@outbox.handler("order.placed")
+def add_to_leaderboards(payload):
+    """Count the order's items in today's top sellers."""
+    leaderboards.record_order(payload["order_id"])
+
+
+@outbox.handler("order.cancelled")
+def remove_from_leaderboards(payload):
+    """Take a cancelled order's items out of the top sellers."""
+    leaderboards.record_order(payload["order_id"], sign=-1)
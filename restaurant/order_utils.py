@@ -0,0 +1,144 @@
+# restaurant/order_utils.py
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import outbox, pubsub
+from .models import Order, OrderStatusChange
+
+CHECKOUT_TOKEN_FIELD = "checkout_token"
+
+# Live updates (kitchen board / order tracking)
+KITCHEN_CHANNEL = "kitchen"
+ACTIVE_STATUSES = ["pending", "confirmed", "preparing", "ready"]
+NEXT_STATUS = {
+    "pending": "confirmed",
+    "confirmed": "preparing",
+    "preparing": "ready",
+    "ready": "delivered",
+}
+
+
+def issue_checkout_token():
+    """
+    Return a fresh idempotency key to embed in a checkout form.
+    The key is stored on the Order it creates (Order.idempotency_key is unique),
+    so replaying the same form can never create a second order.
+    """
+    return uuid.uuid4().hex
+
+
+def get_checkout_token(request):
+    """Read the idempotency key submitted with a checkout form (None if missing)."""
+    token = request.POST.get(CHECKOUT_TOKEN_FIELD, "").strip()
+    return token[:64] or None
+
+
+def find_replayed_order(request, token):
+    """
+    Return the order already created with `token`, or None.
+    Orders are only matched for the same customer, so a guessed key can't
+    expose someone else's order. Every order has a customer (checkout requires
+    a login), so an anonymous visitor never matches one.
+    """
+    if not token or not request.user.is_authenticated:
+        return None
+    return Order.objects.filter(idempotency_key=token, customer=request.user).only("id").first()
+
+
+def order_channel(order_id):
+    """Pub/sub channel carrying updates for a single order."""
+    return f"order.{order_id}"
+
+
+def live_orders():
+    """Orders with what order_snapshot() needs loaded up front."""
+    return Order.objects.select_related("customer").prefetch_related("items__menu_item")
+
+
+def order_snapshot(order):
+    """JSON-ready state of an order for the kitchen board and tracking page."""
+    return {
+        "id": order.id,
+        "status": order.status,
+        "status_display": order.get_status_display(),
+        "next_status": NEXT_STATUS.get(order.status),
+        "customer_name": order.customer_name or order.customer.username,
+        "total_amount": int(order.total_amount),
+        "special_instructions": order.special_instructions,
+        "created_at": order.created_at.isoformat(),
+        "items": [
+            {"name": item.menu_item.name, "quantity": item.quantity} for item in order.items.all()
+        ],
+    }
+
+
+def kitchen_snapshot():
+    """Snapshots of every order the kitchen still has to work on, oldest first."""
+    orders = live_orders().filter(status__in=ACTIVE_STATUSES).order_by("created_at")
+    return [order_snapshot(order) for order in orders]
+
+
+def publish_order_update(order):
+    """
+    Push the order's current state to the kitchen board and its tracking page
+    once the surrounding transaction commits.
+    """
+    snapshot = order_snapshot(order)
+    channels = [KITCHEN_CHANNEL, order_channel(order.id)]
+    transaction.on_commit(lambda: pubsub.publish(channels, snapshot))
+
+
+def transition_orders(orders, to_status, changed_by=None):
+    """
+    Move every order in `orders` that may legally go to `to_status` there with a
+    single UPDATE, stamping the status timestamp and writing one
+    OrderStatusChange per moved order. Orders in other statuses are skipped and
+    totals are never recalculated. Returns the number of orders moved.
+    """
+    if to_status not in dict(Order.STATUS_CHOICES):
+        raise ValueError(f"Unknown order status: {to_status}")
+
+    sources = [
+        status for status, targets in Order.STATUS_TRANSITIONS.items() if to_status in targets
+    ]
+    now = timezone.now()
+
+    with transaction.atomic():
+        current = dict(
+            orders.select_for_update()
+            .filter(status__in=sources)
+            .order_by()
+            .values_list("id", "status")
+        )
+        if not current:
+            return 0
+
+        changes = {"status": to_status, "updated_at": now}
+        timestamp_field = Order.STATUS_TIMESTAMP_FIELDS.get(to_status)
+        if timestamp_field:
+            changes[timestamp_field] = now
+        Order.objects.filter(id__in=current, status__in=sources).update(**changes)
+
+        OrderStatusChange.objects.bulk_create(
+            [
+                OrderStatusChange(
+                    order_id=order_id,
+                    from_status=from_status,
+                    to_status=to_status,
+                    changed_by=changed_by,
+                    changed_at=now,
+                )
+                for order_id, from_status in current.items()
+            ]
+        )
+
+        for order in live_orders().filter(id__in=current):
+            publish_order_update(order)
+
+        if to_status == "cancelled":
+            for order_id in current:
+                outbox.enqueue("order.cancelled", order_id=order_id)
+
+    return len(current)
@@ -0,0 +1,146 @@
+"""
+Transactional outbox for side effects of writes (e.g. an order being placed).
+
+Views call enqueue() inside their transaction.atomic() block, so the event row
+commits or rolls back together with the write that caused it. Handlers run
+after commit, either in a background worker thread started by on_commit or by
+`manage.py process_outbox`, with retries and at-least-once delivery.
+
+All handlers of one event run in a single transaction together with marking
+the event done, so a failed attempt leaves no partial effects behind.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Seconds a claimed event stays "processing" before another worker may retry it
+LEASE_SECONDS = 300
+# Seconds the background worker waits for new events before exiting
+WORKER_IDLE_SECONDS = 30
+
+_handlers = {}
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def handler(topic):
+    """Register a function called with the event payload for every `topic` event."""
+
+    def register(func):
+        _handlers.setdefault(topic, []).append(func)
+        return func
+
+    return register
+
+
+def enqueue(topic, **payload):
+    """
+    Queue an event. Must be called inside the transaction that makes the
+    change; the event is delivered only if that transaction commits.
+    """
+    event = OutboxEvent.objects.create(topic=topic, payload=payload)
+    transaction.on_commit(_dispatch)
+    return event
+
+
+def _dispatch():
+    """Deliver queued events according to settings.OUTBOX_DISPATCH."""
+    mode = getattr(settings, "OUTBOX_DISPATCH", "thread")
+    if mode == "inline":
+        process_pending()
+    elif mode == "thread":
+        _wake_worker()
+    # "off": left for `manage.py process_outbox`
+
+
+def _wake_worker():
+    global _worker
+    _wakeup.set()
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run_worker, name="outbox-worker", daemon=True)
+            _worker.start()
+
+
+def _run_worker():
+    global _worker
+    try:
+        while True:
+            if not _wakeup.wait(timeout=WORKER_IDLE_SECONDS):
+                with _worker_lock:
+                    if not _wakeup.is_set():
+                        _worker = None
+                        return
+            _wakeup.clear()
+            try:
+                process_pending()
+            except Exception:
+                logger.exception("Outbox worker failed to process events")
+    finally:
+        connections.close_all()
+
+
+def _due_filter(now):
+    stale = now - timedelta(seconds=LEASE_SECONDS)
+    return Q(status="pending", available_at__lte=now) | Q(status="processing", locked_at__lt=stale)
+
+
+def process_pending(limit=100):
+    """Deliver up to `limit` due events. Returns the number delivered successfully."""
+    now = timezone.now()
+    event_ids = list(
+        OutboxEvent.objects.filter(_due_filter(now))
+        .order_by("id")
+        .values_list("id", flat=True)[:limit]
+    )
+
+    delivered = 0
+    for event_id in event_ids:
+        # Claim the event; another worker may have taken it in the meantime
+        claimed = (
+            OutboxEvent.objects.filter(_due_filter(now), id=event_id).update(
+                status="processing",
+                locked_at=timezone.now(),
+                attempts=F("attempts") + 1,
+            )
+            == 1
+        )
+        if claimed and _deliver(OutboxEvent.objects.get(id=event_id)):
+            delivered += 1
+    return delivered
+
+
+def _deliver(event):
+    try:
+        with transaction.atomic():
+            for func in _handlers.get(event.topic, []):
+                func(event.payload)
+            OutboxEvent.objects.filter(id=event.id).update(
+                status="done", processed_at=timezone.now(), last_error=""
+            )
+        return True
+    except Exception as e:
+        logger.exception("Outbox event %s failed (attempt %s)", event, event.attempts)
+        max_attempts = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+        if event.attempts >= max_attempts:
+            status, available_at = "failed", event.available_at
+        else:
+            # Exponential backoff: 2s, 4s, 8s, ...
+            status = "pending"
+            available_at = timezone.now() + timedelta(seconds=2**event.attempts)
+        OutboxEvent.objects.filter(id=event.id).update(
+            status=status, available_at=available_at, last_error=str(e)
+        )
+        return False
@@ -0,0 +1,134 @@
+"""
+Publish/subscribe for live updates (kitchen board, order tracking).
+
+Publishers are ordinary sync code (views, outbox handlers); subscribers are
+async generators streaming Server-Sent Events, which needs an ASGI server
+(under WSGI each open page holds a worker thread). The backend is chosen with
+settings.PUBSUB_BACKEND (dotted path); the default in-process backend only
+reaches subscribers in the same process, so run a single ASGI worker or plug
+in a shared backend when scaling out. `manage.py check` warns when it is
+used with settings.WEB_CONCURRENCY above 1.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import checks
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "restaurant.pubsub.InProcessBackend"
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+class Subscription:
+    """Messages for a set of channels, consumed from one event loop."""
+
+    def __init__(self, backend, channels, maxsize=100):
+        self.backend = backend
+        self.channels = list(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, message):
+        """Called on self.loop; drops messages for a consumer that fell behind."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout=None):
+        """Next message, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class BaseBackend:
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channels):
+        """Return a Subscription; must be called from the consuming event loop."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBackend(BaseBackend):
+    """Fan out to subscribers living in this process (thread-safe publish)."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # Event loop already closed; the subscriber is gone
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, "PUBSUB_BACKEND", DEFAULT_BACKEND)
+                _backend = import_string(path)()
+    return _backend
+
+
+def publish(channels, message):
+    backend = get_backend()
+    for channel in channels:
+        backend.publish(channel, message)
+
+
+def subscribe(channels):
+    return get_backend().subscribe(channels)
+
+
+@checks.register()
+def check_backend(app_configs, **kwargs):
+    backend = import_string(getattr(settings, "PUBSUB_BACKEND", DEFAULT_BACKEND))
+    workers = getattr(settings, "WEB_CONCURRENCY", 1)
+    if workers > 1 and issubclass(backend, InProcessBackend):
+        return [
+            checks.Warning(
+                f"PUBSUB_BACKEND is in-process but WEB_CONCURRENCY is {workers}: "
+                "live order updates only reach pages streamed by the worker "
+                "that published them.",
+                hint="Run a single ASGI worker or set PUBSUB_BACKEND to a shared backend.",
+                id="restaurant.W001",
+            )
+        ]
+    return []
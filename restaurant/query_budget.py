@@ -0,0 +1,295 @@
+"""
+Query budgets: a view's query count must not grow with the amount of data.
+
+Every GET view in restaurant/urls.py is rendered against fixtures at two
+scales (say 5 and 500 rows per list). Any view that runs more queries at the
+larger scale has an N+1 somewhere, usually a template loop touching a
+related field, and is reported with a diff of its normalized SQL.
+
+    python manage.py check_query_budgets
+
+The helpers (capture_queries, query_diff) work in tests as well; see
+restaurant/tests/test_query_budgets.py.
+"""
+
+import difflib
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+
+from . import leaderboards, news, search
+from .datagen import DataGenerator, muted_signals
+from .models import Cart, CartItem, MenuItem, NewsFeed, Order
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """How to request one view: who is logged in, URL kwargs and POST data."""
+
+    role: str = None  # None, "customer" or "staff"
+    kwargs: object = None  # fixtures -> URL kwargs
+    data: object = None  # fixtures -> POST data; GET when None
+    params: dict = None  # GET query string
+
+
+# A feed cursor newer than every post: feeds_more returns the first page
+BEFORE_ALL_NEWS = news.encode_cursor(datetime.fromisoformat("2100-01-01T00:00+00:00"), 0)
+
+# View name -> why it is not budgeted. Every other URL in restaurant/urls.py
+# needs an entry in SCENARIOS.
+EXCLUDED_VIEWS = {
+    "logout": "logs the client out",
+    "order_stream": "Server-Sent Events stream, never finishes",
+    "kitchen_stream": "Server-Sent Events stream, never finishes",
+}
+
+SCENARIOS = {
+    "index": Scenario(),
+    "feeds": Scenario(),
+    "feeds_more": Scenario(params={"cursor": BEFORE_ALL_NEWS}),
+    "feed_detail": Scenario(kwargs=lambda f: {"news_id": f.news_id}),
+    "menu": Scenario("customer"),
+    "menu_item_detail": Scenario(kwargs=lambda f: {"item_id": f.item_id}),
+    "place_order": Scenario("customer"),
+    "order_history": Scenario("customer"),
+    "redeem_discount": Scenario("customer"),
+    "redeem_reward": Scenario("customer"),
+    "signup": Scenario(),
+    "login": Scenario(),
+    "profile": Scenario("customer"),
+    "admin_reports": Scenario("staff"),
+    "user_reports": Scenario("staff"),
+    "sales_reports": Scenario("staff"),
+    "report_widget": Scenario(
+        "staff",
+        kwargs=lambda f: {"report": "sales", "widget": "sales_series"},
+        params={"type": "monthly"},
+    ),
+    "reports_menu": Scenario("staff"),
+    "performance_report": Scenario("staff"),
+    "metrics": Scenario("staff"),
+    "search": Scenario(params={"q": "bo"}),
+    "menu_suggest": Scenario(params={"q": "bo"}),
+    "cart_view": Scenario("customer"),
+    "add_to_cart": Scenario(
+        "customer",
+        kwargs=lambda f: {"item_id": f.item_id},
+        data=lambda f: {"quantity": 1},
+    ),
+    "update_cart_item": Scenario(
+        "customer",
+        kwargs=lambda f: {"item_id": f.cart_item_ids[0]},
+        data=lambda f: {"quantity": 2},
+    ),
+    "remove_from_cart": Scenario(
+        "customer",
+        kwargs=lambda f: {"item_id": f.cart_item_ids[-1]},
+        data=lambda f: {},
+    ),
+    "checkout": Scenario("customer"),
+    "order_confirmation": Scenario("customer", kwargs=lambda f: {"order_id": f.order_id}),
+    "order_tracking": Scenario("customer", kwargs=lambda f: {"order_id": f.order_id}),
+    "kitchen_board": Scenario("staff"),
+    "kitchen_update_status": Scenario(
+        "staff",
+        kwargs=lambda f: {"order_id": f.pending_order_id},
+        data=lambda f: {"status": "confirmed"},
+    ),
+    "kitchen_bulk_update_status": Scenario(
+        "staff", data=lambda f: {"from_status": "confirmed", "status": "preparing"}
+    ),
+}
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(\.\d+)?\b"), "?"),
+    (re.compile(r"\((\?(, )?)+\)"), "(...)"),
+]
+
+
+def normalize(sql):
+    """SQL with literals and IN lists collapsed, so repeated shapes compare equal."""
+    for pattern, replacement in _LITERALS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def capture_queries(func, using=DEFAULT_DB_ALIAS):
+    """Call func() and return (result, [sql, ...]) for the queries it ran."""
+    with CaptureQueriesContext(connections[using]) as captured:
+        result = func()
+    return result, [query["sql"] for query in captured.captured_queries]
+
+
+def _collapse(queries, max_block=8):
+    """
+    Normalized statements with repeats folded: a run of the same statement, or
+    of the same group of up to `max_block` statements (a loop body), is shown
+    once prefixed with its repeat count.
+    """
+    sqls = [normalize(q) for q in queries]
+    lines = []
+    i = 0
+    while i < len(sqls):
+        best_size, best_count = 1, 1
+        for size in range(1, max_block + 1):
+            block = sqls[i : i + size]
+            count = 1
+            while sqls[i + count * size : i + (count + 1) * size] == block:
+                count += 1
+            if count > 1 and count * size > best_count * best_size:
+                best_size, best_count = size, count
+        block = sqls[i : i + best_size]
+        if best_count > 1:
+            lines.extend(f"[x{best_count}] {sql}" for sql in block)
+        else:
+            lines.extend(block)
+        i += best_size * best_count
+    return lines
+
+
+def query_diff(small, large, small_label="small", large_label="large"):
+    """Readable unified diff between two lists of captured SQL."""
+    return "\n".join(
+        difflib.unified_diff(
+            _collapse(small),
+            _collapse(large),
+            fromfile=small_label,
+            tofile=large_label,
+            lineterm="",
+        )
+    )
+
+
+@dataclass
+class Fixtures:
+    customer: object
+    staff: object
+    item_id: int
+    news_id: int
+    order_id: int
+    pending_order_id: int
+    cart_item_ids: list
+
+
+@dataclass
+class Result:
+    view: str
+    path: str
+    queries: dict = field(default_factory=dict)  # scale -> [sql, ...]
+    status: dict = field(default_factory=dict)  # scale -> HTTP status
+
+    @property
+    def counts(self):
+        return {scale: len(queries) for scale, queries in self.queries.items()}
+
+    @property
+    def passed(self):
+        counts = list(self.counts.values())
+        return all(count <= counts[0] for count in counts)
+
+
+def build_fixtures(rows, seed=42):
+    """
+    `rows` menu items, customers, orders, news posts and redemptions, plus a
+    regular customer owning `rows` orders, redemptions and cart lines. The
+    regular's latest order is pending, for the kitchen scenarios.
+    """
+    generator = DataGenerator(seed=seed)
+    with muted_signals():
+        generator.catalog(rows)
+        generator.users(rows, prefix="budget_customer_")
+        generator.orders(rows)
+        generator.users(1, prefix="budget_regular_")
+        generator.orders(rows)
+        generator.redemptions(rows)
+    leaderboards.rebuild()
+    leaderboards.invalidate()  # Rolled back, so on_commit never drops it
+    search.rebuild()
+
+    customer = generator.customers[0][0]
+    NewsFeed.objects.bulk_create(
+        [NewsFeed(title=f"Tin {i}", content="Nội dung") for i in range(rows)]
+    )
+    news.invalidate()
+    cart = Cart.objects.create(user_id=customer)
+    CartItem.objects.bulk_create(
+        [
+            CartItem(
+                cart=cart,
+                menu_item_id=item_id,
+                quantity=1,
+                unit_price=price,
+                price_version_id=version_id,
+            )
+            for item_id, price, version_id in MenuItem.objects.filter(
+                is_available=True
+            ).values_list("id", "price", "price_version_id")[:rows]
+        ]
+    )
+
+    orders = Order.objects.filter(customer_id=customer).order_by("-created_at")
+    pending_order_id = orders.values_list("id", flat=True).first()
+    Order.objects.filter(id=pending_order_id).update(status="pending")
+
+    staff = User.objects.create_user("budget_staff", is_staff=True)
+    return Fixtures(
+        customer=User.objects.get(id=customer),
+        staff=staff,
+        item_id=MenuItem.objects.filter(is_available=True).first().id,
+        news_id=NewsFeed.objects.filter(is_active=True).first().id,
+        order_id=orders.last().id,
+        pending_order_id=pending_order_id,
+        cart_item_ids=list(cart.items.order_by("id").values_list("menu_item_id", flat=True)),
+    )
+
+
+def budgeted_views():
+    """URL names from restaurant/urls.py, checked against SCENARIOS/EXCLUDED_VIEWS."""
+    names = {name for name in get_resolver("restaurant.urls").reverse_dict if isinstance(name, str)}
+    unknown = names - set(SCENARIOS) - set(EXCLUDED_VIEWS)
+    if unknown:
+        raise LookupError(
+            "No query budget scenario for: "
+            + ", ".join(sorted(unknown))
+            + " (add them to SCENARIOS or EXCLUDED_VIEWS in restaurant/query_budget.py)"
+        )
+    return sorted(names & set(SCENARIOS))
+
+
+def run_budgets(scales=(5, 500), views=None, seed=42):
+    """
+    Render each view at every scale, each scale inside a transaction that is
+    rolled back afterwards. Returns a Result per view.
+    """
+    results = {}
+    for scale in scales:
+        with transaction.atomic():
+            fixtures = build_fixtures(scale, seed=seed)
+            clients = {None: Client()}
+            for role in ("customer", "staff"):
+                clients[role] = Client()
+                clients[role].force_login(getattr(fixtures, role))
+
+            for view in views or budgeted_views():
+                scenario = SCENARIOS[view]
+                client = clients[scenario.role]
+                path = reverse(view, kwargs=scenario.kwargs(fixtures) if scenario.kwargs else None)
+                if scenario.data is None:
+                    request = partial(client.get, path, scenario.params)
+                else:
+                    request = partial(client.post, path, scenario.data(fixtures))
+                response, queries = capture_queries(request)
+                result = results.setdefault(view, Result(view, path))
+                result.queries[scale] = queries
+                result.status[scale] = response.status_code
+
+            transaction.set_rollback(True)
+    return list(results.values())
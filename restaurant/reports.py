@@ -0,0 +1,241 @@
+"""
+Widgets of the staff report dashboards (admin_reports, sales_reports).
+
+Each widget runs its own queries and returns plain data (lists and dicts,
+never a lazy queryset), ready to be written as JSON. The report pages are
+shells: their widgets are fetched from the report_widget view, one JSON
+endpoint each, all at once.
+
+    widgets = dashboard("sales", *date_range(request.GET))
+    result, failure = dashboards.run_widget("summary", widgets["summary"])
+
+ReportJSONEncoder writes Decimal sums as JSON numbers, not strings.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import ExtractHour, TruncDate, TruncMonth
+from django.utils import timezone
+
+from . import leaderboards
+from .models import Order
+
+# Discount above this share of the total: the VIP 10% rate, else the 5% one
+TEN_PERCENT_THRESHOLD = Decimal("0.06")
+
+# Seconds a browser may reuse a widget before fetching it again
+WIDGET_MAX_AGE = 60
+
+
+class ReportJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, with Decimals as numbers (it makes them strings)."""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return int(o) if o == o.to_integral_value() else float(o)
+        return super().default(o)
+
+
+def date_range(params):
+    """(report type, start date, end date) of a report's filter form."""
+    report_type = params.get("type", "daily")
+    start_date = params.get("start_date")
+    end_date = params.get("end_date")
+
+    today = timezone.now().date()
+    if not start_date:
+        if report_type == "daily":
+            start_date = today
+        elif report_type == "monthly":
+            start_date = today.replace(day=1)
+        else:  # annual
+            start_date = today.replace(month=1, day=1)
+    else:
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+
+    if not end_date:
+        end_date = today
+    else:
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+    return report_type, start_date, end_date
+
+
+def orders_between(start, end):
+    """Orders placed between the dates `start` and `end`, cancelled ones excluded."""
+    return Order.objects.filter(created_at__date__gte=start, created_at__date__lte=end).exclude(
+        status="cancelled"
+    )
+
+
+def summary(orders):
+    totals = orders.aggregate(
+        total_orders=Count("id"),
+        total_revenue=Sum("total_amount"),
+        total_discount=Sum("discount_applied"),
+        total_points_earned=Sum("points_earned"),
+        average_order_value=Avg("total_amount"),
+        discounted_orders_count=Count("id", filter=Q(discount_applied__gt=0)),
+    )
+    for key in (
+        "total_revenue",
+        "total_discount",
+        "total_points_earned",
+        "average_order_value",
+    ):
+        totals[key] = totals[key] or 0
+    totals["sales_before_discount"] = totals["total_revenue"] + totals["total_discount"]
+    totals["discount_usage_rate"] = (
+        (totals["discounted_orders_count"] / totals["total_orders"] * 100)
+        if totals["total_orders"] > 0
+        else 0
+    )
+    return totals
+
+
+def vip(orders):
+    """Orders of VIP customers and their revenue."""
+    totals = orders.filter(customer__profile__is_vip=True).aggregate(
+        vip_orders_count=Count("id"), vip_revenue=Sum("total_amount")
+    )
+    totals["vip_revenue"] = totals["vip_revenue"] or 0
+    return totals
+
+
+def discount_breakdown(orders):
+    """Orders with the 5% and with the 10% (VIP) discount, and the amounts."""
+    threshold = F("total_amount") * TEN_PERCENT_THRESHOLD
+    buckets = {
+        "5_percent": Q(discount_applied__gt=0, discount_applied__lte=threshold),
+        "10_percent": Q(discount_applied__gt=threshold),
+    }
+    totals = orders.aggregate(
+        five_count=Count("id", filter=buckets["5_percent"]),
+        five_amount=Sum("discount_applied", filter=buckets["5_percent"]),
+        ten_count=Count("id", filter=buckets["10_percent"]),
+        ten_amount=Sum("discount_applied", filter=buckets["10_percent"]),
+    )
+    return {
+        "5_percent": {
+            "count": totals["five_count"],
+            "amount": totals["five_amount"] or 0,
+        },
+        "10_percent": {
+            "count": totals["ten_count"],
+            "amount": totals["ten_amount"] or 0,
+        },
+    }
+
+
+def payment_methods(orders):
+    return list(
+        orders.values("payment_method")
+        .annotate(count=Count("id"), revenue=Sum("total_amount"))
+        .order_by("-count")
+    )
+
+
+def time_series(orders, report_type):
+    """Orders and revenue per hour (daily), day (monthly) or month (annual)."""
+    if report_type == "daily":
+        period, key = ExtractHour("created_at"), "hour"
+    elif report_type == "monthly":
+        period, key = TruncDate("created_at"), "date"
+    else:  # annual
+        period, key = TruncMonth("created_at"), "month"
+    return list(
+        orders.annotate(**{key: period})
+        .values(key)
+        .annotate(orders_count=Count("id"), revenue=Sum("total_amount"))
+        .order_by(key)
+    )
+
+
+def top_customers(orders, limit=10):
+    return list(
+        orders.values("customer__username", "customer__profile__points")
+        .annotate(order_count=Count("id"), total_spent=Sum("total_amount"))
+        .order_by("-total_spent")[:limit]
+    )
+
+
+def _sales_row(period, row):
+    sales = row["sales"] or 0 if row else 0
+    discount = row["discount"] or 0 if row else 0
+    return {
+        "period": period,
+        "orders": row["orders"] if row else 0,
+        "sales": sales,
+        "discount": discount,
+        "sales_before_discount": sales + discount,
+    }
+
+
+def sales_series(orders, report_type, start, end):
+    """
+    Orders, sales and discount per hour (daily), per day from `start` to `end`
+    (monthly) or per month (annual); hours and days without orders included.
+    """
+    if report_type == "daily":
+        period, key = ExtractHour("created_at"), "hour"
+    elif report_type == "monthly":
+        period, key = TruncDate("created_at"), "date"
+    else:  # annual
+        period, key = TruncMonth("created_at"), "month"
+    rows = {
+        row[key]: row
+        for row in orders.annotate(**{key: period})
+        .values(key)
+        .annotate(
+            orders=Count("id"),
+            sales=Sum("total_amount"),
+            discount=Sum("discount_applied"),
+        )
+        .order_by(key)
+    }
+
+    if report_type == "daily":
+        return [_sales_row(f"{hour}:00", rows.get(hour)) for hour in range(24)]
+    if report_type == "monthly":
+        days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+        return [
+            {"date": day, **_sales_row(day.strftime("%d/%m/%Y"), rows.get(day))} for day in days
+        ]
+    return [
+        {"date": month, **_sales_row(month.strftime("%B %Y"), row)} for month, row in rows.items()
+    ]
+
+
+# Widgets of each dashboard, in the order its page shows them
+DASHBOARDS = {
+    "admin": (
+        "summary",
+        "vip",
+        "top_items",
+        "category_sales",
+        "payment_methods",
+        "discount_breakdown",
+        "top_customers",
+        "time_series",
+    ),
+    "sales": ("summary", "sales_series", "discount_breakdown", "payment_methods"),
+}
+
+
+def dashboard(report, report_type, start, end):
+    """{name: widget} of the `report` dashboard (a key of DASHBOARDS)."""
+    orders = orders_between(start, end)
+    widgets = {
+        "summary": lambda: summary(orders),
+        "vip": lambda: vip(orders),
+        "discount_breakdown": lambda: discount_breakdown(orders),
+        "top_items": lambda: leaderboards.top_items(start, end),
+        "category_sales": lambda: leaderboards.category_sales(start, end),
+        "payment_methods": lambda: payment_methods(orders),
+        "time_series": lambda: time_series(orders, report_type),
+        "top_customers": lambda: top_customers(orders),
+        "sales_series": lambda: sales_series(orders, report_type, start, end),
+    }
+    return {name: widgets[name] for name in DASHBOARDS[report]}
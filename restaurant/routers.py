@@ -0,0 +1,174 @@
+"""
+Read-replica routing for report and catalog pages.
+
+ReplicaRoutingMiddleware picks, per request, whether reads may go to
+settings.REPLICA_DATABASE: GET requests to settings.REPLICA_VIEWS, and to
+settings.REPLICA_ANONYMOUS_VIEWS for anonymous visitors. ReplicaRouter then
+sends those reads there; everything else, all writes and any read inside a
+transaction stay on the primary ("default").
+
+A request that writes (runs an INSERT, UPDATE or DELETE on the primary, other
+than on the PRIMARY_ONLY_MODELS tables) pins its session to the primary for
+settings.REPLICA_STICKY_SECONDS, so a customer sees their new order in
+order_history even while the replica lags behind.
+
+    DATABASE_ROUTERS = ["restaurant.routers.ReplicaRouter"]
+    MIDDLEWARE = [..., "restaurant.routers.ReplicaRoutingMiddleware", ...]
+"""
+
+import contextvars
+import re
+import time
+from contextlib import ExitStack
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import receiver
+
+# Always read from the primary: the session says whether the visitor is pinned,
+# and the cart processor creates carts on plain page views
+PRIMARY_ONLY_MODELS = {"sessions.session", "restaurant.cart", "restaurant.cartitem"}
+
+STICKY_SESSION_KEY = "_replica_pinned_until"
+
+# The table an INSERT, UPDATE or DELETE statement writes to
+WRITE_STATEMENT = re.compile(
+    r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+[`\"]?(\w+)", re.IGNORECASE
+)
+
+_state = contextvars.ContextVar("replica_routing", default=None)
+_replica_reads = True
+
+
+class RoutingState:
+    """Where the request reads from; also the execute_wrapper noticing writes."""
+
+    def __init__(self):
+        self.read_alias = None
+        self.wrote = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.wrote:
+            match = WRITE_STATEMENT.match(sql)
+            if match and match.group(1) not in _primary_only_tables():
+                self.wrote = True
+        return execute(sql, params, many, context)
+
+
+@lru_cache(maxsize=None)
+def _primary_only_tables():
+    return frozenset(apps.get_model(label)._meta.db_table for label in PRIMARY_ONLY_MODELS)
+
+
+@receiver(setting_changed)
+def _clear_primary_only_tables(**kwargs):
+    # A test swapping INSTALLED_APPS may change the models and their tables
+    _primary_only_tables.cache_clear()
+
+
+def _watch_writes(stack, state):
+    stack.enter_context(connections[DEFAULT_DB_ALIAS].execute_wrapper(state))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.read_alias is None or not _replica_reads:
+            return None
+        if model._meta.label_lower in PRIMARY_ONLY_MODELS:
+            return None
+        # Reads in a transaction must see its own writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.read_alias
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or objects loaded from the replica would be saved back there
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # The replica holds the same rows as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == getattr(settings, "REPLICA_DATABASE", None):
+            return False  # Replicated from the primary, never migrated directly
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Goes after SessionMiddleware and AuthenticationMiddleware."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.alias = getattr(settings, "REPLICA_DATABASE", None)
+        if not self.alias:
+            raise MiddlewareNotUsed
+        self.views = set(getattr(settings, "REPLICA_VIEWS", ()))
+        self.anonymous_views = set(getattr(settings, "REPLICA_ANONYMOUS_VIEWS", ()))
+        self.sticky_seconds = getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            with ExitStack() as stack:
+                _watch_writes(stack, state)
+                response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        # The async ORM's threads copy this context, so the router sees `state`
+        state = RoutingState()
+        token = _state.set(state)
+        # The connection of the thread the request's ORM calls run in
+        stack = ExitStack()
+        try:
+            await sync_to_async(_watch_writes)(stack, state)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _state.reset(token)
+        if state.wrote:
+            await sync_to_async(self.pin)(request)  # May load the session
+        return response
+
+    def pin(self, request):
+        request.session[STICKY_SESSION_KEY] = time.time() + self.sticky_seconds
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        view_name = request.resolver_match.view_name
+        if view_name not in self.views and not (
+            view_name in self.anonymous_views and not request.user.is_authenticated
+        ):
+            return None
+        if request.session.get(STICKY_SESSION_KEY, 0) > time.time():
+            return None
+        _state.get().read_alias = self.alias
+        return None
+
+
+def use_primary_only():
+    """
+    Stop reading from the replica in this process, for commands that swap the
+    primary for a throwaway test database (the replica still is the real one).
+    """
+    global _replica_reads
+    _replica_reads = False
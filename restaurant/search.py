@@ -0,0 +1,217 @@
+"""
+Full-text search over menu items, news posts and customers.
+
+Every indexed object has a SearchDocument holding its words folded to plain
+ASCII ("Bò Nhúng Giấm" -> "bo nhung giam"), kept up to date by the signal
+receivers below. The database indexes them: an FTS5 table on SQLite and a
+GIN index on to_tsvector('simple', text) on PostgreSQL (both created by
+migration 0013). Other databases fall back to a LIKE scan.
+
+Every word of a query matches as a prefix, so "bo nhu" finds "Bò Nhúng":
+
+    search("bo nhung", kinds=["menu_item"])      # SearchDocuments, best first
+    search_ids("nguyen", "customer")             # object ids, for querysets
+
+Writes that skip save() (queryset.update(), bulk loads) are picked up by
+`manage.py rebuild_search_index`. On SQLite, a migration that rebuilds the
+restaurant_searchdocument table drops the FTS5 triggers; recreate them from
+migration 0013 if that ever happens.
+"""
+
+import re
+import unicodedata
+
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, MenuItem, NewsFeed, SearchDocument
+
+FTS_TABLE = "restaurant_searchdocument_fts"
+# Words of a query that are used; the rest are ignored
+MAX_QUERY_WORDS = 8
+DEFAULT_LIMIT = 20
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text):
+    """Lowercase ASCII: diacritics removed, đ -> d."""
+    text = (text or "").replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def words(*parts):
+    """Folded words of all `parts` (None is skipped)."""
+    return _WORD_RE.findall(fold(" ".join(part or "" for part in parts)))
+
+
+# ----------------------------------------------------------------------
+# Documents
+# ----------------------------------------------------------------------
+
+
+def _menu_item_document(item):
+    return {
+        "title": item.name,
+        "text": words(item.name, item.category.name, item.description),
+        "is_public": item.is_available,
+    }
+
+
+def _news_document(news):
+    return {
+        "title": news.title,
+        "text": words(news.title, news.content),
+        "is_public": news.is_visible(),  # news.publish() keeps it current
+    }
+
+
+def _customer_document(user):
+    return {
+        "title": user.username,
+        "text": words(user.username, user.first_name, user.last_name, user.email),
+        "is_public": False,
+    }
+
+
+# kind -> (model, document builder, queryset for rebuild())
+SOURCES = {
+    "menu_item": (
+        MenuItem,
+        _menu_item_document,
+        lambda: MenuItem.objects.select_related("category"),
+    ),
+    "news": (NewsFeed, _news_document, lambda: NewsFeed.objects.all()),
+    "customer": (User, _customer_document, lambda: User.objects.all()),
+}
+_KINDS = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+
+def index_object(obj):
+    """Create or refresh the document of a MenuItem, NewsFeed or User."""
+    kind = _KINDS[type(obj)]
+    document = SOURCES[kind][1](obj)
+    document["text"] = " ".join(document["text"])
+    SearchDocument.objects.update_or_create(kind=kind, object_id=obj.pk, defaults=document)
+
+
+def remove_object(obj):
+    SearchDocument.objects.filter(kind=_KINDS[type(obj)], object_id=obj.pk).delete()
+
+
+def sync_news_visibility(visible_ids):
+    """Make the news documents public for `visible_ids` and private otherwise."""
+    visible_ids = list(visible_ids)
+    documents = SearchDocument.objects.filter(kind="news")
+    documents.filter(object_id__in=visible_ids, is_public=False).update(is_public=True)
+    documents.filter(is_public=True).exclude(object_id__in=visible_ids).update(is_public=False)
+
+
+def rebuild(batch_size=5000):
+    """Re-index everything from scratch. Returns the number of documents."""
+    documents = []
+    for kind, (_, build, queryset) in SOURCES.items():
+        for obj in queryset().iterator():
+            document = build(obj)
+            document["text"] = " ".join(document["text"])
+            documents.append(SearchDocument(kind=kind, object_id=obj.pk, **document))
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+    return len(documents)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_save, sender=NewsFeed)
+@receiver(post_save, sender=User)
+def index_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return  # Logins
+    index_object(instance)
+
+
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_delete, sender=NewsFeed)
+@receiver(post_delete, sender=User)
+def remove_deleted(sender, instance, **kwargs):
+    remove_object(instance)
+
+
+@receiver(post_save, sender=Category)
+def index_category_items(sender, instance, created, **kwargs):
+    """Item documents include the category name."""
+    if not created:
+        for item in instance.items.select_related("category"):
+            index_object(item)
+
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+
+
+def _sqlite_matches(cursor, column, terms, where, params, limit):
+    match = " ".join(f'"{term}"*' for term in terms)
+    cursor.execute(
+        f"SELECT d.{column} FROM {FTS_TABLE}"
+        f" JOIN restaurant_searchdocument d ON d.id = {FTS_TABLE}.rowid"
+        f" WHERE {FTS_TABLE} MATCH %s{where} ORDER BY {FTS_TABLE}.rank LIMIT %s",
+        [match, *params, -1 if limit is None else limit],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _postgres_matches(cursor, column, terms, where, params, limit):
+    query = " & ".join(f"{term}:*" for term in terms)
+    cursor.execute(
+        f"SELECT d.{column} FROM restaurant_searchdocument d"
+        " WHERE to_tsvector('simple', d.text) @@ to_tsquery('simple', %s)"
+        f"{where} ORDER BY ts_rank(to_tsvector('simple', d.text),"
+        " to_tsquery('simple', %s)) DESC, d.id LIMIT %s",
+        [query, *params, query, limit],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _matches(query, kinds, public_only, limit, column="id"):
+    """
+    `column` (id or object_id) of the documents matching every word of `query`
+    as a prefix, best first.
+    """
+    terms = words(query)[:MAX_QUERY_WORDS]
+    if not terms:
+        return []
+    kinds = list(kinds or SOURCES)
+    where = " AND d.kind IN (" + ", ".join(["%s"] * len(kinds)) + ")"
+    if public_only:
+        where += " AND d.is_public"
+
+    using = router.db_for_read(SearchDocument)
+    connection = connections[using]
+    if connection.vendor in ("sqlite", "postgresql"):
+        matches = _sqlite_matches if connection.vendor == "sqlite" else _postgres_matches
+        with connection.cursor() as cursor:
+            return matches(cursor, column, terms, where, kinds, limit)
+
+    # No full-text index: scan
+    documents = SearchDocument.objects.using(using).filter(kind__in=kinds)
+    if public_only:
+        documents = documents.filter(is_public=True)
+    for term in terms:
+        documents = documents.filter(text__contains=term)
+    return list(documents.order_by("id").values_list(column, flat=True)[:limit])
+
+
+def search(query, kinds=None, public_only=True, limit=DEFAULT_LIMIT):
+    """SearchDocuments matching `query`, best first."""
+    ids = _matches(query, kinds, public_only, limit)
+    documents = SearchDocument.objects.in_bulk(ids)
+    return [documents[id] for id in ids if id in documents]
+
+
+def search_ids(query, kind, limit=None):
+    """Ids of the `kind` objects matching `query`, public or not."""
+    return _matches(query, [kind], public_only=False, limit=limit, column="object_id")
@@ -0,0 +1,85 @@
+/*
+ * Report dashboards (admin_reports.html, sales_reports.html). Every widget is
+ * fetched from its own JSON endpoint (restaurant/reports.py), all at once, and
+ * each section is drawn as soon as the widgets it shows have arrived, so a
+ * slow widget holds back only its own section.
+ *
+ * The page lists the endpoints as {name: url} in a json_script element with
+ * the id "widget-urls".
+ */
+const ReportWidgets = (() => {
+    const urls = JSON.parse(document.getElementById('widget-urls').textContent);
+    const widgets = {};
+    for (const [name, url] of Object.entries(urls)) {
+        widgets[name] = fetch(url, {headers: {'Accept': 'application/json'}})
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Widget ${name}: HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(body => body.data);
+    }
+
+    const formats = {
+        number: value => Number(value).toLocaleString('vi-VN'),
+        money: value => Math.round(value).toLocaleString('vi-VN') + ' ₫',
+        percent: value => Number(value).toLocaleString('vi-VN', {maximumFractionDigits: 1}) + '%',
+    };
+
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value ?? '';
+        return div.innerHTML;
+    }
+
+    function percentOf(part, whole) {
+        return whole > 0 ? Math.round(part / whole * 100) + '%' : '0%';
+    }
+
+    // One CSV line; cells with a comma, quote or newline are quoted
+    function csvRow(...cells) {
+        return cells.map(cell => {
+            const text = String(cell ?? '');
+            return /[",\n]/.test(text) ? '"' + text.replace(/"/g, '""') + '"' : text;
+        }).join(',') + '\n';
+    }
+
+    // The data of the widgets `names`, in that order
+    function when(...names) {
+        return Promise.all(names.map(name => widgets[name]));
+    }
+
+    // Elements with data-widget="<name>" and data-field (summary cards)
+    function fill(name) {
+        const elements = document.querySelectorAll(`[data-widget="${name}"][data-field]`);
+        widgets[name].then(
+            data => elements.forEach(element => {
+                element.textContent = formats[element.dataset.format || 'number'](data[element.dataset.field]);
+            }),
+            () => elements.forEach(element => {
+                element.textContent = '—';
+                element.classList.add('widget-failed');
+            }),
+        );
+    }
+
+    // Section #id: render(...data) as its HTML, then after(...data) (charts)
+    function section(id, names, render, after) {
+        const element = document.getElementById(id);
+        when(...names).then(
+            values => {
+                element.innerHTML = render(...values);
+                if (after) {
+                    after(...values);
+                }
+            },
+            error => {
+                console.error(error);
+                element.innerHTML = '<div class="no-data widget-failed">Không tải được dữ liệu, vui lòng tải lại trang</div>';
+            },
+        );
+    }
+
+    return {when, fill, section, formats, escapeHtml, percentOf, csvRow};
+})();
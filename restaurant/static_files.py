@@ -0,0 +1,39 @@
+"""
+WhiteNoise for an async middleware stack.
+
+WhiteNoiseMiddleware is sync-only, so under ASGI Django runs every
+middleware below it and the view in a worker thread, and an async view then
+waits for its queries with that thread blocked. This subclass also runs
+natively async: static files are still served from a thread, everything else
+goes straight on to the next middleware.
+
+    MIDDLEWARE = [..., "restaurant.static_files.WhiteNoiseMiddleware", ...]
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise import middleware
+
+
+class WhiteNoiseMiddleware(middleware.WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=middleware.settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            # Opens and stats the file
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,76 @@
+"""
+Template preloading.
+
+The cached loader (TEMPLATES in settings.py) compiles each template once per
+process, on the first request that renders it. preload() compiles every
+template of this project up front instead, so no visitor waits for base.html
+to be parsed and a template that does not compile fails the deploy rather
+than one page:
+
+    TEMPLATE_PRELOAD=1 gunicorn restaurant_site.wsgi    # wsgi.py preloads
+    python manage.py check --deploy                     # reports broken ones
+
+Templates shipped by Django and third-party apps are left to load lazily.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+
+def _template_dirs(engine):
+    for loader in engine.template_loaders:
+        # The cached loader yields the directories of the loaders it wraps
+        yield from loader.get_dirs()
+
+
+def live_templates(engine):
+    """Names of the templates found in this project's template directories."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    names = set()
+    for directory in _template_dirs(engine):
+        directory = Path(directory).resolve()
+        inside = directory == base_dir or base_dir in directory.parents
+        if not inside or "site-packages" in directory.parts:
+            continue
+        names.update(path.relative_to(directory).as_posix() for path in directory.rglob("*.html"))
+    return sorted(names)
+
+
+def preload(raise_errors=False):
+    """
+    Compile every live template into the cached loader. Returns {name: error}
+    for those that failed, or raises ImproperlyConfigured if `raise_errors`.
+    """
+    errors = {}
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in live_templates(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                errors[name] = error
+    if errors and raise_errors:
+        raise ImproperlyConfigured(
+            "Templates failed to compile: "
+            + "; ".join(f"{name}: {error}" for name, error in errors.items())
+        )
+    return errors
+
+
+# Deploy only: compiling every template would slow down every manage.py command
+@checks.register(checks.Tags.templates, deploy=True)
+def check_templates(app_configs, **kwargs):
+    return [
+        checks.Error(
+            f"Template {name} does not compile: {error}",
+            obj=name,
+            id="restaurant.E001",
+        )
+        for name, error in preload().items()
+    ]
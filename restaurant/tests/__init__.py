@@ -0,0 +1,7 @@
+from django.conf import settings
+
+# Tests run with DEBUG off, but the hashed names only exist after collectstatic
+UNHASHED_STATIC = {
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
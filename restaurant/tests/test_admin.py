@@ -0,0 +1,142 @@
+"""Order status changes made from the Django admin."""
+
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.forms.models import model_to_dict
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from restaurant import leaderboards
+from restaurant.admin import OrderAdmin, OrderAdminForm, _transition_action
+from restaurant.models import (
+    Category,
+    ItemSalesDay,
+    MenuItem,
+    Order,
+    OrderItem,
+    OrderStatusChange,
+    OutboxEvent,
+)
+from restaurant.tests import UNHASHED_STATIC
+
+
+class OrderAdminTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", is_staff=True)
+        self.customer = User.objects.create_user("customer")
+        self.model_admin = OrderAdmin(Order, admin.site)
+        self.request = RequestFactory().post("/")
+        self.request.user = self.staff
+
+    def change_status(self, order, status):
+        form = OrderAdminForm(data={**model_to_dict(order), "status": status}, instance=order)
+        self.assertTrue(form.is_valid(), form.errors)
+        obj = form.save(commit=False)
+        self.model_admin.save_model(self.request, obj, form, change=True)
+        return obj
+
+    def test_cancel_from_change_form(self):
+        order = Order.objects.create(customer=self.customer)
+        obj = self.change_status(order, "cancelled")
+
+        self.assertEqual(obj.status, "cancelled")
+        self.assertIsNotNone(obj.cancelled_at)
+        change = OrderStatusChange.objects.get(order=order)
+        self.assertEqual(
+            (change.from_status, change.to_status, change.changed_by),
+            ("pending", "cancelled", self.staff),
+        )
+        event = OutboxEvent.objects.get(topic="order.cancelled")
+        self.assertEqual(event.payload, {"order_id": order.id})
+
+    def test_action_on_changelist_filtered_by_status(self):
+        Order.objects.create(customer=self.customer, status="ready")
+        Order.objects.create(customer=self.customer, status="ready")
+        Order.objects.create(customer=self.customer, status="delivered")
+        action = _transition_action("delivered", "Delivered")
+
+        with mock.patch.object(self.model_admin, "message_user") as message_user:
+            action(self.model_admin, self.request, Order.objects.filter(status="ready"))
+
+        message_user.assert_called_once_with(self.request, "2 order(s) marked as Delivered.")
+        self.assertFalse(Order.objects.filter(status="ready").exists())
+
+    def test_action_reports_skipped_orders(self):
+        Order.objects.create(customer=self.customer, status="ready")
+        Order.objects.create(customer=self.customer, status="pending")
+        action = _transition_action("delivered", "Delivered")
+
+        with mock.patch.object(self.model_admin, "message_user") as message_user:
+            action(self.model_admin, self.request, Order.objects.all())
+
+        message_user.assert_called_once_with(
+            self.request,
+            "1 order(s) marked as Delivered, 1 skipped (transition not allowed).",
+        )
+
+
+@override_settings(STORAGES=UNHASHED_STATIC)
+class OrderItemsAdminTests(TestCase):
+    """Order lines edited on the change form update the daily item sales."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin"))
+        category = Category.objects.create(name="Món chính")
+        self.beef = MenuItem.objects.create(name="Bò", price=150000, category=category)
+        self.fish = MenuItem.objects.create(name="Cá", price=90000, category=category)
+        self.order = Order.objects.create(customer=User.objects.create_user("customer"))
+        self.line = OrderItem.objects.create(order=self.order, menu_item=self.beef, quantity=2)
+        self.order.calculate_total()
+
+    def sales(self):
+        return sorted(
+            ItemSalesDay.objects.exclude(quantity=0).values_list(
+                "menu_item__name", "quantity", "revenue"
+            )
+        )
+
+    def edit_items(self, beef_quantity, status="pending"):
+        """Change the beef line and add a fish line on the change form."""
+        url = reverse("admin:restaurant_order_change", args=[self.order.id])
+        response = self.client.post(
+            url,
+            {
+                "customer": self.order.customer_id,
+                "status": status,
+                "items-TOTAL_FORMS": 2,
+                "items-INITIAL_FORMS": 1,
+                "items-0-id": self.line.id,
+                "items-0-order": self.order.id,
+                "items-0-menu_item": self.beef.id,
+                "items-0-quantity": beef_quantity,
+                "items-1-order": self.order.id,
+                "items-1-menu_item": self.fish.id,
+                "items-1-quantity": 1,
+                "status_changes-TOTAL_FORMS": 0,
+                "status_changes-INITIAL_FORMS": 0,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_edited_lines_update_item_sales(self):
+        leaderboards.record_order(self.order.id)  # As the order.placed handler
+        self.edit_items(beef_quantity=3)
+
+        self.assertEqual(self.sales(), [("Bò", 3, 450000), ("Cá", 1, 90000)])
+        leaderboards.rebuild()
+        self.assertEqual(self.sales(), [("Bò", 3, 450000), ("Cá", 1, 90000)])
+
+    def test_order_not_yet_counted(self):
+        # order.placed still queued: its handler will count the edited lines
+        OutboxEvent.objects.create(topic="order.placed", payload={"order_id": self.order.id})
+        self.edit_items(beef_quantity=3)
+        self.assertEqual(self.sales(), [])
+
+    def test_edited_and_cancelled(self):
+        leaderboards.record_order(self.order.id)
+        self.edit_items(beef_quantity=3, status="cancelled")
+        # As the order.cancelled handler
+        leaderboards.record_order(self.order.id, sign=-1)
+        self.assertEqual(self.sales(), [])
@@ -0,0 +1,67 @@
+"""Replayed checkout submits (restaurant/order_utils.py idempotency keys)."""
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from restaurant import views
+from restaurant.models import Category, MenuItem, Order
+from restaurant.order_utils import CHECKOUT_TOKEN_FIELD, find_replayed_order
+
+
+class PlaceOrderTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user("customer")
+        self.client.force_login(self.customer)
+        category = Category.objects.create(name="Món chính")
+        self.item = MenuItem.objects.create(name="Bò nhúng giấm", price=150000, category=category)
+
+    def test_empty_cart_does_not_use_up_the_token(self):
+        url = reverse("place_order")
+        response = self.client.post(url, {CHECKOUT_TOKEN_FIELD: "token-1"})
+        self.assertRedirects(response, reverse("menu"), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+
+        self.client.post(url, {CHECKOUT_TOKEN_FIELD: "token-1", f"quantity_{self.item.id}": "2"})
+        order = Order.objects.get(idempotency_key="token-1")
+        self.assertEqual(order.items.get().quantity, 2)
+
+    def test_checkout_with_an_empty_cart_does_not_use_up_the_token(self):
+        form = {
+            CHECKOUT_TOKEN_FIELD: "token-2",
+            "customer_name": "Lan",
+            "phone": "0901234567",
+            "delivery_address": "12 Lý Thường Kiệt",
+            "payment_method": "cod",
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(views.checkout, form)
+        self.assertEqual(response.url, reverse("menu"))
+        # Not even created and deleted again
+        self.assertFalse([q for q in queries if q["sql"].startswith("INSERT")])
+
+        self.post(views.checkout, {**form, f"quantity_{self.item.id}": "1"})
+        order = Order.objects.get(idempotency_key="token-2")
+        self.assertEqual(order.items.get().quantity, 1)
+
+    def post(self, view, data):
+        """Call a view that has no URL of its own."""
+        request = RequestFactory().post("/", data)
+        request.user = self.customer
+        request.session = self.client.session
+        request._messages = FallbackStorage(request)
+        return view(request)
+
+    def test_replayed_order_is_scoped_to_its_customer(self):
+        order = Order.objects.create(customer=self.customer, idempotency_key="t")
+        request = RequestFactory().post("/")
+
+        request.user = self.customer
+        self.assertEqual(find_replayed_order(request, "t"), order)
+        request.user = User.objects.create_user("someone_else")
+        self.assertIsNone(find_replayed_order(request, "t"))
+        request.user = AnonymousUser()
+        self.assertIsNone(find_replayed_order(request, "t"))
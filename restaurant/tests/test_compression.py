@@ -0,0 +1,101 @@
+"""Response compression (restaurant/compression.py)."""
+
+import gzip
+from unittest import skipIf
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from restaurant import compression
+from restaurant.compression import CompressionMiddleware, negotiate
+
+PAGE = ("<p>Bò nhúng giấm</p>" * 200).encode()
+
+
+def compress(response, accept_encoding="gzip, deflate, br", **meta):
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding, **meta)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+class NegotiateTests(SimpleTestCase):
+    @skipIf(compression.brotli is None, "brotli is not installed")
+    def test_brotli_preferred_on_ties(self):
+        self.assertEqual(negotiate("gzip, deflate, br"), "br")
+        self.assertEqual(negotiate("*"), "br")
+
+    def test_client_preference(self):
+        self.assertEqual(negotiate("br;q=0.5, gzip"), "gzip")
+        self.assertEqual(negotiate("gzip;q=1.0, br;q=0"), "gzip")
+        self.assertEqual(negotiate("identity"), None)
+        self.assertEqual(negotiate("gzip;q=0, *;q=0"), None)
+        self.assertEqual(negotiate(""), None)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    @skipIf(compression.brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        response = compress(HttpResponse(PAGE))
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.content), PAGE)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_gzip(self):
+        response = compress(HttpResponse(PAGE), accept_encoding="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), PAGE)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+
+    def test_strong_etag_becomes_weak(self):
+        page = HttpResponse(PAGE)
+        page["ETag"] = '"abc"'
+        self.assertEqual(compress(page, accept_encoding="gzip")["ETag"], 'W/"abc"')
+
+    def test_small_body(self):
+        response = compress(HttpResponse(b"<p>ok</p>"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_not_accepted(self):
+        response = compress(HttpResponse(PAGE), accept_encoding="identity")
+        self.assertEqual(response.content, PAGE)
+
+    def test_event_stream_is_not_compressed(self):
+        stream = StreamingHttpResponse(iter([PAGE]), content_type="text/event-stream")
+        response = compress(stream)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), PAGE)
+
+    def test_no_transform(self):
+        page = HttpResponse(PAGE)
+        page["Cache-Control"] = "private, no-transform"
+        self.assertFalse(compress(page).has_header("Content-Encoding"))
+
+    def test_binary_types(self):
+        self.assertFalse(
+            compress(HttpResponse(PAGE, content_type="image/png")).has_header("Content-Encoding")
+        )
+
+    def test_body_with_the_csrf_secret(self):
+        secret = "s" * 32
+        page = HttpResponse(PAGE + f'<input value="{secret}">'.encode())
+        self.assertFalse(compress(page, CSRF_COOKIE=secret).has_header("Content-Encoding"))
+        # Masked tokens (a form's csrf_token) differ on every response
+        page = HttpResponse(PAGE)
+        self.assertTrue(compress(page, CSRF_COOKIE=secret).has_header("Content-Encoding"))
+
+    def test_stream_that_issued_a_csrf_token(self):
+        stream = StreamingHttpResponse(iter([PAGE]))
+        response = compress(stream, accept_encoding="gzip", CSRF_COOKIE_NEEDS_UPDATE=True)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_stream(self):
+        stream = StreamingHttpResponse(iter([PAGE, PAGE]))
+        response = compress(stream, accept_encoding="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), PAGE * 2)
+
+    def test_already_encoded(self):
+        page = HttpResponse(PAGE)
+        page["Content-Encoding"] = "identity"
+        response = compress(page)
+        self.assertEqual((response["Content-Encoding"], response.content), ("identity", PAGE))
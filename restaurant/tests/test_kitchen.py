@@ -0,0 +1,105 @@
+"""Order status transitions from the kitchen board (order_utils.transition_orders)."""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from restaurant.models import Order, OrderStatusChange, OutboxEvent
+from restaurant.order_utils import transition_orders
+
+
+class KitchenStatusTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user("staff", is_staff=True)
+        self.customer = User.objects.create_user("customer")
+        self.client.force_login(self.staff)
+
+    def order(self, status="pending"):
+        return Order.objects.create(customer=self.customer, status=status)
+
+    def test_update_status(self):
+        order = self.order()
+        url = reverse("kitchen_update_status", args=[order.id])
+        response = self.client.post(url, {"status": "confirmed"})
+
+        self.assertEqual(response.json(), {"success": True, "status": "confirmed"})
+        order.refresh_from_db()
+        self.assertEqual(order.status, "confirmed")
+        self.assertIsNotNone(order.confirmed_at)
+        change = OrderStatusChange.objects.get(order=order)
+        self.assertEqual(
+            (change.from_status, change.to_status, change.changed_by),
+            ("pending", "confirmed", self.staff),
+        )
+
+    def test_illegal_transition_is_rejected(self):
+        order = self.order("delivered")
+        url = reverse("kitchen_update_status", args=[order.id])
+        response = self.client.post(url, {"status": "preparing"})
+
+        self.assertEqual(response.status_code, 409)
+        order.refresh_from_db()
+        self.assertEqual(order.status, "delivered")
+        self.assertFalse(OrderStatusChange.objects.exists())
+
+    def test_unknown_status(self):
+        url = reverse("kitchen_update_status", args=[self.order().id])
+        self.assertEqual(self.client.post(url, {"status": "eaten"}).status_code, 400)
+
+    def test_customers_cannot_change_status(self):
+        order = self.order()
+        self.client.force_login(self.customer)
+        self.client.post(reverse("kitchen_update_status", args=[order.id]), {"status": "confirmed"})
+        order.refresh_from_db()
+        self.assertEqual(order.status, "pending")
+
+    def test_bulk_update_moves_only_legal_orders(self):
+        ready = [self.order("ready"), self.order("ready")]
+        pending = self.order()
+        response = self.client.post(
+            reverse("kitchen_bulk_update_status"),
+            {"status": "delivered", "order_ids": [order.id for order in ready + [pending]]},
+        )
+
+        self.assertEqual(response.json(), {"success": True, "status": "delivered", "moved": 2})
+        self.assertEqual(
+            set(Order.objects.filter(status="delivered").values_list("id", flat=True)),
+            {order.id for order in ready},
+        )
+        self.assertEqual(
+            OrderStatusChange.objects.filter(from_status="ready", to_status="delivered").count(), 2
+        )
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, "pending")
+
+    def test_bulk_update_by_from_status(self):
+        self.order("ready")
+        self.order("preparing")
+        response = self.client.post(
+            reverse("kitchen_bulk_update_status"), {"status": "delivered", "from_status": "ready"}
+        )
+        self.assertEqual(response.json()["moved"], 1)
+        self.assertEqual(Order.objects.filter(status="preparing").count(), 1)
+
+
+class TransitionOrdersTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user("customer")
+
+    def test_cancel_queues_the_cancelled_event(self):
+        order = Order.objects.create(customer=self.customer, status="preparing")
+        self.assertEqual(transition_orders(Order.objects.filter(id=order.id), "cancelled"), 1)
+        order.refresh_from_db()
+        self.assertIsNotNone(order.cancelled_at)
+        event = OutboxEvent.objects.get(topic="order.cancelled")
+        self.assertEqual(event.payload, {"order_id": order.id})
+
+    def test_no_transition_out_of_a_final_status(self):
+        order = Order.objects.create(customer=self.customer, status="cancelled")
+        for status in ("pending", "confirmed", "delivered"):
+            self.assertEqual(transition_orders(Order.objects.filter(id=order.id), status), 0)
+        self.assertFalse(OrderStatusChange.objects.exists())
+
+    def test_unknown_status(self):
+        with self.assertRaises(ValueError):
+            transition_orders(Order.objects.all(), "eaten")
@@ -0,0 +1,61 @@
+"""Kitchen board and order tracking streams (restaurant/pubsub.py, SSE views)."""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core import checks
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from restaurant import pubsub
+from restaurant.models import Order
+
+
+class StreamTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user("customer")
+        self.order = Order.objects.create(customer=self.customer)
+
+    async def first_events(self, response, count):
+        events = []
+        stream = response.streaming_content
+        try:
+            async for chunk in stream:
+                chunk = chunk.decode()
+                if chunk.startswith("event: order"):
+                    events.append(json.loads(chunk.split("data: ", 1)[1]))
+                if len(events) == count:
+                    return events
+        finally:
+            await stream.aclose()
+
+    async def test_order_stream_starts_with_the_order(self):
+        await sync_to_async(self.async_client.force_login)(self.customer)
+        response = await self.async_client.get(reverse("order_stream", args=[self.order.id]))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        [snapshot] = await self.first_events(response, 1)
+        self.assertEqual((snapshot["id"], snapshot["status"]), (self.order.id, "pending"))
+
+    def test_order_stream_of_another_customer(self):
+        self.client.force_login(User.objects.create_user("someone_else"))
+        response = self.client.get(reverse("order_stream", args=[self.order.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_kitchen_stream_needs_staff(self):
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse("kitchen_stream"))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse("admin:login")))
+
+
+class BackendCheckTests(TestCase):
+    def test_in_process_backend_with_several_workers(self):
+        with override_settings(WEB_CONCURRENCY=4):
+            [warning] = pubsub.check_backend(None)
+        self.assertEqual(warning.id, "restaurant.W001")
+        self.assertEqual(warning.level, checks.WARNING)
+
+    def test_single_worker(self):
+        with override_settings(WEB_CONCURRENCY=1):
+            self.assertEqual(pubsub.check_backend(None), [])
@@ -0,0 +1,64 @@
+"""Metrics shared by several worker processes (restaurant/metrics.py)."""
+
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from restaurant import metrics
+
+KEY = ("restaurant_orders_placed_total", (("source", "cart"),))
+
+
+class MmapStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def store(self, pid):
+        """The store a worker process with this pid opens."""
+        with mock.patch.object(metrics.os, "getpid", return_value=pid):
+            return metrics.MmapStore(self.directory)
+
+    def test_values_summed_across_processes(self):
+        first, second = self.store(1001), self.store(1002)
+        first.inc(KEY, 2)
+        second.inc(KEY, 3)
+        second.inc(("restaurant_points_credited_total", ()), 150)
+
+        self.assertEqual(
+            first.collect(), {KEY: 5.0, ("restaurant_points_credited_total", ()): 150.0}
+        )
+        self.assertEqual(first.collect(), second.collect())
+
+    def test_restarted_process_keeps_its_values(self):
+        self.store(1001).inc(KEY, 2)
+        store = self.store(1001)
+        store.inc(KEY, 1)
+        self.assertEqual(store.collect(), {KEY: 3.0})
+
+    def test_file_grows_past_its_initial_size(self):
+        store = self.store(1001)
+        keys = [("restaurant_test_total", (("n", str(n)),)) for n in range(3000)]
+        store.inc_many((key, n) for n, key in enumerate(keys))
+        self.assertGreater(len(store._mmap), metrics._INITIAL_SIZE)
+
+        values = self.store(1002).collect()
+        self.assertEqual(len(values), 3000)
+        self.assertEqual(values[keys[-1]], 2999.0)
+
+    def test_render_adds_up_the_workers(self):
+        first, second = self.store(1001), self.store(1002)
+        with mock.patch.object(metrics, "_store", first):
+            metrics.ORDERS_PLACED.inc(source="cart")
+            metrics.REPORT_SECONDS.observe(0.2, report="sales.summary")
+        with mock.patch.object(metrics, "_store", second):
+            metrics.ORDERS_PLACED.inc(source="cart")
+            metrics.REPORT_SECONDS.observe(3, report="sales.summary")
+            lines = metrics.render().splitlines()
+
+        self.assertIn('restaurant_orders_placed_total{source="cart"} 2', lines)
+        self.assertIn('restaurant_report_seconds_bucket{report="sales.summary",le="0.25"} 1', lines)
+        self.assertIn('restaurant_report_seconds_bucket{report="sales.summary",le="+Inf"} 2', lines)
+        self.assertIn('restaurant_report_seconds_count{report="sales.summary"} 2', lines)
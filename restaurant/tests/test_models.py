@@ -0,0 +1,33 @@
+"""Price snapshots of order lines (OrderItem.save)."""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from restaurant.models import Category, MenuItem, Order, OrderItem
+
+
+class OrderItemPriceTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Món chính")
+        self.beef = MenuItem.objects.create(name="Bò", price=150000, category=category)
+        self.fish = MenuItem.objects.create(name="Cá", price=90000, category=category)
+        order = Order.objects.create(customer=User.objects.create_user("customer"))
+        self.line = OrderItem.objects.create(order=order, menu_item=self.beef, quantity=2)
+
+    def test_price_kept_when_menu_price_changes(self):
+        self.beef.price = 200000
+        self.beef.save()
+        line = OrderItem.objects.get(id=self.line.id)
+        line.quantity = 3
+        line.save()
+        self.assertEqual(line.price, 150000)
+        self.assertEqual(line.subtotal, 450000)
+
+    def test_new_snapshot_when_menu_item_changes(self):
+        line = OrderItem.objects.get(id=self.line.id)
+        line.menu_item = self.fish
+        line.save()
+        line.refresh_from_db()
+        self.assertEqual(line.price, 90000)
+        self.assertEqual(line.price_version_id, self.fish.price_version_id)
+        self.assertEqual(line.subtotal, 180000)
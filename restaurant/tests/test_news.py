@@ -0,0 +1,138 @@
+"""The news feed's keyset pages and publishing window (restaurant/news.py)."""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from restaurant import news, search
+from restaurant.models import NewsFeed
+from restaurant.tests import UNHASHED_STATIC
+
+
+def post(title, publish_at, **fields):
+    return NewsFeed.objects.create(
+        title=title, content=f"{title} content", publish_at=publish_at, **fields
+    )
+
+
+# No timer threads publishing behind the tests' back
+@override_settings(NEWS_SCHEDULER="off")
+class PageTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.posts = [
+            post(f"Post {n}", self.now - timedelta(hours=n // 2)) for n in range(5)
+        ]  # Two by two at the same time: ties go by id
+
+    def walk(self, size):
+        """Titles of every page, following the cursors."""
+        pages = []
+        cursor = None
+        while True:
+            items, cursor = news.page(cursor, size=size)
+            pages.append([item.title for item in items])
+            if cursor is None:
+                return pages
+
+    def test_pages_follow_each_other(self):
+        self.assertEqual(
+            self.walk(size=2),
+            [["Post 1", "Post 0"], ["Post 3", "Post 2"], ["Post 4"]],
+        )
+        self.assertEqual(self.walk(size=5), [["Post 1", "Post 0", "Post 3", "Post 2", "Post 4"]])
+
+    def test_cursor_round_trip(self):
+        last = self.posts[2]
+        cursor = news.encode_cursor(last.publish_at, last.id)
+        self.assertEqual(news.decode_cursor(cursor), (last.publish_at, last.id))
+
+    def test_new_post_does_not_shift_later_pages(self):
+        _, cursor = news.page(size=2)
+        post("Breaking", self.now)
+        second, _ = news.page(cursor, size=2)
+        self.assertEqual([item.title for item in second], ["Post 3", "Post 2"])
+
+    def test_bad_cursor(self):
+        for cursor in ("nope", news.encode_cursor(self.now, 1)[:-3], "!!!"):
+            with self.assertRaises(ValueError):
+                news.page(cursor)
+
+    def test_cards_carry_an_excerpt_only(self):
+        [card], _ = news.page(size=1)
+        self.assertEqual(card.excerpt, "Post 1 content")
+        self.assertIn("content", card.get_deferred_fields())
+
+    def test_load_more(self):
+        _, cursor = news.page(size=news.PAGE_SIZE)  # One page: no more
+        self.assertIsNone(cursor)
+        cursor = news.encode_cursor(self.posts[3].publish_at, self.posts[3].id)
+
+        data = self.client.get(reverse("feeds_more"), {"cursor": cursor}).json()
+        self.assertIn("Post 2", data["html"])
+        self.assertNotIn("Post 3", data["html"])
+        self.assertIsNone(data["next"])
+        response = self.client.get(reverse("feeds_more"), {"cursor": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(NEWS_SCHEDULER="off", STORAGES=UNHASHED_STATIC)
+class PublishingWindowTests(TestCase):
+    def setUp(self):
+        cache.delete(news.SNAPSHOT_KEY)
+        self.now = timezone.now()
+        hour = timedelta(hours=1)
+        self.live = post("Live", self.now - hour, expire_at=self.now + 2 * hour)
+        self.scheduled = post("Scheduled", self.now + hour)
+        self.expired = post("Expired", self.now - 2 * hour, expire_at=self.now - hour)
+        self.hidden = post("Hidden", self.now - hour, is_active=False)
+
+    def titles(self, now):
+        return [item.title for item in news.visible(now)]
+
+    def test_visible(self):
+        self.assertEqual(self.titles(self.now), ["Live"])
+        self.assertEqual(self.titles(self.now + timedelta(minutes=90)), ["Scheduled", "Live"])
+        self.assertEqual(self.titles(self.now + timedelta(hours=3)), ["Scheduled"])
+        self.assertEqual(
+            [item.is_visible(self.now) for item in NewsFeed.objects.order_by("id")],
+            [True, False, False, False],
+        )
+
+    def test_snapshot_ends_at_the_next_boundary(self):
+        self.assertEqual(news.next_boundary(self.now), self.scheduled.publish_at)
+        self.assertEqual(news.next_boundary(self.scheduled.publish_at), self.live.expire_at)
+        self.assertIsNone(news.next_boundary(self.live.expire_at))
+
+        snapshot = news.publish(self.now)
+        self.assertEqual(snapshot["valid_until"], self.scheduled.publish_at)
+        self.assertEqual([item.title for item in snapshot["items"]], ["Live"])
+        self.assertNotIn("Scheduled", snapshot["cards"][False])
+
+        # Expired on the cached snapshot: the next request renders a fresh one
+        cache.set(news.SNAPSHOT_KEY, dict(snapshot, valid_until=self.now))
+        self.assertGreater(news.snapshot()["valid_until"], self.now)
+
+    def test_search_shows_what_the_feed_shows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post("Khai trương", self.now + timedelta(hours=1))
+        self.assertEqual(search.search("khai truong"), [])
+        news.publish(self.now + timedelta(minutes=90))
+        self.assertEqual([doc.title for doc in search.search("khai truong")], ["Khai trương"])
+
+    def test_detail_of_posts_outside_their_window(self):
+        for item in (self.scheduled, self.expired, self.hidden):
+            response = self.client.get(reverse("feed_detail", args=[item.id]))
+            self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse("feed_detail", args=[self.live.id])).status_code, 200
+        )
+
+        # Staff can preview active posts, but not deactivated ones
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        for item, status in ((self.scheduled, 200), (self.expired, 200), (self.hidden, 404)):
+            response = self.client.get(reverse("feed_detail", args=[item.id]))
+            self.assertEqual(response.status_code, status)
@@ -0,0 +1,97 @@
+"""Outbox delivery: retries with backoff and reclaiming stale leases (restaurant/outbox.py)."""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from restaurant import outbox
+from restaurant.models import OutboxEvent
+
+
+class ProcessPendingTests(TestCase):
+    def setUp(self):
+        self.calls = []
+        handlers = mock.patch.dict(outbox._handlers, {"test.event": [self.calls.append]})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def failing_handler(self, payload):
+        raise RuntimeError("handler failed")
+
+    def test_delivers_and_marks_done(self):
+        event = outbox.enqueue("test.event", order_id=1)
+        self.assertEqual(outbox.process_pending(), 1)
+        self.assertEqual(self.calls, [{"order_id": 1}])
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("done", 1))
+        self.assertIsNotNone(event.processed_at)
+
+    def test_failed_attempt_is_retried_with_backoff(self):
+        event = outbox.enqueue("test.event", order_id=1)
+        with mock.patch.dict(
+            outbox._handlers, {"test.event": [self.calls.append, self.failing_handler]}
+        ):
+            self.assertEqual(outbox.process_pending(), 0)
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("pending", 1))
+        self.assertEqual(event.last_error, "handler failed")
+        self.assertGreater(event.available_at, timezone.now() + timedelta(seconds=1))
+        # Not due yet
+        self.assertEqual(outbox.process_pending(), 0)
+
+        OutboxEvent.objects.filter(id=event.id).update(available_at=timezone.now())
+        self.assertEqual(outbox.process_pending(), 1)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts, event.last_error), ("done", 2, ""))
+
+    def test_failed_attempt_leaves_no_partial_effects(self):
+        def write_then_fail(payload):
+            OutboxEvent.objects.create(topic="test.side_effect")
+            raise RuntimeError("handler failed")
+
+        outbox.enqueue("test.event")
+        with mock.patch.dict(outbox._handlers, {"test.event": [write_then_fail]}):
+            outbox.process_pending()
+        self.assertFalse(OutboxEvent.objects.filter(topic="test.side_effect").exists())
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_gives_up_after_max_attempts(self):
+        event = outbox.enqueue("test.event")
+        with mock.patch.dict(outbox._handlers, {"test.event": [self.failing_handler]}):
+            for _ in range(2):
+                OutboxEvent.objects.filter(id=event.id).update(available_at=timezone.now())
+                outbox.process_pending()
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("failed", 2))
+        OutboxEvent.objects.filter(id=event.id).update(available_at=timezone.now())
+        self.assertEqual(outbox.process_pending(), 0)
+
+    def test_stale_lease_is_reclaimed(self):
+        now = timezone.now()
+        stale = OutboxEvent.objects.create(
+            topic="test.event",
+            payload={"order_id": 1},
+            status="processing",
+            attempts=1,
+            locked_at=now - timedelta(seconds=outbox.LEASE_SECONDS + 1),
+        )
+        # Claimed by a worker that is still running
+        OutboxEvent.objects.create(
+            topic="test.event", payload={"order_id": 2}, status="processing", locked_at=now
+        )
+
+        self.assertEqual(outbox.process_pending(), 1)
+        self.assertEqual(self.calls, [{"order_id": 1}])
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.attempts), ("done", 2))
+
+    def test_event_rolled_back_with_its_transaction(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            outbox.enqueue("test.event")
+            raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.exists())
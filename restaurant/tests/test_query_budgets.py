@@ -0,0 +1,60 @@
+"""
+Query budgets (restaurant/query_budget.py): no view may run more queries as
+the data grows. Run with `pytest` or `python manage.py test restaurant`.
+"""
+
+from django.test import TestCase, override_settings
+
+from restaurant import query_budget
+from restaurant.query_budget import capture_queries, query_diff, run_budgets
+from restaurant.routers import use_primary_only
+from restaurant.tests import UNHASHED_STATIC
+
+# Smaller than check_query_budgets' default, still enough to expose an N+1
+SMALL, LARGE = 3, 30
+
+
+@override_settings(STORAGES=UNHASHED_STATIC)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        use_primary_only()  # The replica, if configured, has no test tables
+        cls.results = run_budgets(scales=(SMALL, LARGE))
+
+    def test_every_view_has_a_scenario(self):
+        # Raises LookupError naming the URLs without one
+        query_budget.budgeted_views()
+
+    def test_views_within_budget(self):
+        for result in self.results:
+            with self.subTest(view=result.view):
+                self.assertEqual(result.status[SMALL], result.status[LARGE], result.path)
+                self.assertTrue(
+                    result.passed,
+                    query_diff(
+                        result.queries[SMALL],
+                        result.queries[LARGE],
+                        f"{SMALL} rows",
+                        f"{LARGE} rows",
+                    ),
+                )
+
+    def test_views_answer(self):
+        for result in self.results:
+            with self.subTest(view=result.view):
+                self.assertLess(result.status[LARGE], 500, result.path)
+
+
+class CaptureQueriesTests(TestCase):
+    def test_returns_result_and_sql(self):
+        result, queries = capture_queries(lambda: list(query_budget.MenuItem.objects.all()))
+        self.assertEqual(result, [])
+        self.assertEqual(len(queries), 1)
+        self.assertIn("restaurant_menuitem", queries[0])
+
+    def test_normalize_collapses_literals(self):
+        self.assertEqual(
+            query_budget.normalize('SELECT * FROM "t" WHERE "id" IN (1, 2, 3)'),
+            query_budget.normalize('SELECT * FROM "t" WHERE "id" IN (4)'),
+        )
@@ -0,0 +1,74 @@
+"""Report pages and their lazily loaded widgets (restaurant/reports.py)."""
+
+import time
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from restaurant import dashboards
+from restaurant.models import Order
+from restaurant.tests import UNHASHED_STATIC
+
+
+@override_settings(STORAGES=UNHASHED_STATIC)
+class ReportPageTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+
+    def test_bad_dates_fall_back_to_the_default_range(self):
+        response = self.client.get(
+            reverse("sales_reports"), {"type": "monthly", "start_date": "31/12"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["start_date"].day, 1)
+        self.assertEqual(len(list(response.context["messages"])), 1)
+
+    def test_widget_rejects_bad_dates(self):
+        url = reverse("report_widget", args=["sales", "summary"])
+        response = self.client.get(url, {"start_date": "31/12"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_widget_numbers_are_json_numbers(self):
+        customer = User.objects.create_user("customer")
+        Order.objects.create(customer=customer, total_amount=150000)
+        Order.objects.create(customer=customer, total_amount=100001)
+        url = reverse("report_widget", args=["sales", "summary"])
+        data = self.client.get(url).json()["data"]
+        self.assertEqual(data["total_orders"], 2)
+        self.assertEqual(data["total_revenue"], 250001)
+        self.assertEqual(data["average_order_value"], 125000.5)
+
+    def test_unknown_widget(self):
+        url = reverse("report_widget", args=["sales", "top_customers"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class RunWidgetTests(TestCase):
+    def test_result(self):
+        self.assertEqual(dashboards.run_widget("count", Order.objects.count), (0, None))
+
+    def test_error(self):
+        self.assertEqual(dashboards.run_widget("boom", lambda: 1 / 0), (None, "error"))
+
+    def test_timeout_stops_the_next_query(self):
+        def slow_widget():
+            time.sleep(0.05)
+            return Order.objects.count()
+
+        self.assertEqual(
+            dashboards.run_widget("slow", slow_widget, timeout=0.01), (None, "timeout")
+        )
+
+    def test_timeout_in_the_middle_of_a_widget(self):
+        counted = []
+
+        def widget():
+            counted.append(Order.objects.count())
+            time.sleep(0.05)
+            counted.append(Order.objects.count())
+            return counted
+
+        self.assertEqual(dashboards.run_widget("slow", widget, timeout=0.02), (None, "timeout"))
+        # The first query ran, the one after the deadline did not
+        self.assertEqual(counted, [0])
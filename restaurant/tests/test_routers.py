@@ -0,0 +1,83 @@
+"""Read-replica routing and stickiness after writes (restaurant/routers.py)."""
+
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import resolve, reverse
+
+from restaurant.cart_utils import get_or_create_cart
+from restaurant.models import MenuItem, Order
+from restaurant.routers import STICKY_SESSION_KEY, ReplicaRouter, ReplicaRoutingMiddleware
+
+
+# Only the alias is needed: nothing below reads from it
+@override_settings(REPLICA_DATABASE="replica", REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingMiddlewareTests(TransactionTestCase):
+    # Not TestCase: the router keeps every read inside a transaction on the primary
+
+    def setUp(self):
+        self.user = User.objects.create_user("customer")
+        self.session = None
+        # Turned off by the query budget tests' use_primary_only()
+        replica_reads = mock.patch("restaurant.routers._replica_reads", True)
+        replica_reads.start()
+        self.addCleanup(replica_reads.stop)
+
+    def request(self, name, method="get", work=None, user=None):
+        """
+        Run a request to the view `name` through the middleware, doing `work`
+        in the view. Returns where the view's reads went.
+        """
+        request = getattr(RequestFactory(), method)(reverse(name))
+        request.resolver_match = resolve(request.path)
+        request.user = user or self.user
+        SessionMiddleware(lambda r: None).process_request(request)
+        if self.session is not None:
+            request.session = self.session
+        self.session = request.session
+        read_from = []
+
+        def view(request):
+            middleware.process_view(request, None, (), {})
+            read_from.append(ReplicaRouter().db_for_read(MenuItem) or "default")
+            if work:
+                work(request)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        middleware(request)
+        return read_from[0]
+
+    def place_order(self, request):
+        Order.objects.create(customer=self.user)
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.request("order_history"), "replica")
+
+    def test_other_views_read_from_the_primary(self):
+        self.assertEqual(self.request("cart_view"), "default")
+        self.assertEqual(self.request("order_history", method="head"), "replica")
+        self.assertEqual(self.request("order_history", method="post"), "default")
+
+    def test_anonymous_views(self):
+        self.assertEqual(self.request("menu", user=AnonymousUser()), "replica")
+        self.assertEqual(self.request("menu"), "default")
+
+    def test_sticky_after_a_write(self):
+        self.request("place_order", method="post", work=self.place_order)
+        self.assertGreater(self.session[STICKY_SESSION_KEY], time.time())
+        self.assertEqual(self.request("order_history"), "default")
+
+        # Until REPLICA_STICKY_SECONDS have passed
+        with mock.patch("restaurant.routers.time.time", return_value=time.time() + 11):
+            self.assertEqual(self.request("order_history"), "replica")
+
+    def test_session_and_cart_writes_do_not_pin(self):
+        # A guest's first cart also creates their session
+        self.request("menu", work=get_or_create_cart, user=AnonymousUser())
+        self.assertNotIn(STICKY_SESSION_KEY, self.session)
+        self.assertEqual(self.request("order_history"), "replica")
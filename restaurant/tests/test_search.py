@@ -0,0 +1,63 @@
+"""Full-text search over the SQLite FTS5 index (restaurant/search.py)."""
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from restaurant import search
+from restaurant.models import Category, MenuItem
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Món chính")
+        self.beef = self.item("Bò Nhúng Giấm")
+        self.item("Cá Kho Tộ")
+
+    def item(self, name, **fields):
+        return MenuItem.objects.create(name=name, price=100000, category=self.category, **fields)
+
+    def titles(self, query, **kwargs):
+        return [document.title for document in search.search(query, **kwargs)]
+
+    def test_accents_are_optional(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.titles("bo nhung"), ["Bò Nhúng Giấm"])
+        self.assertIn(f"{search.FTS_TABLE} MATCH", queries[0]["sql"])
+        self.assertEqual(self.titles("BÒ NHÚNG"), ["Bò Nhúng Giấm"])
+
+    def test_every_word_is_a_prefix(self):
+        self.assertEqual(self.titles("bo nhu"), ["Bò Nhúng Giấm"])
+        self.assertEqual(self.titles("mon chinh ca"), ["Cá Kho Tộ"])
+        self.assertEqual(self.titles("bo kho"), [])
+
+    def test_index_follows_edits(self):
+        self.beef.name = "Bò Lúc Lắc"
+        self.beef.save()
+        self.assertEqual(self.titles("bo luc lac"), ["Bò Lúc Lắc"])
+        self.assertEqual(self.titles("nhung"), [])
+
+        self.beef.delete()
+        self.assertEqual(self.titles("bo"), [])
+
+    def test_unavailable_items_are_not_public(self):
+        hidden = self.item("Bò Kho", is_available=False)
+        self.assertEqual(self.titles("bo kho"), [])
+        self.assertEqual(self.titles("bo kho", public_only=False), ["Bò Kho"])
+        self.assertEqual(search.search_ids("bo kho", "menu_item"), [hidden.id])
+
+    def test_query_punctuation_is_not_fts_syntax(self):
+        self.assertEqual(self.titles('bo" OR nhung*'), [])
+        self.assertEqual(self.titles('"bo" (nhung)'), ["Bò Nhúng Giấm"])
+
+    def test_customers_only_for_staff(self):
+        User.objects.create_user("nguyen.van.a", first_name="Văn A")
+        url = reverse("search")
+        params = {"q": "nguyen", "kind": "customer"}
+
+        self.assertEqual(self.client.get(url, params).json()["results"], [])
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        [result] = self.client.get(url, params).json()["results"]
+        self.assertEqual(result["title"], "nguyen.van.a")
@@ -0,0 +1,54 @@
+"""Menu typeahead over the in-process trie (restaurant/typeahead.py)."""
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from restaurant import typeahead
+from restaurant.models import Category, MenuItem
+
+
+class SuggestTests(TestCase):
+    def setUp(self):
+        cache.delete(typeahead.VERSION_KEY)  # Every test builds its own trie
+        self.category = Category.objects.create(name="Món chính")
+        for name in ("Lẩu Bò", "Bò Nhúng Giấm", "Bò Kho", "Cá Kho Tộ"):
+            self.item(name)
+
+    def item(self, name, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MenuItem.objects.create(
+                name=name, price=100000, category=self.category, **fields
+            )
+
+    def names(self, query, **kwargs):
+        return [suggestion["name"] for suggestion in typeahead.suggest(query, **kwargs)]
+
+    def test_names_starting_with_the_query_first(self):
+        # Then by name: "Lẩu Bò" only has a later word starting with "bo"
+        self.assertEqual(self.names("bo"), ["Bò Kho", "Bò Nhúng Giấm", "Lẩu Bò"])
+        self.assertEqual(self.names("Bò", limit=2), ["Bò Kho", "Bò Nhúng Giấm"])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.names("kho bo"), ["Bò Kho"])
+        self.assertEqual(self.names("nhung"), ["Bò Nhúng Giấm"])
+        self.assertEqual(self.names("bo ca"), [])
+        self.assertEqual(self.names("  "), [])
+
+    def test_no_query_once_built(self):
+        self.names("bo")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names("ca"), ["Cá Kho Tộ"])
+
+    def test_rebuilt_when_the_menu_changes(self):
+        self.assertEqual(self.names("bun"), [])
+        version = typeahead.menu_version()
+
+        self.item("Bún Bò Huế")
+        self.assertNotEqual(typeahead.menu_version(), version)
+        self.assertEqual(self.names("bun"), ["Bún Bò Huế"])
+
+        item = MenuItem.objects.get(name="Bò Kho")
+        item.is_available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        self.assertEqual(self.names("kho"), ["Cá Kho Tộ"])
@@ -0,0 +1,120 @@
+"""
+Menu typeahead: a prefix trie of the names of available menu items, held in
+each process. Keys are the folded words of a name (search.words), so "bo nh",
+"Bò Nh" and "nhung" all find "Bò Nhúng Giấm".
+
+Saving or deleting a MenuItem stores a new menu version in the cache; the
+first suggest() after that in each process rebuilds its trie. A lookup is one
+cache get and a walk down the trie, never a database query.
+
+    suggest("bo nh", limit=8)  # [{"id", "name", "price", "thumbnail", "url"}]
+"""
+
+import heapq
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from .models import MenuItem
+from .search import MAX_QUERY_WORDS, words
+
+VERSION_KEY = "typeahead:menu_version"
+DEFAULT_LIMIT = 8
+
+_ITEMS = ""  # Child key of a node holding the items below it; never a character
+
+# (menu version, trie root, suggestions, first folded word of each name)
+_built = (None, {}, [], [])
+_build_lock = threading.Lock()
+
+
+def _insert(root, key, index):
+    node = root
+    for char in key:
+        node = node.setdefault(char, {})
+        node.setdefault(_ITEMS, set()).add(index)
+
+
+def _lookup(root, prefix):
+    """Indexes of the items with a word starting with `prefix`."""
+    node = root
+    for char in prefix:
+        node = node.get(char)
+        if node is None:
+            return set()
+    return node[_ITEMS]
+
+
+def build():
+    """(trie root, suggestions, first words) of the available items, by name."""
+    items = MenuItem.objects.filter(is_available=True).order_by("name", "id")
+    root = {}
+    suggestions = []
+    first_words = []
+    for index, item in enumerate(items.only("id", "name", "price", "image")):
+        name_words = words(item.name)
+        suggestions.append(
+            {
+                "id": item.id,
+                "name": item.name,
+                "price": int(item.price),
+                "thumbnail": item.image.url if item.image else None,
+                "url": reverse("menu_item_detail", args=[item.id]),
+            }
+        )
+        first_words.append(name_words[0] if name_words else "")
+        for word in set(name_words):
+            _insert(root, word, index)
+    return root, suggestions, first_words
+
+
+def menu_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Evicted or never set: any new version makes every process rebuild
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_menu_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _trie():
+    global _built
+    version = menu_version()
+    if _built[0] != version:
+        with _build_lock:
+            if _built[0] != version:
+                _built = (version, *build())
+    return _built
+
+
+def suggest(query, limit=DEFAULT_LIMIT):
+    """Items having a word that starts with each word of `query`."""
+    terms = words(query)[:MAX_QUERY_WORDS]
+    if not terms:
+        return []
+    _, root, suggestions, first_words = _trie()
+    matches = _lookup(root, terms[0])
+    for term in terms[1:]:
+        matches = matches & _lookup(root, term)
+    # Names starting with the first word come first, then by name
+    ranked = heapq.nsmallest(
+        limit,
+        matches,
+        key=lambda index: (not first_words[index].startswith(terms[0]), index),
+    )
+    return [suggestions[index] for index in ranked]
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def menu_changed(sender, **kwargs):
+    transaction.on_commit(bump_menu_version)
@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path("", views.index, name="index"),
     path("feeds/", views.feeds, name="feeds"),
+    path("feeds/more/", views.feeds_more, name="feeds_more"),
     path("menu/", views.menu, name="menu"),
     path("order/", views.place_order, name="place_order"),
     path("order-history/", views.order_history, name="order_history"),
@@ -22,8 +23,21 @@ urlpatterns = [
     path("admin-reports/", views.admin_reports, name="admin_reports"),
     path("reports/users/", views.user_reports, name="user_reports"),
     path("reports/sales/", views.sales_reports, name="sales_reports"),
+    path(
+        "reports/widgets/<str:report>/<str:widget>/",
+        views.report_widget,
+        name="report_widget",
+    ),
     path("reports/", views.reports_menu, name="reports_menu"),
+    path(
+        "reports/performance/",
+        views.performance_report,
+        name="performance_report",
+    ),
+    path("metrics", views.metrics_view, name="metrics"),
     path("menu/item/<int:item_id>/", views.menu_item_detail, name="menu_item_detail"),
+    path("menu/suggest/", views.menu_suggest, name="menu_suggest"),
+    path("search/", views.search_view, name="search"),
     # Cart URLs
     path("cart/", views.cart_view, name="cart_view"),
     path("cart/add/<int:item_id>/", views.add_to_cart_view, name="add_to_cart"),
@@ -45,4 +59,20 @@ urlpatterns = [
         name="order_confirmation",
     ),
     path("cart/add/<int:item_id>/", views.add_to_cart_view, name="add_to_cart"),
+    # Live order tracking (Server-Sent Events)
+    path("order/<int:order_id>/track/", views.order_tracking, name="order_tracking"),
+    path("order/<int:order_id>/stream/", views.order_stream, name="order_stream"),
+    # Kitchen display board
+    path("kitchen/", views.kitchen_board, name="kitchen_board"),
+    path("kitchen/stream/", views.kitchen_stream, name="kitchen_stream"),
+    path(
+        "kitchen/orders/<int:order_id>/status/",
+        views.kitchen_update_status,
+        name="kitchen_update_status",
+    ),
+    path(
+        "kitchen/orders/status/",
+        views.kitchen_bulk_update_status,
+        name="kitchen_bulk_update_status",
+    ),
 ]
@@ -1,9 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.http import urlencode
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib import messages
-from django.db import transaction
+from django.db import transaction, IntegrityError
+from django.conf import settings
 from django.utils import timezone
 from .models import (
     MenuItem,
@@ -15,65 +20,185 @@ from .models import (
     Reward,
     RewardRedemption,
 )
-from decimal import Decimal
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Sum, Count, Q, Avg, F
-from django.db.models.functions import TruncDate, TruncMonth, TruncYear
-from datetime import datetime, timedelta
-from django.db import models
+from django.db.models import Sum, Count, Q
+from datetime import timedelta
 import json
+import time
 from django.contrib.auth.models import User
 from .forms import CustomSignupForm
 from django.shortcuts import render, get_object_or_404
 from .models import MenuItem
-from django.http import JsonResponse
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    set_response_etag,
+)
+from django.views.decorators.http import conditional_page, require_POST
+from asgiref.sync import sync_to_async
+from functools import wraps
+import asyncio
 from .cart_utils import (
     get_or_create_cart,
     add_to_cart,
     update_cart_item,
     remove_from_cart,
     clear_cart,
+    cart_lines,
+)
+from . import (
+    dashboards,
+    leaderboards,
+    metrics,
+    news,
+    outbox,
+    pubsub,
+    reports,
+    search,
+    typeahead,
+)
+from .instrumentation import HISTOGRAM_BUCKETS, read_requests, summarize_requests
+from .order_utils import (
+    CHECKOUT_TOKEN_FIELD,
+    issue_checkout_token,
+    get_checkout_token,
+    find_replayed_order,
+    KITCHEN_CHANNEL,
+    ACTIVE_STATUSES,
+    order_channel,
+    live_orders,
+    order_snapshot,
+    kitchen_snapshot,
+    transition_orders,
 )
 
+# Server-Sent Events: keepalive interval and how long one stream stays open
+# before the browser's EventSource reconnects (served under ASGI, see asgi.py)
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_SECONDS = 300
+
+
+# Async views (the read-heavy pages and the AJAX cart endpoints): under ASGI
+# they wait for the database without holding a worker thread, and start their
+# independent queries together. Templates, sessions, the lazy request.user and
+# the cart context processor are sync-only and run through these.
+render_async = sync_to_async(render)
+
+
+async def _is_staff(request):
+    """request.user.is_staff; loading the user queries the session and user"""
+    return await sync_to_async(lambda: request.user.is_staff)()
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+
+def private_conditional_page(view):
+    """
+    cache_control(private=True, no_cache=True) plus conditional_page for an
+    async view (Django 4.2's decorators only wrap sync views).
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        response = await view(request, *args, **kwargs)
+        if request.method == "GET":
+            if not response.has_header("ETag"):
+                set_response_etag(response)
+            if response.has_header("ETag"):
+                response = get_conditional_response(
+                    request, etag=response["ETag"], response=response
+                )
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
-def index(request):
+    return wrapper
+
+
+async def index(request):
     """Homepage view"""
-    latest_news = NewsFeed.objects.filter(is_active=True)[:3]
-    featured_items = MenuItem.objects.filter(is_available=True)[:6]
+    featured_items, snapshot, best_sellers = await asyncio.gather(
+        _alist(MenuItem.objects.filter(is_available=True)[:6]),
+        sync_to_async(news.snapshot)(),
+        sync_to_async(leaderboards.best_sellers)(),
+    )
 
     context = {
-        "latest_news": latest_news,
+        "latest_news_html": snapshot["latest"],
         "featured_items": featured_items,
+        "best_sellers": best_sellers,
     }
-    return render(request, "index.html", context)
+    return await render_async(request, "index.html", context)
 
 
-def feeds(request):
-    """News feeds view"""
-    news_feeds = NewsFeed.objects.filter(is_active=True)
+# Same bytes until a post, the cart or the user changes: an ETag of the page
+# lets browsers revalidate instead of downloading it again
+@private_conditional_page
+async def feeds(request):
+    """News feeds view: the pre-rendered first page; feeds_more loads the rest"""
+    snapshot, staff = await asyncio.gather(
+        sync_to_async(news.snapshot)(), _is_staff(request)
+    )
     context = {
-        "news_feeds": news_feeds,
+        "news_cards": snapshot["cards"][staff],
+        "next_cursor": snapshot["next_cursor"],
     }
-    return render(request, "feeds.html", context)
+    return await render_async(request, "feeds.html", context)
 
 
-def feed_detail(request, news_id):
-    """Single news feed detail view"""
-    news = get_object_or_404(NewsFeed, id=news_id, is_active=True)
+def feeds_more(request):
+    """The page of news cards after ?cursor= (JSON: rendered cards + next cursor)"""
+    try:
+        news_feeds, next_cursor = news.page(request.GET.get("cursor", ""))
+    except ValueError:
+        return JsonResponse({"error": "Cursor không hợp lệ"}, status=400)
+    html = render_to_string(
+        "news_cards.html", {"news_feeds": news_feeds, "staff": request.user.is_staff}
+    )
+    return JsonResponse({"html": html, "next": next_cursor})
 
-    # Get related news (exclude current, get 3 most recent)
-    related_news = NewsFeed.objects.filter(is_active=True).exclude(id=news_id)[:3]
+
+@private_conditional_page
+async def feed_detail(request, news_id):
+    """Single news feed detail view (staff also see scheduled and expired posts)"""
+    staff, snapshot = await asyncio.gather(
+        _is_staff(request), sync_to_async(news.snapshot)()
+    )
+    if staff:
+        posts = NewsFeed.objects.filter(is_active=True)
+    else:
+        posts = news.visible()
+    post = await _aget_object_or_404(posts, id=news_id)
+
+    # 3 most recent other posts, from the pre-rendered first page
+    related_news = [
+        related for related in snapshot["items"] if related.id != post.id
+    ][:3]
 
     context = {
-        "news": news,
+        "news": post,
         "related_news": related_news,
     }
-    return render(request, "feed_detail.html", context)
+    return await render_async(request, "feed_detail.html", context)
 
 
-def menu(request):
+async def menu(request):
     """Menu view with categories"""
-    categories = Category.objects.prefetch_related("items").all()
     selected_category = request.GET.get("category")
 
     if selected_category:
@@ -82,46 +207,114 @@ def menu(request):
         )
     else:
         menu_items = MenuItem.objects.filter(is_available=True)
+    categories, menu_items = await asyncio.gather(
+        _alist(Category.objects.all()),
+        _alist(menu_items.select_related("category")),
+    )
 
     context = {
         "categories": categories,
         "menu_items": menu_items,
         "selected_category": selected_category,
     }
-    return render(request, "menu.html", context)
+    return await render_async(request, "menu.html", context)
+
+
+async def menu_item_detail(request, item_id):
+    item = await _aget_object_or_404(MenuItem.objects.all(), id=item_id)
+    return await render_async(request, "menu_item_detail.html", {"item": item})
+
+
+def menu_suggest(request):
+    """Typeahead suggestions for the menu search box (JSON, no database query)"""
+    started = time.perf_counter()
+    query = request.GET.get("q", "").strip()
+    try:
+        limit = int(request.GET.get("limit", typeahead.DEFAULT_LIMIT))
+    except ValueError:
+        limit = typeahead.DEFAULT_LIMIT
+    limit = min(max(limit, 1), 20)
+    response = JsonResponse(
+        {"query": query, "results": typeahead.suggest(query, limit=limit)}
+    )
+    response["Server-Timing"] = (
+        f"typeahead;dur={(time.perf_counter() - started) * 1000:.3f}"
+    )
+    return response
 
 
-def menu_item_detail(request, item_id):
-    item = get_object_or_404(MenuItem, id=item_id)
-    return render(request, "menu_item_detail.html", {"item": item})
+# Search result kind -> URL name of its page
+SEARCH_RESULT_URLS = {
+    "menu_item": "menu_item_detail",
+    "news": "feed_detail",
+    "customer": "admin:auth_user_change",
+}
+
+
+def search_view(request):
+    """JSON search over the menu and news (and customers, for staff)"""
+    query = request.GET.get("q", "").strip()
+    kinds = request.GET.getlist("kind") or ["menu_item", "news"]
+    if not request.user.is_staff:
+        kinds = [kind for kind in kinds if kind != "customer"]
+    kinds = [kind for kind in kinds if kind in SEARCH_RESULT_URLS]
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 50)
+    except ValueError:
+        limit = 20
+
+    results = []
+    if query and kinds:
+        documents = search.search(
+            query, kinds=kinds, public_only=not request.user.is_staff, limit=limit
+        )
+        results = [
+            {
+                "kind": document.kind,
+                "id": document.object_id,
+                "title": document.title,
+                "url": reverse(
+                    SEARCH_RESULT_URLS[document.kind], args=[document.object_id]
+                ),
+            }
+            for document in documents
+        ]
+    return JsonResponse({"query": query, "results": results})
 
 
 @login_required
+@metrics.timed(metrics.CHECKOUT_SECONDS, methods=("POST",), source="place_order")
 def place_order(request):
     """Order placement view"""
     if request.method == "POST":
+        # Replayed submit (double click / client retry): don't create a second order
+        token = get_checkout_token(request)
+        if find_replayed_order(request, token):
+            return redirect("order_history")
+
         try:
+            # Get cart items from POST data, before the order takes the token
+            cart_items = []
+            for key, value in request.POST.items():
+                if key.startswith("quantity_"):
+                    item_id = key.replace("quantity_", "")
+                    quantity = int(value)
+                    if quantity > 0:
+                        menu_item = get_object_or_404(MenuItem, id=item_id)
+                        cart_items.append({"item": menu_item, "quantity": quantity})
+
+            if not cart_items:
+                messages.error(request, "Vui lòng thêm món vào giỏ hàng.")
+                return redirect("menu")
+
             with transaction.atomic():
                 # Create the order
                 order = Order.objects.create(
                     customer=request.user,
                     special_instructions=request.POST.get("special_instructions", ""),
+                    idempotency_key=token,
                 )
 
-                # Get cart items from POST data
-                cart_items = []
-                for key, value in request.POST.items():
-                    if key.startswith("quantity_"):
-                        item_id = key.replace("quantity_", "")
-                        quantity = int(value)
-                        if quantity > 0:
-                            menu_item = get_object_or_404(MenuItem, id=item_id)
-                            cart_items.append({"item": menu_item, "quantity": quantity})
-
-                if not cart_items:
-                    messages.error(request, "Vui lòng thêm món vào giỏ hàng.")
-                    return redirect("menu")
-
                 # Create order items
                 for cart_item in cart_items:
                     OrderItem.objects.create(
@@ -133,9 +326,12 @@ def place_order(request):
                 # Calculate total and points
                 order.calculate_total()
 
-                # Add points to customer profile
-                if hasattr(request.user, "profile"):
-                    request.user.profile.add_points(order.points_earned)
+                # Points are credited after commit (see order_events.py)
+                outbox.enqueue("order.placed", order_id=order.id)
+                metrics.ORDERS_PLACED.inc_on_commit(source="place_order")
+                metrics.ORDER_REVENUE.inc_on_commit(
+                    float(order.total_amount), source="place_order"
+                )
 
                 messages.success(
                     request,
@@ -144,6 +340,12 @@ def place_order(request):
                 )
                 return redirect("order_history")
 
+        except IntegrityError:
+            # A concurrent submit with the same token won the race
+            if find_replayed_order(request, token):
+                return redirect("order_history")
+            messages.error(request, "Lỗi khi đặt hàng, vui lòng thử lại.")
+            return redirect("menu")
         except Exception as e:
             messages.error(request, f"Lỗi khi đặt hàng: {str(e)}")
             return redirect("menu")
@@ -161,11 +363,13 @@ def place_order(request):
         "categories": categories,
         "menu_items": menu_items,
         "profile": profile,
+        CHECKOUT_TOKEN_FIELD: issue_checkout_token(),
     }
     return render(request, "order.html", context)
 
 
 @login_required
+@metrics.timed(metrics.CHECKOUT_SECONDS, methods=("POST",), source="checkout")
 def checkout(request):
     """Checkout page with delivery address and payment"""
     # Get customer profile
@@ -174,22 +378,39 @@ def checkout(request):
         profile = request.user.profile
 
     if request.method == "POST":
+        # Replayed submit (double click / client retry): don't create a second order
+        token = get_checkout_token(request)
+        if find_replayed_order(request, token):
+            return redirect("order_history")
+
         try:
-            with transaction.atomic():
-                # Get delivery information
-                customer_name = request.POST.get("customer_name", "").strip()
-                phone = request.POST.get("phone", "").strip()
-                delivery_address = request.POST.get("delivery_address", "").strip()
-                payment_method = request.POST.get("payment_method", "").strip()
-                special_instructions = request.POST.get(
-                    "special_instructions", ""
-                ).strip()
-
-                # Validate required fields
-                if not all([customer_name, phone, delivery_address, payment_method]):
-                    messages.error(request, "Vui lòng điền đầy đủ thông tin giao hàng!")
-                    return redirect("checkout")
+            # Get delivery information
+            customer_name = request.POST.get("customer_name", "").strip()
+            phone = request.POST.get("phone", "").strip()
+            delivery_address = request.POST.get("delivery_address", "").strip()
+            payment_method = request.POST.get("payment_method", "").strip()
+            special_instructions = request.POST.get("special_instructions", "").strip()
+
+            # Validate required fields
+            if not all([customer_name, phone, delivery_address, payment_method]):
+                messages.error(request, "Vui lòng điền đầy đủ thông tin giao hàng!")
+                return redirect("checkout")
+
+            # Get cart items from POST data, before the order takes the token
+            cart_items = []
+            for key, value in request.POST.items():
+                if key.startswith("quantity_"):
+                    item_id = key.replace("quantity_", "")
+                    quantity = int(value)
+                    if quantity > 0:
+                        menu_item = get_object_or_404(MenuItem, id=item_id)
+                        cart_items.append({"item": menu_item, "quantity": quantity})
+
+            if not cart_items:
+                messages.error(request, "Giỏ hàng trống!")
+                return redirect("menu")
 
+            with transaction.atomic():
                 # Create the order
                 order = Order.objects.create(
                     customer=request.user,
@@ -198,23 +419,9 @@ def checkout(request):
                     delivery_address=delivery_address,
                     payment_method=payment_method,
                     special_instructions=special_instructions,
+                    idempotency_key=token,
                 )
 
-                # Get cart items from POST data
-                cart_items = []
-                for key, value in request.POST.items():
-                    if key.startswith("quantity_"):
-                        item_id = key.replace("quantity_", "")
-                        quantity = int(value)
-                        if quantity > 0:
-                            menu_item = get_object_or_404(MenuItem, id=item_id)
-                            cart_items.append({"item": menu_item, "quantity": quantity})
-
-                if not cart_items:
-                    order.delete()
-                    messages.error(request, "Giỏ hàng trống!")
-                    return redirect("menu")
-
                 # Create order items
                 for cart_item in cart_items:
                     OrderItem.objects.create(
@@ -231,15 +438,13 @@ def checkout(request):
                 else:
                     order.calculate_total()
 
-                # Add points to customer profile
-                if profile:
-                    profile.add_points(order.points_earned)
-
-                # Update profile address if empty
-                if profile and not profile.address:
-                    profile.address = delivery_address
-                    profile.phone = phone
-                    profile.save()
+                # Points and profile address backfill run after commit
+                # (see order_events.py)
+                outbox.enqueue("order.placed", order_id=order.id, backfill_contact=True)
+                metrics.ORDERS_PLACED.inc_on_commit(source="checkout")
+                metrics.ORDER_REVENUE.inc_on_commit(
+                    float(order.total_amount), source="checkout"
+                )
 
                 # Payment method message
                 payment_msg = {
@@ -256,6 +461,12 @@ def checkout(request):
                 )
                 return redirect("order_history")
 
+        except IntegrityError:
+            # A concurrent submit with the same token won the race
+            if find_replayed_order(request, token):
+                return redirect("order_history")
+            messages.error(request, "Lỗi khi đặt hàng, vui lòng thử lại.")
+            return redirect("checkout")
         except Exception as e:
             messages.error(request, f"Lỗi khi đặt hàng: {str(e)}")
             return redirect("checkout")
@@ -263,6 +474,7 @@ def checkout(request):
     # GET request
     context = {
         "profile": profile,
+        CHECKOUT_TOKEN_FIELD: issue_checkout_token(),
     }
     return render(request, "checkout.html", context)
 
@@ -271,10 +483,14 @@ def checkout(request):
 def order_history(request):
     """View order history and rewards"""
     profile = request.user.profile
-    orders = Order.objects.filter(customer=request.user)
+    orders = Order.objects.filter(customer=request.user).prefetch_related(
+        "items__menu_item"
+    )
 
     # Get reward redemptions
-    redemptions = RewardRedemption.objects.filter(customer=request.user)
+    redemptions = RewardRedemption.objects.filter(
+        customer=request.user
+    ).select_related("reward")
 
     context = {
         "profile": profile,
@@ -307,6 +523,7 @@ def redeem_discount(request):
             # Deduct points
             profile.points -= required_points
             profile.save()
+            metrics.POINTS_REDEEMED.inc(required_points, kind="discount")
 
             # Store discount in session for next order
             request.session["pending_discount"] = {
@@ -344,6 +561,7 @@ def redeem_reward(request, reward_id=None):
                 # Deduct points
                 profile.points -= required_points
                 profile.save()
+                metrics.POINTS_REDEEMED.inc(required_points, kind="reward")
 
                 # Store reward in session
                 request.session["pending_reward"] = {
@@ -437,179 +655,70 @@ def profile_view(request):
     return render(request, "profile.html", context)
 
 
-@staff_member_required
-def admin_reports(request):
-    """Admin reports view - daily, monthly, and annual reports"""
-
-    # Get filter parameters
-    report_type = request.GET.get("type", "daily")
-    start_date = request.GET.get("start_date")
-    end_date = request.GET.get("end_date")
-
-    # Set default date ranges
-    today = timezone.now().date()
-    if not start_date:
-        if report_type == "daily":
-            start_date = today
-        elif report_type == "monthly":
-            start_date = today.replace(day=1)
-        else:  # annual
-            start_date = today.replace(month=1, day=1)
-    else:
-        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-
-    if not end_date:
-        end_date = today
-    else:
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-
-    # Base queryset - orders within date range
-    orders = Order.objects.filter(
-        created_at__date__gte=start_date, created_at__date__lte=end_date
-    ).exclude(status="cancelled")
-
-    # Calculate summary statistics
-    summary = {
-        "total_orders": orders.count(),
-        "total_revenue": orders.aggregate(Sum("total_amount"))["total_amount__sum"]
-        or 0,
-        "total_discount": orders.aggregate(Sum("discount_applied"))[
-            "discount_applied__sum"
-        ]
-        or 0,
-        "total_points_earned": orders.aggregate(Sum("points_earned"))[
-            "points_earned__sum"
-        ]
-        or 0,
-        "average_order_value": orders.aggregate(Avg("total_amount"))[
-            "total_amount__avg"
-        ]
-        or 0,
-    }
-
-    # Orders with discount applied
-    discounted_orders = orders.filter(discount_applied__gt=0)
-    summary["discounted_orders_count"] = discounted_orders.count()
-    summary["discount_usage_rate"] = (
-        (summary["discounted_orders_count"] / summary["total_orders"] * 100)
-        if summary["total_orders"] > 0
-        else 0
-    )
-
-    # Top selling items
-    top_items = (
-        OrderItem.objects.filter(order__in=orders)
-        .values("menu_item__name", "menu_item__category__name")
-        .annotate(quantity_sold=Sum("quantity"), revenue=Sum("subtotal"))
-        .order_by("-quantity_sold")[:10]
-    )
-
-    # Sales by category
-    category_sales = (
-        OrderItem.objects.filter(order__in=orders)
-        .values("menu_item__category__name")
-        .annotate(total_quantity=Sum("quantity"), total_revenue=Sum("subtotal"))
-        .order_by("-total_revenue")
-    )
-
-    # Payment method breakdown
-    payment_methods = (
-        orders.values("payment_method")
-        .annotate(count=Count("id"), revenue=Sum("total_amount"))
-        .order_by("-count")
-    )
-
-    # Order status breakdown
-    status_breakdown = (
-        orders.values("status").annotate(count=Count("id")).order_by("-count")
-    )
-
-    # Time-based analysis
-    if report_type == "daily":
-        # Hourly breakdown for daily report
-        hourly_sales = (
-            orders.extra(select={"hour": "EXTRACT(hour FROM created_at)"})
-            .values("hour")
-            .annotate(orders_count=Count("id"), revenue=Sum("total_amount"))
-            .order_by("hour")
-        )
-
-        time_data = list(hourly_sales)
-
-    elif report_type == "monthly":
-        # Daily breakdown for monthly report
-        daily_sales = (
-            orders.annotate(date=TruncDate("created_at"))
-            .values("date")
-            .annotate(orders_count=Count("id"), revenue=Sum("total_amount"))
-            .order_by("date")
-        )
-
-        time_data = list(daily_sales)
-
-    else:  # annual
-        # Monthly breakdown for annual report
-        monthly_sales = (
-            orders.annotate(month=TruncMonth("created_at"))
-            .values("month")
-            .annotate(orders_count=Count("id"), revenue=Sum("total_amount"))
-            .order_by("month")
+def _report_page(request, report, template):
+    """The page shell of a dashboard; its widgets are fetched by report_widget"""
+    try:
+        report_type, start_date, end_date = reports.date_range(request.GET)
+    except ValueError:
+        messages.error(request, "Ngày không hợp lệ, hiển thị khoảng thời gian mặc định.")
+        report_type, start_date, end_date = reports.date_range(
+            {"type": request.GET.get("type", "daily")}
         )
-
-        time_data = list(monthly_sales)
-
-    # Customer insights
-    top_customers = (
-        orders.values("customer__username", "customer__profile__points")
-        .annotate(order_count=Count("id"), total_spent=Sum("total_amount"))
-        .order_by("-total_spent")[:10]
-    )
-
-    # VIP customers who ordered
-    vip_orders = orders.filter(customer__profile__is_vip=True)
-    summary["vip_orders_count"] = vip_orders.count()
-    summary["vip_revenue"] = (
-        vip_orders.aggregate(Sum("total_amount"))["total_amount__sum"] or 0
+    query = urlencode(
+        {
+            "type": report_type,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+        }
     )
-
-    # Discount breakdown
-    discount_breakdown = {
-        "5_percent": orders.filter(
-            discount_applied__gt=0,
-            discount_applied__lte=models.F("total_amount") * Decimal("0.06"),  # ~5%
-        ).count(),
-        "10_percent": orders.filter(
-            discount_applied__gt=models.F("total_amount") * Decimal("0.06")  # ~10%
-        ).count(),
+    widget_urls = {
+        name: reverse("report_widget", args=[report, name]) + "?" + query
+        for name in reports.DASHBOARDS[report]
     }
-
-    # Convert querysets to JSON for charts
-    chart_data = {
-        "time_series": json.dumps(time_data, default=str),
-        "category_sales": json.dumps(list(category_sales), default=str),
-        "payment_methods": json.dumps(list(payment_methods), default=str),
-        "status_breakdown": json.dumps(list(status_breakdown), default=str),
-    }
-
     context = {
         "report_type": report_type,
         "start_date": start_date,
         "end_date": end_date,
-        "summary": summary,
-        "top_items": top_items,
-        "category_sales": category_sales,
-        "payment_methods": payment_methods,
-        "status_breakdown": status_breakdown,
-        "time_data": time_data,
-        "top_customers": top_customers,
-        "discount_breakdown": discount_breakdown,
-        "chart_data": chart_data,
+        "widget_urls": widget_urls,
     }
+    return render(request, template, context)
+
+
+@staff_member_required
+@metrics.timed(metrics.REPORT_SECONDS, report="admin")
+def admin_reports(request):
+    """Admin reports view - daily, monthly, and annual reports"""
+    return _report_page(request, "admin", "admin_reports.html")
+
 
-    return render(request, "admin_reports.html", context)
+@staff_member_required
+@conditional_page
+def report_widget(request, report, widget):
+    """One widget of a report dashboard as JSON ({"data": ...})"""
+    if widget not in reports.DASHBOARDS.get(report, ()):
+        raise Http404("Unknown report widget")
+    try:
+        report_type, start_date, end_date = reports.date_range(request.GET)
+    except ValueError:
+        return JsonResponse({"error": "Ngày không hợp lệ"}, status=400)
+
+    widgets = reports.dashboard(report, report_type, start_date, end_date)
+    with metrics.REPORT_SECONDS.time(report=f"{report}.{widget}"):
+        result, failure = dashboards.run_widget(widget, widgets[widget], report=report)
+    if failure:
+        # Not cached: the next load tries again
+        response = JsonResponse(
+            {"error": failure}, status=504 if failure == "timeout" else 500
+        )
+        patch_cache_control(response, no_store=True)
+        return response
+    response = JsonResponse({"data": result}, encoder=reports.ReportJSONEncoder)
+    patch_cache_control(response, private=True, max_age=reports.WIDGET_MAX_AGE)
+    return response
 
 
 @staff_member_required
+@metrics.timed(metrics.REPORT_SECONDS, report="users")
 def user_reports(request):
     """User Reports - Shows customer activity and spending"""
 
@@ -621,24 +730,26 @@ def user_reports(request):
     users = User.objects.filter(profile__isnull=False).select_related("profile")
 
     if search_query:
-        users = users.filter(
-            Q(username__icontains=search_query)
-            | Q(email__icontains=search_query)
-            | Q(first_name__icontains=search_query)
-            | Q(last_name__icontains=search_query)
-        )
+        # Username, name or email, through the search index
+        users = users.filter(id__in=search.search_ids(search_query, "customer"))
+
+    # Annotate user statistics (one grouped query, not one per user)
+    active = ~Q(orders__status="cancelled")
+    users = users.annotate(
+        order_count=Count("orders", filter=active),
+        spent=Sum("orders__total_amount", filter=active),
+        discount_used=Sum("orders__discount_applied", filter=active),
+        discounted_orders=Count(
+            "orders", filter=active & Q(orders__discount_applied__gt=0)
+        ),
+    )
 
-    # Annotate user statistics
     user_stats = []
     for user in users:
-        orders = Order.objects.filter(customer=user).exclude(status="cancelled")
-
-        total_orders = orders.count()
-        total_spent = orders.aggregate(Sum("total_amount"))["total_amount__sum"] or 0
-        total_discount_used = (
-            orders.aggregate(Sum("discount_applied"))["discount_applied__sum"] or 0
-        )
-        orders_with_discount = orders.filter(discount_applied__gt=0).count()
+        total_orders = user.order_count
+        total_spent = user.spent or 0
+        total_discount_used = user.discount_used or 0
+        orders_with_discount = user.discounted_orders
 
         # Calculate total without discount (what they would have paid)
         total_before_discount = total_spent + total_discount_used
@@ -694,180 +805,13 @@ def user_reports(request):
 
 
 @staff_member_required
+@metrics.timed(metrics.REPORT_SECONDS, report="sales")
 def sales_reports(request):
     """Sales Reports - Daily, Monthly, and Annual sales analysis"""
+    return _report_page(request, "sales", "sales_reports.html")
 
-    # Get filter parameters
-    report_type = request.GET.get("type", "daily")
-    start_date = request.GET.get("start_date")
-    end_date = request.GET.get("end_date")
-
-    # Set default date ranges
-    today = timezone.now().date()
-    if not start_date:
-        if report_type == "daily":
-            start_date = today
-        elif report_type == "monthly":
-            start_date = today.replace(day=1)
-        else:  # annual
-            start_date = today.replace(month=1, day=1)
-    else:
-        start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-
-    if not end_date:
-        end_date = today
-    else:
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-
-    # Base queryset
-    orders = Order.objects.filter(
-        created_at__date__gte=start_date, created_at__date__lte=end_date
-    ).exclude(status="cancelled")
-
-    # Calculate summary
-    summary = {
-        "total_orders": orders.count(),
-        "total_sales": orders.aggregate(Sum("total_amount"))["total_amount__sum"] or 0,
-        "total_discount": orders.aggregate(Sum("discount_applied"))[
-            "discount_applied__sum"
-        ]
-        or 0,
-        "sales_before_discount": 0,
-    }
-    summary["sales_before_discount"] = (
-        summary["total_sales"] + summary["total_discount"]
-    )
-
-    # Time-based breakdown
-    if report_type == "daily":
-        # Hourly breakdown
-        sales_data = []
-        for hour in range(24):
-            hour_orders = orders.filter(created_at__hour=hour)
-            hour_total = (
-                hour_orders.aggregate(Sum("total_amount"))["total_amount__sum"] or 0
-            )
-            hour_discount = (
-                hour_orders.aggregate(Sum("discount_applied"))["discount_applied__sum"]
-                or 0
-            )
-
-            sales_data.append(
-                {
-                    "period": f"{hour}:00",
-                    "orders": hour_orders.count(),
-                    "sales": hour_total,
-                    "discount": hour_discount,
-                    "sales_before_discount": hour_total + hour_discount,
-                }
-            )
-
-    elif report_type == "monthly":
-        # Daily breakdown
-        current_date = start_date
-        sales_data = []
-
-        while current_date <= end_date:
-            day_orders = orders.filter(created_at__date=current_date)
-            day_total = (
-                day_orders.aggregate(Sum("total_amount"))["total_amount__sum"] or 0
-            )
-            day_discount = (
-                day_orders.aggregate(Sum("discount_applied"))["discount_applied__sum"]
-                or 0
-            )
-
-            sales_data.append(
-                {
-                    "period": current_date.strftime("%d/%m/%Y"),
-                    "date": current_date,
-                    "orders": day_orders.count(),
-                    "sales": day_total,
-                    "discount": day_discount,
-                    "sales_before_discount": day_total + day_discount,
-                }
-            )
-            current_date += timedelta(days=1)
-
-    else:  # annual
-        # Monthly breakdown
-        sales_data = (
-            orders.annotate(month=TruncMonth("created_at"))
-            .values("month")
-            .annotate(
-                orders=Count("id"),
-                sales=Sum("total_amount"),
-                discount=Sum("discount_applied"),
-            )
-            .order_by("month")
-        )
-
-        # Format the data
-        formatted_data = []
-        for item in sales_data:
-            formatted_data.append(
-                {
-                    "period": item["month"].strftime("%B %Y"),
-                    "date": item["month"],
-                    "orders": item["orders"],
-                    "sales": item["sales"] or 0,
-                    "discount": item["discount"] or 0,
-                    "sales_before_discount": (item["sales"] or 0)
-                    + (item["discount"] or 0),
-                }
-            )
-        sales_data = formatted_data
-
-    # Discount breakdown
-    discount_5_percent = orders.filter(
-        discount_applied__gt=0,
-        discount_applied__lte=F("total_amount") * 0.06,  # Approximately 5%
-    )
-    discount_10_percent = orders.filter(
-        discount_applied__gt=F("total_amount") * 0.06  # Approximately 10%
-    )
-
-    discount_breakdown = {
-        "5_percent_count": discount_5_percent.count(),
-        "5_percent_amount": discount_5_percent.aggregate(Sum("discount_applied"))[
-            "discount_applied__sum"
-        ]
-        or 0,
-        "10_percent_count": discount_10_percent.count(),
-        "10_percent_amount": discount_10_percent.aggregate(Sum("discount_applied"))[
-            "discount_applied__sum"
-        ]
-        or 0,
-    }
-
-    # Payment method breakdown
-    payment_methods = (
-        orders.values("payment_method")
-        .annotate(count=Count("id"), revenue=Sum("total_amount"))
-        .order_by("-count")
-    )
-
-    # Chart data
-    chart_data = {
-        "sales_data": json.dumps(list(sales_data), default=str),
-        "payment_methods": json.dumps(list(payment_methods), default=str),
-    }
-
-    context = {
-        "report_type": report_type,
-        "start_date": start_date,
-        "end_date": end_date,
-        "summary": summary,
-        "sales_data": sales_data,
-        "discount_breakdown": discount_breakdown,
-        "payment_methods": payment_methods,
-        "chart_data": chart_data,
-    }
-
-    return render(request, "sales_reports.html", context)
 
-
-def add_to_cart_view(request, item_id):
+async def add_to_cart_view(request, item_id):
     """Add item to cart (AJAX or normal POST)."""
     if request.method != "POST":
         return redirect("menu")
@@ -878,8 +822,8 @@ def add_to_cart_view(request, item_id):
         quantity = 1
 
     try:
-        cart_item = add_to_cart(request, item_id, quantity)
-        cart = get_or_create_cart(request)
+        cart_item = await sync_to_async(add_to_cart)(request, item_id, quantity)
+        cart = await sync_to_async(get_or_create_cart)(request)
 
         # AJAX response
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
@@ -887,8 +831,7 @@ def add_to_cart_view(request, item_id):
                 {
                     "success": True,
                     "message": f"Đã thêm {cart_item.menu_item.name} vào giỏ hàng",
-                    "cart_total_items": cart.total_items,
-                    "cart_total_price": float(cart.total_price),
+                    **_cart_totals(await cart_lines(cart)),
                 }
             )
 
@@ -910,6 +853,14 @@ def add_to_cart_view(request, item_id):
         return redirect("menu")
 
 
+def _cart_totals(lines):
+    """cart_total_items/cart_total_price of the AJAX cart responses"""
+    return {
+        "cart_total_items": sum(line.quantity for line in lines),
+        "cart_total_price": float(sum(line.subtotal for line in lines)),
+    }
+
+
 def cart_view(request):
     """Show cart page."""
     cart = get_or_create_cart(request)
@@ -917,7 +868,7 @@ def cart_view(request):
     return render(request, "cart.html", {"cart": cart, "items": items})
 
 
-def update_cart_item_view(request, item_id):
+async def update_cart_item_view(request, item_id):
     """Update or remove item from cart (AJAX or normal)."""
     if request.method != "POST":
         return redirect("cart_view")
@@ -929,16 +880,23 @@ def update_cart_item_view(request, item_id):
         return redirect("cart_view")
 
     try:
-        cart_item = update_cart_item(request, item_id, quantity)
-        cart = get_or_create_cart(request)
+        cart_item = await sync_to_async(update_cart_item)(request, item_id, quantity)
+        cart = await sync_to_async(get_or_create_cart)(request)
 
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+            lines = await cart_lines(cart)
             return JsonResponse(
                 {
                     "success": True,
-                    "cart_total_items": cart.total_items,
-                    "cart_total_price": float(cart.total_price),
-                    "item_subtotal": float(cart_item.subtotal) if cart_item else 0,
+                    **_cart_totals(lines),
+                    "item_subtotal": next(
+                        (
+                            float(line.subtotal)
+                            for line in lines
+                            if cart_item and line.id == cart_item.id
+                        ),
+                        0,
+                    ),
                 }
             )
 
@@ -952,22 +910,18 @@ def update_cart_item_view(request, item_id):
         return redirect("cart_view")
 
 
-def remove_from_cart_view(request, item_id):
+async def remove_from_cart_view(request, item_id):
     """Remove item from cart (AJAX or normal)."""
     if request.method != "POST":
         return redirect("cart_view")
 
     try:
-        remove_from_cart(request, item_id)
-        cart = get_or_create_cart(request)
+        await sync_to_async(remove_from_cart)(request, item_id)
+        cart = await sync_to_async(get_or_create_cart)(request)
 
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return JsonResponse(
-                {
-                    "success": True,
-                    "cart_total_items": cart.total_items,
-                    "cart_total_price": float(cart.total_price),
-                }
+                {"success": True, **_cart_totals(await cart_lines(cart))}
             )
 
         messages.success(request, "Đã xóa món khỏi giỏ hàng!")
@@ -980,11 +934,20 @@ def remove_from_cart_view(request, item_id):
         return redirect("cart_view")
 
 
+@metrics.timed(metrics.CHECKOUT_SECONDS, methods=("POST",), source="cart")
 def checkout_view(request):
     """
     Checkout: create Order + OrderItems from the cart, clear cart using clear_cart(),
     store a small success blob in session and redirect to order confirmation.
+    A POST carrying an already-used checkout token is a replay (double click or
+    client retry) and is answered with the existing order's confirmation.
     """
+    if request.method == "POST":
+        token = get_checkout_token(request)
+        replayed = find_replayed_order(request, token)
+        if replayed:
+            return redirect("order_confirmation", order_id=replayed.id)
+
     cart = get_or_create_cart(request)
     items = cart.items.select_related("menu_item").all()
 
@@ -1003,17 +966,23 @@ def checkout_view(request):
                     delivery_address=request.POST.get("delivery_address", ""),
                     payment_method=request.POST.get("payment_method", "cod"),
                     special_instructions=request.POST.get("special_instructions", ""),
+                    idempotency_key=token,
                 )
 
-                # create order items
-                for ci in items:
-                    OrderItem.objects.create(
-                        order=order,
-                        menu_item=ci.menu_item,
-                        quantity=ci.quantity,
-                        price=ci.menu_item.price,
-                        subtotal=ci.subtotal,
-                    )
+                # create order items from the prices captured in the cart
+                OrderItem.objects.bulk_create(
+                    [
+                        OrderItem(
+                            order=order,
+                            menu_item_id=ci.menu_item_id,
+                            quantity=ci.quantity,
+                            price=ci.price,
+                            price_version_id=ci.price_version_id,
+                            subtotal=ci.subtotal,
+                        )
+                        for ci in items
+                    ]
+                )
 
                 # apply discount if in session (same logic as before)
                 discount_info = request.session.pop("pending_discount", None)
@@ -1022,33 +991,36 @@ def checkout_view(request):
                 else:
                     order.calculate_total()
 
-                # add profile points if applicable
-                if request.user.is_authenticated and hasattr(request.user, "profile"):
-                    request.user.profile.add_points(order.points_earned)
-
-                # optionally update profile address if empty
-                if request.user.is_authenticated and hasattr(request.user, "profile"):
-                    profile = request.user.profile
-                    if not profile.address:
-                        profile.address = order.delivery_address
-                        profile.phone = order.phone
-                        profile.save()
-
-                # clear cart safely
-                clear_cart(request)
-
-                # ensure session cart_count cleared
-                request.session["cart_count"] = 0
-
-                # store success snapshot and redirect to confirmation
-                request.session["order_success"] = {
-                    "order_id": order.id,
-                    "total": float(order.total_amount),
-                    "points": order.points_earned,
-                }
+                # profile points and address backfill run after commit
+                # (see order_events.py)
+                outbox.enqueue("order.placed", order_id=order.id, backfill_contact=True)
+                metrics.ORDERS_PLACED.inc_on_commit(source="cart")
+                metrics.ORDER_REVENUE.inc_on_commit(
+                    float(order.total_amount), source="cart"
+                )
 
-                return redirect("order_confirmation", order_id=order.id)
+            # the transaction only covers the order itself; clear cart safely
+            clear_cart(request)
 
+            # ensure session cart_count cleared
+            request.session["cart_count"] = 0
+
+            # store success snapshot and redirect to confirmation
+            request.session["order_success"] = {
+                "order_id": order.id,
+                "total": float(order.total_amount),
+                "points": order.points_earned,
+            }
+
+            return redirect("order_confirmation", order_id=order.id)
+
+        except IntegrityError:
+            # A concurrent submit with the same token won the race
+            replayed = find_replayed_order(request, token)
+            if replayed:
+                return redirect("order_confirmation", order_id=replayed.id)
+            messages.error(request, "Lỗi đặt hàng, vui lòng thử lại.")
+            return redirect("checkout")
         except Exception as e:
             messages.error(request, f"Lỗi đặt hàng: {str(e)}")
             return redirect("checkout")
@@ -1057,16 +1029,22 @@ def checkout_view(request):
     return render(
         request,
         "checkout_cart.html",
-        {"cart": cart, "items": items, "user": request.user},
+        {
+            "cart": cart,
+            "items": items,
+            "user": request.user,
+            CHECKOUT_TOKEN_FIELD: issue_checkout_token(),
+        },
     )
 
 
 def order_confirmation_view(request, order_id):
     """Render order confirmation and show success toast/message from session snapshot."""
+    orders = Order.objects.prefetch_related("items__menu_item")
     if request.user.is_authenticated:
-        order = get_object_or_404(Order, id=order_id, customer=request.user)
+        order = get_object_or_404(orders, id=order_id, customer=request.user)
     else:
-        order = get_object_or_404(Order, id=order_id)
+        order = get_object_or_404(orders, id=order_id)
 
     order_success = request.session.pop("order_success", None)
     if order_success:
@@ -1084,3 +1062,178 @@ def order_confirmation_view(request, order_id):
 def reports_menu(request):
     """Reports landing page for admin"""
     return render(request, "reports_menu.html")
+
+
+@staff_member_required
+@metrics.timed(metrics.REPORT_SECONDS, report="performance")
+def performance_report(request):
+    """Per-view latency, query and template costs from the request profiling log"""
+    try:
+        hours = max(1, int(request.GET.get("hours", 24)))
+    except ValueError:
+        hours = 24
+
+    records = list(read_requests(since=timezone.now() - timedelta(hours=hours)))
+    views = summarize_requests(records)
+
+    bucket_labels = [f"≤{bound}" for bound in HISTOGRAM_BUCKETS]
+    bucket_labels.append(f">{HISTOGRAM_BUCKETS[-1]}")
+    for row in views:
+        peak = max(row["histogram"]) or 1
+        row["bars"] = [
+            (label, count, count * 100 // peak)
+            for label, count in zip(bucket_labels, row["histogram"])
+        ]
+
+    context = {
+        "hours": hours,
+        "views": views,
+        "total_requests": len(records),
+        "slow_requests": [r for r in records if r.get("slow")][-20:][::-1],
+        "sample_rate": getattr(settings, "REQUEST_PROFILE_SAMPLE_RATE", 0),
+        "slow_ms": getattr(settings, "REQUEST_PROFILE_SLOW_MS", None),
+    }
+    return render(request, "performance_report.html", context)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, for staff and settings.METRICS_ALLOWED_IPS"""
+    allowed_ips = getattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"])
+    if not (request.user.is_staff or request.META.get("REMOTE_ADDR") in allowed_ips):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _event_stream_response(channels, initial):
+    """
+    Stream `initial()` followed by every message published on `channels` as
+    Server-Sent Events. Requires an ASGI server: under WSGI (gunicorn,
+    runserver) Django consumes the stream synchronously, holding a worker
+    thread for as long as the page stays open (up to SSE_MAX_SECONDS).
+    """
+
+    async def stream():
+        subscription = pubsub.subscribe(channels)
+        try:
+            yield "retry: 3000\n\n"
+            for message in await sync_to_async(initial)():
+                yield f"event: order\ndata: {json.dumps(message)}\n\n"
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + SSE_MAX_SECONDS
+            while loop.time() < deadline:
+                message = await subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                if message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: order\ndata: {json.dumps(message)}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
+
+
+@staff_member_required
+def kitchen_board(request):
+    """Kitchen display board - orders arrive and move live via kitchen_stream"""
+    columns = [
+        (status, label)
+        for status, label in Order.STATUS_CHOICES
+        if status in ACTIVE_STATUSES
+    ]
+    return render(request, "kitchen_board.html", {"columns": columns})
+
+
+async def kitchen_stream(request):
+    """SSE feed of active orders followed by new orders and status changes"""
+    # staff_member_required, which only wraps sync views in Django 4.2
+    user = request.user
+    if not await sync_to_async(lambda: user.is_active and user.is_staff)():
+        return redirect_to_login(request.get_full_path(), reverse("admin:login"))
+    return _event_stream_response([KITCHEN_CHANNEL], kitchen_snapshot)
+
+
+@staff_member_required
+@require_POST
+def kitchen_update_status(request, order_id):
+    """Move an order to a new status from the kitchen board (AJAX)."""
+    status = request.POST.get("status", "")
+    if status not in dict(Order.STATUS_CHOICES):
+        return JsonResponse(
+            {"success": False, "error": "Trạng thái không hợp lệ"}, status=400
+        )
+
+    order = get_object_or_404(Order, id=order_id)
+    if not transition_orders(Order.objects.filter(id=order.id), status, request.user):
+        return JsonResponse(
+            {
+                "success": False,
+                "error": f"Không thể chuyển đơn hàng từ "
+                f"{order.get_status_display()} sang {status}",
+            },
+            status=409,
+        )
+
+    return JsonResponse({"success": True, "status": status})
+
+
+@staff_member_required
+@require_POST
+def kitchen_bulk_update_status(request):
+    """
+    Move many orders at once (AJAX), e.g. all "ready" orders to "delivered".
+    POST: status, plus from_status and/or order_ids to pick the orders.
+    """
+    status = request.POST.get("status", "")
+    from_status = request.POST.get("from_status", "")
+    order_ids = request.POST.getlist("order_ids")
+
+    if status not in dict(Order.STATUS_CHOICES) or not (from_status or order_ids):
+        return JsonResponse(
+            {"success": False, "error": "Yêu cầu không hợp lệ"}, status=400
+        )
+
+    orders = Order.objects.all()
+    if from_status:
+        orders = orders.filter(status=from_status)
+    if order_ids:
+        try:
+            orders = orders.filter(id__in=[int(order_id) for order_id in order_ids])
+        except ValueError:
+            return JsonResponse(
+                {"success": False, "error": "Mã đơn hàng không hợp lệ"}, status=400
+            )
+
+    moved = transition_orders(orders, status, request.user)
+    return JsonResponse({"success": True, "status": status, "moved": moved})
+
+
+@login_required
+def order_tracking(request, order_id):
+    """Live status page for one of the customer's orders"""
+    order = get_object_or_404(live_orders(), id=order_id, customer=request.user)
+    steps = [
+        (status, label)
+        for status, label in Order.STATUS_CHOICES
+        if status != "cancelled"
+    ]
+    return render(request, "order_tracking.html", {"order": order, "steps": steps})
+
+
+async def order_stream(request, order_id):
+    """SSE feed of status changes for one of the customer's orders"""
+    # login_required, which only wraps sync views in Django 4.2
+    user = request.user
+    if not await sync_to_async(lambda: user.is_authenticated)():
+        return redirect_to_login(request.get_full_path())
+    if not await Order.objects.filter(id=order_id, customer_id=user.pk).aexists():
+        raise Http404("No Order matches the given query.")
+    return _event_stream_response(
+        [order_channel(order_id)],
+        lambda: [order_snapshot(live_orders().get(id=order_id))],
+    )
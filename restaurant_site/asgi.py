@@ -3,14 +3,26 @@ ASGI config for restaurant_site project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The kitchen board and order tracking pages stream Server-Sent Events and need
+an ASGI server to do so, e.g.:
+
+    uvicorn restaurant_site.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "restaurant_site.settings")
 
 application = get_asgi_application()
+
+if settings.TEMPLATE_PRELOAD:
+    # Compile every template before the first request (restaurant/template_cache.py)
+    from restaurant.template_cache import preload
+
+    preload(raise_errors=True)
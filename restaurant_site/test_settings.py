@@ -0,0 +1,9 @@
+"""
+Settings for the test suite (pytest, or `manage.py test --settings=...`):
+the project settings without anything writing into the working tree.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+REQUEST_PROFILE_SAMPLE_RATE = 0
+REQUEST_PROFILE_SLOW_MS = None
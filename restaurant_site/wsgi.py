@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "restaurant_site.settings")
 
 application = get_wsgi_application()
+
+if settings.TEMPLATE_PRELOAD:
+    # Compile every template before the first request (restaurant/template_cache.py)
+    from restaurant.template_cache import preload
+
+    preload(raise_errors=True)